@@ -25,6 +25,7 @@ from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.typing import ConfigType
 
+from .catalog import SensorCatalog
 from .const import DOMAIN
 from .wallbox_api import WallboxApiClient
 
@@ -127,6 +128,11 @@ async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> Non
     await hass.config_entries.async_reload(entry.entry_id)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the persisted sensor catalog of a removed entry."""
+    await SensorCatalog(hass, entry.entry_id).async_remove()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     _LOGGER.info("[Enpal] async_unload_entry called for entry_id: %s", entry.entry_id)
 
@@ -1,6 +1,6 @@
 """Abstract Base Class for Enpal API Clients"""
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Callable, Awaitable
+from typing import Dict, Iterable, List, Any, Optional, Callable, Awaitable
 
 
 class EnpalApiClient(ABC):
@@ -24,20 +24,21 @@ class EnpalApiClient(ABC):
         Returns:
             Dictionary with structure:
             {
-                'sensors': List[Dict[str, Any]],  # Sensor dictionaries
+                'sensors': List[SensorReading],  # Immutable sensor readings
                 'source': str,  # 'html' or 'websocket'
+                'new_sensors': List[str],  # Ids first seen since the last report
             }
             
-            Sensor dict format:
-            {
-                'name': str,              # Friendly name with group prefix
-                'value': str,             # String representation of value
-                'unit': Optional[str],    # Unit (kWh, W, V, etc.)
-                'device_class': Optional[str],  # HA device class
-                'enabled': bool,          # If sensor group is enabled
-                'enpal_last_update': Optional[str],  # ISO timestamp
-                'group': str,             # Group name (Battery, Inverter, etc.)
-            }
+            SensorReading fields (see models.py):
+                sensor_id: str            # Entity unique_id (make_id of name)
+                name: str                 # Friendly name with group prefix
+                value: Optional[str]      # String representation of value
+                numeric: Optional[float]  # Parsed value, None for text states
+                unit: Optional[str]       # Unit (kWh, W, V, etc.)
+                device_class: Optional[str]  # HA device class
+                enabled: bool             # If sensor group is enabled
+                enpal_last_update: Optional[str]  # ISO timestamp
+                group: str                # Group name (Battery, Inverter, etc.)
             
         Raises:
             RuntimeError: If not connected
@@ -65,3 +66,11 @@ class EnpalApiClient(ABC):
     ) -> None:
         """Register a push-data callback. Only meaningful for push-capable clients."""
         pass
+
+    def set_dormant_ids(self, sensor_ids: Iterable[str]) -> None:
+        """Sensor ids without a live entity, which incremental updates may skip.
+
+        Only meaningful for clients with an incremental (push) path; full
+        fetches still return every sensor.
+        """
+        pass
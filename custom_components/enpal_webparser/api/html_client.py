@@ -28,6 +28,8 @@ class EnpalHtmlClient(EnpalApiClient):
         self.connected: bool = False
         # Firmware version parsed from the last fetched page (e.g. "8.51.0").
         self.firmware_version: str | None = None
+        # Sensor ids already reported as new_sensors.
+        self._reported_ids: set = set()
     
     async def connect(self) -> bool:
         """
@@ -46,7 +48,8 @@ class EnpalHtmlClient(EnpalApiClient):
         Fetch data from Enpal Box via HTTP and parse HTML.
         
         Returns:
-            Dictionary with 'sensors' key containing List[Dict[str, Any]]
+            Dictionary with 'sensors' key containing List[SensorReading]
+            and 'new_sensors' with the ids not returned by earlier fetches
             
         Raises:
             RuntimeError: If not connected
@@ -90,9 +93,13 @@ class EnpalHtmlClient(EnpalApiClient):
                 len(sensors)
             )
             
+            new_ids = [s.sensor_id for s in sensors if s.sensor_id not in self._reported_ids]
+            self._reported_ids.update(new_ids)
+
             return {
                 'sensors': sensors,
                 'source': 'html',
+                'new_sensors': new_ids,
             }
             
         except Exception as e:
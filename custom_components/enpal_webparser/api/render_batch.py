@@ -39,7 +39,8 @@ import io
 import re
 import struct
 import logging
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -67,6 +68,26 @@ _MAX_VALUE_TOKENS = 4
 # parser splits into several sensors). Leave those to the full scrape.
 _MAX_VALUE_LEN = 200
 
+# Blazor RenderTreeFrameType values used below.
+_FRAME_TEXT = 2
+_FRAME_ATTRIBUTE = 3
+
+# /wallbox page: text of each button label, and the texts preceding the
+# values of the status card ("Mode ", "Eco", "Status ", "Connected").
+WALLBOX_BUTTON_LABELS = {
+    "Start Charging": "start",
+    "Stop Charging": "stop",
+    "Set Eco": "eco",
+    "Set Full": "full",
+    "Set Solar": "solar",
+    "Set Smart": "smart",
+}
+WALLBOX_MODES = frozenset({"Eco", "Solar", "Full", "Smart", "Fast"})
+_WALLBOX_VALUE_LABELS = {
+    "Mode": "mode",
+    "Status": "status",
+}
+
 
 def _read_vlq(reader: io.BytesIO) -> int:
     """Decode a 7-bit variable-length quantity."""
@@ -355,6 +376,97 @@ def extract_change_handler_ids(raw: bytes) -> List[int]:
         return []
 
 
+def _iter_frames(raw: bytes) -> Iterator[Tuple[int, int, int, int]]:
+    """``(type, field1, field2, event_handler_id)`` of every reference frame.
+
+    Frames are 20 bytes; for text frames ``field1`` is the string index, for
+    attribute frames ``field1``/``field2`` are the name/value string indices.
+    """
+    footer = struct.unpack_from("<5i", raw, len(raw) - 20)
+    frames_offset, frames_end = footer[1], footer[2]
+    if not (0 <= frames_offset < frames_end <= len(raw)):
+        return
+    pos = frames_offset
+    count = struct.unpack_from("<i", raw, pos)[0]
+    pos += 4
+    for _ in range(count):
+        if pos + 20 > frames_end:
+            return
+        frame_type, field1, field2 = struct.unpack_from("<3i", raw, pos)
+        yield frame_type, field1, field2, struct.unpack_from("<q", raw, pos + 12)[0]
+        pos += 20
+
+
+@dataclass(frozen=True)
+class WallboxBatchState:
+    """What one /wallbox RenderBatch says about the wallbox.
+
+    Fields the batch does not carry are ``None`` (``handlers`` empty).
+    """
+
+    mode: Optional[str] = None
+    status: Optional[str] = None
+    handlers: Dict[str, int] = field(default_factory=dict)  # e.g. {"start": 3, "eco": 5}
+
+
+def extract_wallbox_state(raw: bytes) -> WallboxBatchState:
+    """Mode, status and button handlers of a /wallbox batch.
+
+    One walk over the reference frames, resolving text through the string
+    table:
+
+    * an ``onclick`` attribute frame holds the handler of the button whose
+      label text (``WALLBOX_BUTTON_LABELS``) follows it;
+    * a ``Mode``/``Status`` text is followed by its value text.
+      A diff that only re-renders the mode value carries no label; a lone
+      text in ``WALLBOX_MODES`` is taken as the mode.
+
+    Buttons re-rendered without their labels keep the DOM order of
+    ``WALLBOX_BUTTON_LABELS`` (the last six ``onclick`` handlers).
+
+    Returns an empty state on malformed frames.
+    """
+    strings = parse_render_batch_strings(raw)
+    if not strings or len(raw) < 24:
+        return WallboxBatchState()
+    values: Dict[str, str] = {}
+    handlers: Dict[str, int] = {}
+    onclick: List[int] = []
+    pending_handler: Optional[int] = None
+    pending_value: Optional[str] = None
+    try:
+        for frame_type, field1, _field2, event_id in _iter_frames(raw):
+            if not 0 <= field1 < len(strings):
+                continue
+            text = strings[field1]
+            if frame_type == _FRAME_ATTRIBUTE:
+                if text == "onclick" and event_id > 0:
+                    onclick.append(event_id)
+                    pending_handler = event_id
+                continue
+            if frame_type != _FRAME_TEXT:
+                continue
+            label = text.strip()
+            if pending_handler is not None and label in WALLBOX_BUTTON_LABELS:
+                handlers[WALLBOX_BUTTON_LABELS[label]] = pending_handler
+                pending_handler = None
+            elif label in _WALLBOX_VALUE_LABELS:
+                pending_value = _WALLBOX_VALUE_LABELS[label]
+            elif pending_value is not None:
+                if label and (pending_value != "mode" or label in WALLBOX_MODES):
+                    values[pending_value] = label
+                pending_value = None
+            elif label in WALLBOX_MODES:
+                values["mode"] = label
+    except Exception as e:  # noqa: BLE001 - never let a bad frame break the loop
+        _LOGGER.debug("[Enpal RenderBatch] wallbox scan failed: %s", e)
+        return WallboxBatchState()
+
+    if not handlers and len(onclick) >= len(WALLBOX_BUTTON_LABELS):
+        handlers = dict(zip(WALLBOX_BUTTON_LABELS.values(), onclick[-len(WALLBOX_BUTTON_LABELS):]))
+    return WallboxBatchState(values.get("mode"), values.get("status"), handlers)
+
+
 def is_patchable_value(value: Optional[str]) -> bool:
     """Whether a raw RenderBatch value should be applied on the fast path.
 
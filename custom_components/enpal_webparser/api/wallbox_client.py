@@ -2,7 +2,8 @@
 
 Connects to the /wallbox page via Blazor SignalR WebSocket, discovers
 button event handler IDs from the RenderBatch, and enables:
-- Reading wallbox status (mode + connection state) from RenderBatch data
+- Reading wallbox status (mode + connection state) from RenderBatch data,
+  pushed to a status callback as soon as a batch changes it
 - Clicking buttons (start/stop charging, set mode) via BeginInvokeDotNetFromJS
 """
 
@@ -10,10 +11,11 @@ import aiohttp
 import asyncio
 import json
 import logging
-import struct
 import time
-from typing import Optional, Dict, List
+from collections import deque
+from typing import Callable, Deque, Optional, Dict, List
 
+from .render_batch import WALLBOX_MODES, extract_wallbox_state
 from .protocol import (
     ComponentDescriptor,
     extract_blazor_components,
@@ -24,22 +26,30 @@ from .protocol import (
 
 _LOGGER = logging.getLogger(__name__)
 
-# Wallbox button labels in DOM order (matches Enpal Box /wallbox page)
-_BUTTON_ORDER = ["start", "stop", "eco", "full", "solar", "smart"]
+
+_MODE_BUTTONS = frozenset(mode.lower() for mode in WALLBOX_MODES)
 
 
 class WallboxBlazorClient:
     """Client for the /wallbox Blazor page on the Enpal Box.
 
     Uses Blazor SignalR protocol to:
-    - Read status (mode, connection state) from RenderBatch text content
+    - Read status (mode, connection state) from RenderBatch frames
     - Click buttons by dispatching browser events with discovered handler IDs
     """
 
     # Keep-alive ping interval (seconds) — Blazor Server expects periodic pings
     _PING_INTERVAL = 15
-    # Max age (seconds) before reconnecting on next operation
-    _MAX_CONNECTION_AGE = 300
+    # The connection is healthy while the box answered a WebSocket ping within
+    # _PONG_TIMEOUT and sent anything (its own keep-alives included) within
+    # 3 × _PING_INTERVAL; there is no age limit.
+    _PONG_TIMEOUT = 5
+    # Background reconnect after a lost connection: first attempt after
+    # _PREWARM_MIN_DELAY, doubling up to _PREWARM_MAX_DELAY while it fails.
+    _PREWARM_MIN_DELAY = 2
+    _PREWARM_MAX_DELAY = 300
+    # Press-to-confirmed-mode latencies kept for the reported percentiles.
+    _LATENCY_SAMPLES = 50
 
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip('/')
@@ -60,7 +70,14 @@ class WallboxBlazorClient:
         self._pending_click_call_id: Optional[int] = None
         self._dotnet_call_counter: int = 0
         self._renderer_interop_id: int = 1  # DotNet object ref ID (captured from JS.BeginInvokeJS)
-        self._connected_at: float = 0
+        self._last_activity: float = 0  # monotonic time of the last inbound frame
+        self._ping_rtt: Optional[float] = None  # seconds, last WebSocket ping
+        self._pong_waiter: Optional[asyncio.Future] = None
+        self._connect_lock = asyncio.Lock()
+        self._prewarm_task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._confirm_latencies: Deque[float] = deque(maxlen=self._LATENCY_SAMPLES)
+        self._status_callback: Optional[Callable[[Dict], None]] = None
 
     # ------------------------------------------------------------------
     # Public API
@@ -69,6 +86,7 @@ class WallboxBlazorClient:
     async def connect(self) -> bool:
         """Connect to /wallbox and discover button event handler IDs."""
         await self._cleanup()
+        self._closed = False
 
         try:
             _LOGGER.info("[Enpal Wallbox] Connecting to %s/wallbox", self.base_url)
@@ -104,7 +122,8 @@ class WallboxBlazorClient:
             # Open WebSocket
             host = self.base_url.replace('http://', '').replace('https://', '')
             ws_url = f"ws://{host}/_blazor?id={connection_token}"
-            self.ws = await self.session.ws_connect(ws_url)
+            # Pings are answered in _read_loop so our own pings' pongs can be timed.
+            self.ws = await self.session.ws_connect(ws_url, autoping=False)
 
             # Blazor handshake
             await self.ws.send_str('{"protocol":"blazorpack","version":1}\x1e')
@@ -131,7 +150,7 @@ class WallboxBlazorClient:
                 raise ValueError("No button handlers discovered from /wallbox")
 
             self.connected = True
-            self._connected_at = time.monotonic()
+            self._last_activity = time.monotonic()
 
             # Start keep-alive ping task
             self._ping_task = asyncio.create_task(self._ping_loop())
@@ -148,8 +167,12 @@ class WallboxBlazorClient:
             return False
 
     async def close(self) -> None:
-        """Close connection."""
+        """Close connection and stop reconnecting in the background."""
         _LOGGER.debug("[Enpal Wallbox] Closing connection")
+        self._closed = True
+        if self._prewarm_task and not self._prewarm_task.done():
+            self._prewarm_task.cancel()
+        self._prewarm_task = None
         await self._cleanup()
 
     def is_connected(self) -> bool:
@@ -163,20 +186,87 @@ class WallboxBlazorClient:
         """Return current wallbox status (Connected, Charging, etc.)."""
         return self._status
 
+    def set_status_callback(self, callback: Optional[Callable[[Dict], None]]) -> None:
+        """Call ``callback`` with the status dict whenever the circuit pushes a change.
+
+        Runs on the event loop, inside the reader task; must not block.
+        """
+        self._status_callback = callback
+
+    def is_circuit_open(self) -> bool:
+        """Whether RenderBatches are currently arriving over an open circuit."""
+        return self.connected and self.ws is not None and not self.ws.closed
+
+    @property
+    def ping_rtt(self) -> Optional[float]:
+        """Round-trip time (seconds) of the last answered WebSocket ping."""
+        return self._ping_rtt
+
+    @property
+    def confirm_latencies(self) -> List[float]:
+        """Recent times (ms) from a mode button press until the circuit showed the mode."""
+        return list(self._confirm_latencies)
+
+    async def wait_for_status(
+        self, predicate: Callable[[Dict], bool], timeout: float
+    ) -> Optional[Dict]:
+        """Wait until the status pushed by the circuit satisfies ``predicate``.
+
+        Returns that status dict, or None if it still does not after
+        ``timeout`` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not predicate(data := self._status_data()):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            self._status_event.clear()
+            try:
+                await asyncio.wait_for(self._status_event.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        return data
+
     def _is_connection_stale(self) -> bool:
-        """Check if the connection is too old and should be refreshed."""
+        """Check if the connection is closed or has gone silent."""
         if not self.connected or not self.ws:
             return True
         if self.ws.closed:
             return True
-        return (time.monotonic() - self._connected_at) > self._MAX_CONNECTION_AGE
+        return (time.monotonic() - self._last_activity) > self._PING_INTERVAL * 3
 
     async def ensure_fresh_connection(self) -> bool:
-        """Ensure connection is active and not stale. Reconnects if needed."""
-        if self._is_connection_stale():
-            _LOGGER.info("[Enpal Wallbox] Connection stale or closed, reconnecting")
-            return await self.connect()
-        return True
+        """Ensure connection is active and not stale. Reconnects if needed.
+
+        A reconnect already running (e.g. the background pre-warm) is waited
+        for instead of starting a second one.
+        """
+        async with self._connect_lock:
+            if self._is_connection_stale():
+                _LOGGER.info("[Enpal Wallbox] Connection stale or closed, reconnecting")
+                return await self.connect()
+            return True
+
+    def _schedule_prewarm(self) -> None:
+        """Reconnect in the background so the next command finds a live circuit."""
+        if self._closed or (self._prewarm_task and not self._prewarm_task.done()):
+            return
+        self._prewarm_task = asyncio.get_running_loop().create_task(self._prewarm())
+
+    async def _prewarm(self) -> None:
+        delay = self._PREWARM_MIN_DELAY
+        while not self._closed:
+            await asyncio.sleep(delay)
+            if self._closed:
+                return
+            async with self._connect_lock:
+                if not self._is_connection_stale():
+                    return  # a command reconnected meanwhile
+                _LOGGER.info("[Enpal Wallbox] Reconnecting in the background")
+                if await self.connect():
+                    return
+            delay = min(delay * 2, self._PREWARM_MAX_DELAY)
 
     async def click_button(self, button: str) -> bool:
         """Click a wallbox button by name.
@@ -209,6 +299,8 @@ class WallboxBlazorClient:
         self._pending_click_call_id = call_id
         self._click_event.clear()
         self._click_error = None
+        # Cleared before sending: the RenderBatch may overtake the ack.
+        self._status_event.clear()
 
         event_descriptor = {
             "eventHandlerId": handler_id,
@@ -235,6 +327,7 @@ class WallboxBlazorClient:
         ]
 
         try:
+            pressed = time.monotonic()
             await self._send_message(click_msg)
             _LOGGER.debug("[Enpal Wallbox] Click message sent (call_id %d, renderer_id %d)",
                           call_id, self._renderer_interop_id)
@@ -251,11 +344,14 @@ class WallboxBlazorClient:
                 return False
 
             # Click was accepted — wait briefly for RenderBatch with status update
-            self._status_event.clear()
-            try:
-                await asyncio.wait_for(self._status_event.wait(), timeout=3.0)
-            except asyncio.TimeoutError:
-                pass  # Mode may not have changed (e.g. clicking current mode)
+            if button in _MODE_BUTTONS:
+                if await self.wait_for_status(lambda data: data["mode"] == button, timeout=3.0):
+                    self._confirm_latencies.append((time.monotonic() - pressed) * 1000)
+            elif not self._status_event.is_set():
+                try:
+                    await asyncio.wait_for(self._status_event.wait(), timeout=3.0)
+                except asyncio.TimeoutError:
+                    pass  # Status may not have changed
 
             _LOGGER.info("[Enpal Wallbox] Button '%s' clicked successfully. Mode=%s, Status=%s",
                          button, self._mode, self._status)
@@ -281,17 +377,18 @@ class WallboxBlazorClient:
     async def get_wallbox_data(self) -> Optional[Dict]:
         """Return current wallbox status as a dict (compatible with old addon API).
 
-        Performs a lightweight HTTP GET to /wallbox on every call so that
-        external status changes (e.g. via the Enpal app) are picked up
-        within the normal polling interval.  The existing WebSocket
-        connection is *not* disturbed — it stays open for button clicks.
+        While the circuit is open, every status change (including ones made
+        via the Enpal app) arrives as a RenderBatch and is already applied,
+        so nothing is fetched.  Only when the circuit is down, or has not
+        rendered the mode yet, a lightweight HTTP GET to /wallbox reads the
+        pre-rendered status instead.
         """
-        # Lightweight poll: GET /wallbox HTML and parse pre-rendered status
-        mode, status = await self._fetch_status_via_http()
-        if mode:
-            self._mode = mode
-        if status:
-            self._status = status
+        if not self.is_circuit_open() or self._mode is None:
+            mode, status = await self._fetch_status_via_http()
+            if mode:
+                self._mode = mode
+            if status:
+                self._status = status
 
         # Fallback: if we never got any status yet, ensure WebSocket is up
         # so the initial RenderBatch seeds the values.
@@ -299,6 +396,9 @@ class WallboxBlazorClient:
             if not await self.ensure_fresh_connection():
                 return None
 
+        return self._status_data()
+
+    def _status_data(self) -> Dict:
         return {
             "mode": self._mode.lower() if self._mode else None,
             "status": self._status.lower() if self._status else None,
@@ -347,34 +447,71 @@ class WallboxBlazorClient:
     # ------------------------------------------------------------------
 
     async def _read_loop(self):
-        """Background task to read and process incoming WS messages."""
+        """Background task to read and process incoming WS messages.
+
+        Every frame counts as a sign of life. Pings of the box are answered
+        here (the socket is opened without autoping); pongs resolve the
+        pending liveness check of ``_ping_loop``. Unless the loop was
+        cancelled, a lost connection starts the background pre-warm.
+        """
+        cancelled = False
         try:
             async for msg in self.ws:
+                self._last_activity = time.monotonic()
                 if msg.type == aiohttp.WSMsgType.BINARY:
                     await self._handle_messages(msg.data)
+                elif msg.type == aiohttp.WSMsgType.PING:
+                    await self.ws.pong(msg.data)
+                elif msg.type == aiohttp.WSMsgType.PONG:
+                    if self._pong_waiter and not self._pong_waiter.done():
+                        self._pong_waiter.set_result(None)
                 elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.CLOSING):
                     _LOGGER.warning("[Enpal Wallbox] Connection lost (type=%s)", msg.type)
                     break
         except asyncio.CancelledError:
-            pass
+            cancelled = True
         except Exception as e:
             _LOGGER.error("[Enpal Wallbox] Read loop error: %s", e)
         finally:
             self.connected = False
+            if not cancelled:
+                self._schedule_prewarm()
 
     async def _ping_loop(self):
-        """Send periodic SignalR keep-alive pings."""
+        """Send periodic SignalR keep-alives and check that the box answers.
+
+        Each round also sends a WebSocket ping and times its pong. A missing
+        pong closes the socket, which ends the read loop and so starts the
+        pre-warm.
+        """
+        loop = asyncio.get_running_loop()
         try:
             while self.connected and self.ws and not self.ws.closed:
                 await asyncio.sleep(self._PING_INTERVAL)
-                if self.connected and self.ws and not self.ws.closed:
-                    ping_msg = encode_message([6])
-                    await self.ws.send_bytes(ping_msg)
-                    _LOGGER.debug("[Enpal Wallbox] Sent keep-alive ping")
+                if not (self.connected and self.ws and not self.ws.closed):
+                    break
+                await self.ws.send_bytes(encode_message([6]))
+                self._pong_waiter = loop.create_future()
+                sent_at = loop.time()
+                await self.ws.ping()
+                try:
+                    await asyncio.wait_for(self._pong_waiter, timeout=self._PONG_TIMEOUT)
+                    self._ping_rtt = loop.time() - sent_at
+                    _LOGGER.debug("[Enpal Wallbox] Keep-alive, ping RTT %.0f ms",
+                                  self._ping_rtt * 1000)
+                except asyncio.TimeoutError:
+                    _LOGGER.warning("[Enpal Wallbox] No pong within %ss, dropping connection",
+                                    self._PONG_TIMEOUT)
+                    self.connected = False
+                if not self.connected:
+                    await self.ws.close()
+                    break
         except asyncio.CancelledError:
             pass
         except Exception as e:
             _LOGGER.debug("[Enpal Wallbox] Ping loop ended: %s", e)
+        finally:
+            self._pong_waiter = None
 
     async def _handle_messages(self, data: bytes):
         """Dispatch decoded MessagePack messages."""
@@ -506,66 +643,35 @@ class WallboxBlazorClient:
     # ------------------------------------------------------------------
 
     def _process_render_batch(self, data: bytes):
-        """Extract button handler IDs and status text from RenderBatch data."""
-        # 1. Find onclick event handler IDs
-        handlers = self._find_onclick_handlers(data)
-        if handlers:
-            # Take last 6 handlers (skip navigation handlers)
-            if len(handlers) >= 6:
-                wallbox_handlers = handlers[-6:]
-                self._button_handlers = dict(zip(_BUTTON_ORDER, wallbox_handlers))
-                _LOGGER.debug("[Enpal Wallbox] Discovered button handlers: %s",
-                              self._button_handlers)
-
-        # 2. Extract mode and status text
-        mode, status = self._extract_status_text(data)
+        """Apply button handler IDs, mode and status of one RenderBatch.
+
+        Handlers are merged: a diff that re-renders some buttons keeps the
+        handlers of the others.
+        """
+        state = extract_wallbox_state(data)
+        if state.handlers:
+            self._button_handlers.update(state.handlers)
+            _LOGGER.debug("[Enpal Wallbox] Discovered button handlers: %s",
+                          self._button_handlers)
+
         changed = False
-        if mode and mode != self._mode:
-            self._mode = mode
-            changed = True
-        if status and status != self._status:
-            self._status = status
-            changed = True
+        for attr, value in (("_mode", state.mode), ("_status", state.status)):
+            if value and value != getattr(self, attr):
+                setattr(self, attr, value)
+                changed = True
         if changed:
             self._status_event.set()
             _LOGGER.debug("[Enpal Wallbox] Status update: Mode=%s, Status=%s",
                           self._mode, self._status)
-
-    @staticmethod
-    def _find_onclick_handlers(data: bytes) -> List[int]:
-        """Find event handler IDs from onclick attribute frames in RenderBatch."""
-        if len(data) < 24:
-            return []
-
-        # Footer: last 20 bytes = 5 × Int32 section offsets
-        footer = struct.unpack_from('<5I', data, len(data) - 20)
-        ref_frames_offset = footer[1]
-        disp_comp_offset = footer[2]
-
-        if ref_frames_offset >= len(data) or disp_comp_offset >= len(data):
-            return []
-
-        pos = ref_frames_offset
-        frame_count = struct.unpack_from('<I', data, pos)[0]
-        pos += 4
-
-        handlers = []
-        frame_size = 20
-        for _ in range(frame_count):
-            if pos + frame_size > disp_comp_offset:
-                break
-            frame_type = struct.unpack_from('<I', data, pos)[0]
-            if frame_type == 3:  # Attribute frame
-                event_id = struct.unpack_from('<Q', data, pos + 12)[0]
-                if event_id > 0:
-                    handlers.append(event_id)
-            pos += frame_size
-
-        return handlers
+            if self._status_callback:
+                try:
+                    self._status_callback(self._status_data())
+                except Exception as e:  # never let a consumer stop the reader
+                    _LOGGER.error("[Enpal Wallbox] Status callback failed: %s", e)
 
     @staticmethod
     def _extract_status_text(data: bytes) -> tuple:
-        """Extract 'Mode X' and 'Status Y' from RenderBatch binary data."""
+        """Extract 'Mode X' and 'Status Y' from the pre-rendered /wallbox HTML."""
         text = data.decode('utf-8', errors='replace')
         mode = None
         status = None
@@ -19,7 +19,7 @@ import logging
 import re
 import time
 from collections import deque
-from typing import Awaitable, Callable, Deque, Dict, List, Optional
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 
 from .base import EnpalApiClient
 from .protocol import (
@@ -38,6 +38,9 @@ from .render_batch import (
     is_patchable_value,
 )
 
+if TYPE_CHECKING:
+    from ..models import SensorReading
+
 _LOGGER = logging.getLogger(__name__)
 
 # Minimum seconds between coordinator push notifications triggered by a
@@ -54,6 +57,9 @@ _NUMERIC_DEVICE_CLASSES = frozenset({
     "frequency", "battery", "humidity", "pressure",
 })
 
+# Strips the markup of the firmware 8.51 Inverter.System.State <ul> blob.
+_TAG_RE = re.compile(r"<[^>]+>")
+
 # JS calls whose .NET caller deserialises the result into a value type or
 # dereferences it. Answering those with null raises inside the circuit and the
 # box tears the connection down, so they get a plausible literal instead.
@@ -109,6 +115,8 @@ class EnpalWebSocketClient(EnpalApiClient):
     _PING_INTERVAL = 15
 
     def __init__(self, base_url: str, groups: List[str] = None, excluded_groups: List[str] = None):
+        from ..derived import DerivedSensorEngine
+
         self.base_url = base_url.rstrip('/')
         self.groups = groups or [
             'Battery', 'Inverter', 'IoTEdgeDevice',
@@ -128,8 +136,19 @@ class EnpalWebSocketClient(EnpalApiClient):
         self._last_push_time: float = 0
         self._last_activity: float = 0  # Last message received from server
         # Cached full sensor list + index for incremental RenderBatch patching
-        self._baseline: Optional[List[Dict]] = None
+        self._baseline: Optional[List["SensorReading"]] = None
         self._key_index: Dict[str, List[int]] = {}
+        self._derived = DerivedSensorEngine()
+        # Groups touched since the last push; None = all (fresh baseline).
+        self._dirty_groups: Optional[Set[str]] = None
+        # Sensors without a live entity: RenderBatch rows for them are skipped.
+        self._dormant_ids: FrozenSet[str] = frozenset()
+        # Ids ever reported as new, and those not handed out yet.
+        self._reported_ids: Set[str] = set()
+        self._new_ids: List[str] = []
+        # Last Inverter.System.State row applied (raw value, (decimal, bits)).
+        self._system_state_raw: Optional[str] = None
+        self._system_state: Optional[Tuple[str, str]] = None
         self._circuit_started: float = 0  # monotonic time of the last StartCircuit
         self._recent_targets: Deque[str] = deque(maxlen=10)
         self._batches_dumped: int = 0
@@ -252,9 +271,22 @@ class EnpalWebSocketClient(EnpalApiClient):
     def set_data_callback(
         self, callback: Optional[Callable[[Dict], Awaitable[None]]]
     ) -> None:
-        """Register push-data callback (called on every RenderBatch)."""
+        """Register push-data callback (called on every RenderBatch).
+
+        The payload carries ``changed_groups``: the groups whose readings
+        changed since the previous push, or None when every group may have;
+        and ``new_sensors``: ids that appeared since the last report.
+        """
         self._data_callback = callback
 
+    def set_dormant_ids(self, sensor_ids: Iterable[str]) -> None:
+        """Skip RenderBatch rows of these sensors on the fast path.
+
+        Inputs of derived sensors stay live. The periodic full scrape still
+        refreshes every sensor.
+        """
+        self._dormant_ids = frozenset(sensor_ids) - self._derived.tracked
+
     async def fetch_data(self) -> Dict:
         """Fetch current sensor data by HTTP-scraping /deviceMessages.
 
@@ -272,7 +304,7 @@ class EnpalWebSocketClient(EnpalApiClient):
             raise
         # Refresh the baseline used for incremental RenderBatch patching.
         self._set_baseline(sensors)
-        return {'sensors': sensors, 'source': 'websocket'}
+        return {'sensors': sensors, 'source': 'websocket', 'new_sensors': self._take_new_ids()}
 
     async def close(self) -> None:
         """Shut down WebSocket + HTTP session."""
@@ -321,7 +353,7 @@ class EnpalWebSocketClient(EnpalApiClient):
     # HTTP scrape helper
     # ------------------------------------------------------------------
 
-    async def _scrape_and_parse(self) -> List[Dict]:
+    async def _scrape_and_parse(self) -> List["SensorReading"]:
         """HTTP GET /deviceMessages → parse with existing HTML parser."""
         from ..utils import parse_enpal_html_sensors
 
@@ -546,6 +578,7 @@ class EnpalWebSocketClient(EnpalApiClient):
                 _LOGGER.exception("[Enpal WebSocket] Baseline scrape failed")
                 return
             self._set_baseline(sensors)
+            self._dirty_groups = None
 
         if rows:
             try:
@@ -601,12 +634,29 @@ class EnpalWebSocketClient(EnpalApiClient):
         """Send the current baseline to the registered data callback."""
         if self._data_callback is None or self._baseline is None:
             return
+        groups, self._dirty_groups = self._dirty_groups, set()
         try:
-            await self._data_callback({'sensors': self._baseline, 'source': 'websocket'})
+            await self._data_callback({
+                'sensors': self._baseline,
+                'source': 'websocket',
+                'changed_groups': frozenset(groups) if groups is not None else None,
+                'new_sensors': self._take_new_ids(),
+            })
         except Exception:
             _LOGGER.exception("[Enpal WebSocket] Push callback failed")
 
-    def _set_baseline(self, sensors: List[Dict]) -> None:
+    def _note_new(self, sensors: Iterable["SensorReading"]) -> None:
+        for sensor in sensors:
+            if sensor.sensor_id not in self._reported_ids:
+                self._reported_ids.add(sensor.sensor_id)
+                self._new_ids.append(sensor.sensor_id)
+
+    def _take_new_ids(self) -> List[str]:
+        """Ids of sensors created since the last call (push or fetch)."""
+        new_ids, self._new_ids = self._new_ids, []
+        return new_ids
+
+    def _set_baseline(self, sensors: List["SensorReading"]) -> None:
         """Store the full sensor list and (re)build the key → index map.
 
         The index maps ``make_id(<raw dotted key>)`` to the positions of the
@@ -620,39 +670,53 @@ class EnpalWebSocketClient(EnpalApiClient):
         # the HTTP scrape does not contain the device rows, so a fresh scrape
         # would silently drop them on every periodic poll.
         if self._baseline:
-            known = {make_id(s.get("name", "")) for s in sensors}
+            known = {s.sensor_id for s in sensors}
             for sensor in self._baseline:
-                if sensor.get("raw_key") and make_id(sensor.get("name", "")) not in known:
+                if sensor.raw_key and sensor.sensor_id not in known:
                     sensors.append(sensor)
 
+        # Carried-over rows can complete the inputs of derived sensors (8.51
+        # has no PowerSensor card in the scrape), so recompute on the merged list.
+        self._derived.apply(sensors)
+
         self._baseline = sensors
+        self._note_new(sensors)
+        self._system_state_raw = None
+        self._system_state = None
         index: Dict[str, List[int]] = {}
         for i, sensor in enumerate(sensors):
-            name = sensor.get("name", "")
-            group = sensor.get("group", "")
+            name = sensor.name
+            group = sensor.group
             label = name
             prefix = f"{group}: "
             if group and name.startswith(prefix):
                 label = name[len(prefix):]
             ids = {make_id(label)}
-            if sensor.get("raw_key"):
-                ids.add(make_id(sensor["raw_key"]))
+            if sensor.raw_key:
+                ids.add(make_id(sensor.raw_key))
             for key_id in ids:
                 index.setdefault(key_id, []).append(i)
         self._key_index = index
 
     def _apply_diff(self, rows: List[Dict]) -> None:
-        """Patch baseline sensors in place from extracted RenderBatch rows."""
+        """Replace baseline readings from extracted RenderBatch rows.
+
+        Readings are immutable; a patched row swaps in a new reading at the
+        same baseline position.
+        """
         from ..utils import (
             make_id,
             get_class_and_unit,
             normalize_value_and_unit,
             is_strict_number,
         )
+        from ..timestamps import normalize_timestamp
         from ..const import UNIT_DEVICE_CLASS_MAP, DEFAULT_UNITS, SENSOR_KEY_ALIASES
 
         patched = 0
         created = 0
+        changed: Dict[str, "SensorReading"] = {}
+        known = len(self._baseline)
         for row in rows:
             value = row.get("value")
             raw_key = row["key"]
@@ -661,7 +725,7 @@ class EnpalWebSocketClient(EnpalApiClient):
             # blob (>800 chars); it is expanded into its own sensors instead of
             # being patched as a plain value.
             if key == "Inverter.System.State":
-                created += self._apply_system_state_row(row)
+                created += self._apply_system_state_row(row, changed)
                 continue
             if not is_patchable_value(value):
                 continue
@@ -671,12 +735,17 @@ class EnpalWebSocketClient(EnpalApiClient):
                 # in the HTTP scrape, so create the sensor from the row.
                 if self._create_sensor_from_row(row):
                     created += 1
+                    sensor = self._baseline[-1]
+                    changed[sensor.sensor_id] = sensor
                 continue
             # Ambiguous cross-group keys are left to the full scrape.
             if len(indices) != 1:
                 continue
 
-            sensor = self._baseline[indices[0]]
+            index = indices[0]
+            sensor = self._baseline[index]
+            if sensor.sensor_id in self._dormant_ids:
+                continue
             unit_raw = row.get("unit")
             combined = value if not unit_raw else f"{value} {unit_raw}"
             unit, device_class = get_class_and_unit(combined, UNIT_DEVICE_CLASS_MAP)
@@ -695,47 +764,72 @@ class EnpalWebSocketClient(EnpalApiClient):
             if self._is_numeric_sensor(sensor) and not is_strict_number(value_clean):
                 continue
 
-            sensor["value"] = value_clean
-            if unit:
-                sensor["unit"] = unit
-            if row.get("timestamp"):
-                sensor["enpal_last_update"] = row["timestamp"]
+            timestamp = row.get("timestamp")
+            sensor = sensor.with_value(
+                value_clean,
+                normalize_timestamp(timestamp) if timestamp else sensor.enpal_last_update,
+                unit,
+            )
+            self._baseline[index] = sensor
             patched += 1
+            changed[sensor.sensor_id] = sensor
+
+        derived = self._derived.update(changed)
+        # Row, system-state and derived sensors created here were appended.
+        self._note_new(self._baseline[known:])
+        if self._dirty_groups is not None:
+            self._dirty_groups.update(sensor.group for sensor in changed.values())
+            for sensor_id in derived:
+                self._dirty_groups.add(self._derived.get(sensor_id).group)
 
         if patched:
             _LOGGER.debug("[Enpal WebSocket] Incrementally patched %d sensor(s)", patched)
+        if derived:
+            _LOGGER.debug(
+                "[Enpal WebSocket] Recalculated derived sensor(s): %s", ", ".join(derived)
+            )
         if created:
             _LOGGER.info("[Enpal WebSocket] Created %d sensor(s) from RenderBatch rows", created)
 
-    def _apply_system_state_row(self, row: Dict) -> int:
+    def _apply_system_state_row(
+        self, row: Dict, changed: Optional[Dict[str, "SensorReading"]] = None
+    ) -> int:
         """Expand an Inverter.System.State row into its split sensors.
 
         On firmware 8.50 the HTML full scrape handled this via
         ``expand_inverter_system_state``; on 8.51 the value only arrives over
         the WebSocket, as HTML markup. Tags are stripped so the existing
-        parser (and entity ids) keep working. Returns the number of newly
-        created sensors.
+        parser (and entity ids) keep working. The bitfield changes a few times
+        a day, so a repeated (decimal, bits) pair is skipped outright and only
+        split sensors whose value flipped are written (and added to
+        ``changed``). Returns the number of newly created sensors.
         """
-        from ..utils import make_id, expand_inverter_system_state
+        from ..utils import make_id, expand_inverter_system_state, match_inverter_system_state
+        from ..timestamps import normalize_timestamp
         from ..const import SENSOR_KEY_GROUPS
 
         group = SENSOR_KEY_GROUPS.get("Inverter.System.State")
         if group is None:
             return 0
         value = row.get("value") or ""
-        if "Bits" not in value:
+        if value == self._system_state_raw or "Bits" not in value:
             return 0
-        text = re.sub(r"<[^>]+>", " ", value)
+        text = _TAG_RE.sub(" ", value)
+        state = match_inverter_system_state(text)
+        self._system_state_raw = value
+        if state is not None and state == self._system_state:
+            return 0
+        self._system_state = state
 
         created = 0
+        flipped = 0
         enabled = group not in self.excluded_groups
         prefix = f"{group}: "
-        for sensor in expand_inverter_system_state(group, text, row.get("timestamp")):
-            # The HTML parser creates the same sensors but without a "group"
-            # field, so _set_baseline indexes them under the full name instead
-            # of the label. Look up (and register) both ids to stay compatible
-            # with a firmware 8.50 scrape baseline.
-            name = sensor["name"]
+        timestamp = normalize_timestamp(row.get("timestamp"))
+        for sensor in expand_inverter_system_state(group, text, timestamp, enabled):
+            # _set_baseline indexes grouped sensors under their label; look up
+            # (and register) the full-name id as well so either form matches.
+            name = sensor.name
             label = name[len(prefix):] if name.startswith(prefix) else name
             ids = {make_id(name), make_id(label)}
             indices = None
@@ -745,17 +839,25 @@ class EnpalWebSocketClient(EnpalApiClient):
                     break
             if indices and len(indices) == 1:
                 target = self._baseline[indices[0]]
-                target["value"] = sensor["value"]
-                target["enpal_last_update"] = sensor["enpal_last_update"]
+                if target.value == sensor.value:
+                    continue
+                target = target.with_value(sensor.value, sensor.enpal_last_update)
+                self._baseline[indices[0]] = target
+                flipped += 1
             elif not indices:
-                sensor["group"] = group
-                sensor["raw_key"] = "Inverter.System.State"
-                sensor["enabled"] = enabled
+                sensor = sensor.replace(raw_key="Inverter.System.State")
                 idx = len(self._baseline)
                 self._baseline.append(sensor)
                 for sensor_id in ids:
                     self._key_index.setdefault(sensor_id, []).append(idx)
+                target = sensor
                 created += 1
+            else:
+                continue
+            if changed is not None:
+                changed[target.sensor_id] = target
+        if flipped:
+            _LOGGER.debug("[Enpal WebSocket] Inverter system state: %d flag(s) changed", flipped)
         return created
 
     def _create_sensor_from_row(self, row: Dict) -> bool:
@@ -768,17 +870,17 @@ class EnpalWebSocketClient(EnpalApiClient):
         """
         from ..utils import (
             make_id,
-            friendly_name,
             get_class_and_unit,
             normalize_value_and_unit,
         )
+        from ..timestamps import normalize_timestamp
         from ..const import (
             UNIT_DEVICE_CLASS_MAP,
             DEFAULT_UNITS,
-            DEVICE_CLASS_OVERRIDES,
             SENSOR_KEY_ALIASES,
             SENSOR_KEY_GROUPS,
         )
+        from ..registry import get_registry
 
         raw_key = row["key"]
         # Junk guard for the fallback: real sensor keys start with a letter
@@ -796,28 +898,29 @@ class EnpalWebSocketClient(EnpalApiClient):
             combined, unit, device_class, DEFAULT_UNITS
         )
 
-        sensor = {
-            "name": friendly_name(group, key),
-            "value": value_clean,
-            "unit": unit,
-            "device_class": device_class,
-            "enabled": group not in self.excluded_groups,
-            "enpal_last_update": row.get("timestamp"),
-            "group": group,
-            "raw_key": raw_key,
-        }
-        sensor_id = make_id(sensor["name"])
-        if sensor_id in DEVICE_CLASS_OVERRIDES:
-            sensor["device_class"] = DEVICE_CLASS_OVERRIDES[sensor_id]
+        from ..models import SensorReading
+
+        spec = get_registry().lookup_key(group, key, unit, device_class)
+        sensor = SensorReading.create(
+            spec.name,
+            value_clean,
+            unit=unit,
+            device_class=spec.device_class,
+            enabled=group not in self.excluded_groups,
+            enpal_last_update=normalize_timestamp(row.get("timestamp")),
+            group=group,
+            raw_key=raw_key,
+            sensor_id=spec.sensor_id,
+        )
 
         idx = len(self._baseline)
         self._baseline.append(sensor)
-        label = sensor["name"][len(f"{group}: "):]
+        label = sensor.name[len(f"{group}: "):]
         for key_id in {make_id(label), make_id(raw_key)}:
             self._key_index.setdefault(key_id, []).append(idx)
         _LOGGER.debug(
             "[Enpal WebSocket] Created sensor from RenderBatch: %s = %s %s",
-            sensor["name"], value_clean, unit or "",
+            sensor.name, value_clean, unit or "",
         )
         return True
 
@@ -974,14 +1077,13 @@ class EnpalWebSocketClient(EnpalApiClient):
                     return
 
     @staticmethod
-    def _is_numeric_sensor(sensor: Dict) -> bool:
+    def _is_numeric_sensor(sensor: "SensorReading") -> bool:
         """Whether a baseline sensor is expected to hold a numeric state."""
         from ..utils import is_strict_number
 
-        if sensor.get("device_class") in _NUMERIC_DEVICE_CLASSES:
+        if sensor.device_class in _NUMERIC_DEVICE_CLASSES:
             return True
-        value = sensor.get("value")
-        return isinstance(value, str) and is_strict_number(value)
+        return sensor.numeric is not None and is_strict_number(sensor.value)
 
     # ------------------------------------------------------------------
     # Blazor protocol messages
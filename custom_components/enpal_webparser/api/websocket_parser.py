@@ -1,9 +1,12 @@
 """Parser for WebSocket JSON data to Home Assistant sensor format"""
 import re
 import logging
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
 from datetime import datetime
 
+if TYPE_CHECKING:
+    from ..models import SensorReading
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -104,21 +107,21 @@ def detect_device_class(sensor_name: str, unit: Optional[str], value: Any) -> Op
 def parse_websocket_json_to_sensors(
     json_data: Dict,
     groups: List[str]
-) -> List[Dict[str, Any]]:
+) -> List["SensorReading"]:
     """
     Parse WebSocket JSON data to Home Assistant sensor format.
     
     Returns the same structure as parse_enpal_html_sensors():
-    List[Dict[str, Any]] with keys: name, value, unit, device_class, enabled, enpal_last_update, group
+    List[SensorReading] (see models.py)
     
     Args:
         json_data: WebSocket JSON data (CollectorData)
         groups: List of enabled sensor groups
         
     Returns:
-        List of sensor dictionaries
+        List of sensor readings
     """
-    sensors: List[Dict[str, Any]] = []
+    sensors: List["SensorReading"] = []
     
     # Process DeviceCollections
     for device in json_data.get('DeviceCollections', []):
@@ -197,9 +200,9 @@ def create_sensor_from_datapoint(
     group: str,
     groups: List[str],
     data_type: str
-) -> Optional[Dict[str, Any]]:
+) -> Optional["SensorReading"]:
     """
-    Create a sensor dictionary from a WebSocket data point.
+    Create a sensor reading from a WebSocket data point.
     
     Args:
         json_name: JSON sensor name (e.g., "Energy.Battery.Charge.Level")
@@ -209,8 +212,10 @@ def create_sensor_from_datapoint(
         data_type: 'number' or 'text'
         
     Returns:
-        Sensor dictionary or None
+        SensorReading or None
     """
+    from ..models import SensorReading
+
     try:
         value = data_point.get('value')
         unit_raw = data_point.get('unit')
@@ -249,18 +254,16 @@ def create_sensor_from_datapoint(
         # Parse timestamp
         timestamp_iso = parse_timestamp(timestamp_utc)
         
-        # Create sensor dict (same format as HTML parser)
-        sensor = {
-            'name': sensor_name,
-            'value': value_str,
-            'unit': unit,
-            'device_class': device_class,
-            'enabled': group in groups,
-            'enpal_last_update': timestamp_iso,
-            'group': group,
-        }
-        
-        return sensor
+        # Same record type as the HTML parser
+        return SensorReading.create(
+            sensor_name,
+            value_str,
+            unit=unit,
+            device_class=device_class,
+            enabled=group in groups,
+            enpal_last_update=timestamp_iso,
+            group=group,
+        )
         
     except Exception as e:
         _LOGGER.warning(
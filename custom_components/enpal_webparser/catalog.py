@@ -0,0 +1,93 @@
+#
+# Home Assistant Custom Component: Enpal Webparser
+#
+# File: catalog.py
+#
+# Description:
+#   Persisted sensor catalog: the last known sensor readings (ids, metadata
+#   and values) of a config entry, kept in Home Assistant storage so all
+#   entities can be created at startup before the box has answered.
+#
+# Author:       Oliver Stock (github.com/derolli1976)
+# License:      MIT
+# Repository:   https://github.com/derolli1976/enpal
+#
+# Compatible with Home Assistant Core 2024.x and later.
+#
+# See README.md for setup and usage instructions.
+#
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import CATALOG_SAVE_DELAY, CATALOG_STORAGE_VERSION, DOMAIN
+from .models import SensorReading
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SensorCatalog:
+    """Last known sensor list of one config entry in ``.storage``.
+
+    Saving is coalesced: at most one write per ``CATALOG_SAVE_DELAY`` seconds
+    no matter how often pushes arrive, plus the final write Home Assistant
+    flushes on shutdown.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store = Store(
+            hass, CATALOG_STORAGE_VERSION, f"{DOMAIN}.catalog.{entry_id}"
+        )
+        self._latest: Optional[Iterable[SensorReading]] = None
+        self._pending = False
+
+    async def async_load(self, excluded_groups: Iterable[str] = ()) -> List[SensorReading]:
+        """Stored readings, or an empty list when nothing usable is stored.
+
+        ``enabled`` is recomputed from the current group selection, which may
+        have changed since the catalog was written.
+        """
+        try:
+            data = await self._store.async_load()
+        except Exception as e:  # corrupt file: start without a catalog
+            _LOGGER.warning("[Enpal] Could not load the sensor catalog: %s", e)
+            return []
+        if not isinstance(data, dict):
+            return []
+        excluded = set(excluded_groups)
+        readings = []
+        for item in data.get("sensors", []):
+            if not isinstance(item, dict) or not item.get("name"):
+                continue
+            reading = SensorReading.from_dict(item)
+            enabled = reading.group not in excluded
+            if reading.enabled != enabled:
+                reading = reading.replace(enabled=enabled)
+            readings.append(reading)
+        return readings
+
+    @callback
+    def async_schedule_save(self, readings: Iterable[SensorReading]) -> None:
+        """Remember ``readings`` and write them within ``CATALOG_SAVE_DELAY``."""
+        self._latest = readings
+        if self._pending:
+            return
+        self._pending = True
+        self._store.async_delay_save(self._data_to_save, CATALOG_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Delete the stored catalog (config entry removed)."""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        self._pending = False
+        return {
+            "sensors": [
+                dict(reading.to_dict(), sensor_id=reading.sensor_id)
+                for reading in self._latest or ()
+            ]
+        }
@@ -17,8 +17,10 @@
 # See README.md for setup and usage instructions.
 #
 
+import asyncio
 import logging
-from typing import Any, cast
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, cast
 from urllib.parse import urlparse
 
 import voluptuous as vol
@@ -28,25 +30,34 @@ from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from .api.protocol import extract_application_state, extract_blazor_components
 from .discovery import discover_enpal_devices, quick_discover_enpal_devices
+from .discovery_cache import async_get_discovery_cache
 from .wallbox_api import WallboxApiClient
 from .utils import (
     excluded_groups_from_options,
     firmware_supports_websocket,
-    make_id,
+    format_deadbands,
+    parse_deadbands,
     parse_enpal_html_sensors,
     parse_firmware_version,
 )
 from .const import (
     DEFAULT_GROUPS,
     DEFAULT_INTERVAL,
+    DEFAULT_MAX_SILENCE,
     DEFAULT_TIMEOUT,
     DEFAULT_URL,
     DEFAULT_USE_WALLBOX,
+    DEFAULT_WRITE_REDUCTION,
     DOMAIN,
+    MAX_MAX_SILENCE,
+    MIN_MAX_SILENCE,
     WALLBOX_MODE_SOURCE_CANDIDATES,
     WALLBOX_STATUS_SOURCE_CANDIDATES,
     WEBSOCKET_MIN_FIRMWARE,
+    WRITE_DEADBANDS_BY_DEVICE_CLASS,
+    WRITE_DEADBANDS_BY_SENSOR,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -70,15 +81,107 @@ def sanitize_url(raw_url: str) -> tuple[str, str | None]:
     return url, None
 
 
-async def validate_enpal_url(hass, url: str) -> bool:
+def _auto_wallbox_sources() -> dict[str, str]:
+    return {"auto": "Auto-detect (recommended)"}
+
+
+@dataclass
+class BoxProbe:
+    """What the config dialogs need to know about the box at one URL."""
+
+    reachable: bool = False
+    firmware_version: str | None = None
+    blazor: bool = False  # Blazor components and application state on the page
+    websocket: bool = False  # the box accepts a SignalR WebSocket connection
+    # make_id key -> label of the Wallbox-group sensors, always with "auto"
+    wallbox_sources: dict[str, str] = field(default_factory=_auto_wallbox_sources)
+
+
+async def _negotiate_websocket(hass, base_url: str) -> bool:
+    """Whether the box offers the WebSockets transport for its Blazor hub.
+
+    A SignalR negotiate is enough to tell; no circuit is started.
+    """
+    try:
+        session = async_get_clientsession(hass)
+        async with session.post(
+            f"{base_url}/_blazor/negotiate?negotiateVersion=1", data="", timeout=30
+        ) as response:
+            if response.status != 200:
+                _LOGGER.info("[Enpal] WebSocket negotiate failed: HTTP %s", response.status)
+                return False
+            data = await response.json(content_type=None)
+    except Exception as e:
+        _LOGGER.info("[Enpal] WebSocket not supported: %s", e)
+        return False
+    transports = data.get("availableTransports") if isinstance(data, dict) else None
+    if not isinstance(data, dict) or not data.get("connectionToken"):
+        return False
+    if transports is None:
+        return True
+    return any(t.get("transport") == "WebSockets" for t in transports if isinstance(t, dict))
+
+
+def _wallbox_sources(html: str) -> dict[str, str]:
+    options = _auto_wallbox_sources()
+    for sensor in parse_enpal_html_sensors(html, ["Wallbox"]):
+        if sensor.sensor_id:
+            options[sensor.sensor_id] = sensor.name
+    return options
+
+
+async def probe_box(hass, url: str) -> BoxProbe:
+    """Fetch ``/deviceMessages`` once and derive everything the dialogs show.
+
+    Firmware and Blazor availability come straight from the page; parsing
+    the wallbox source candidates (executor) and the WebSocket negotiate
+    (only when the page carries Blazor components) run concurrently.
+    """
     try:
         session = async_get_clientsession(hass)
         async with session.get(url, timeout=30) as response:
-            _LOGGER.info("[Enpal] URL reachable, status: %s", response.status)
-            return response.status == 200
+            if response.status != 200:
+                _LOGGER.warning("[Enpal] URL answered with status %s", response.status)
+                return BoxProbe()
+            html = await response.text()
     except Exception as e:
         _LOGGER.warning("[Enpal] URL not reachable: %s", e)
-        return False
+        return BoxProbe()
+
+    probe = BoxProbe(
+        reachable=True,
+        firmware_version=parse_firmware_version(html),
+        blazor=bool(extract_blazor_components(html)) and bool(extract_application_state(html)),
+    )
+    base_url = url.replace("/deviceMessages", "")
+    checks: list[Any] = [hass.async_add_executor_job(_wallbox_sources, html)]
+    if probe.blazor:
+        checks.append(_negotiate_websocket(hass, base_url))
+    sources, *websocket = await asyncio.gather(*checks, return_exceptions=True)
+    if isinstance(sources, BaseException):
+        _LOGGER.debug("[Enpal] Could not read wallbox source options: %s", sources)
+    else:
+        probe.wallbox_sources = sources
+    probe.websocket = websocket == [True]
+    _LOGGER.info(
+        "[Enpal] Probed %s: firmware %s, Blazor %s, WebSocket %s, %d wallbox source(s)",
+        url, probe.firmware_version, probe.blazor, probe.websocket,
+        len(probe.wallbox_sources) - 1,
+    )
+    return probe
+
+
+async def async_get_box_probe(hass, url: str, cache: dict[str, BoxProbe]) -> BoxProbe:
+    """The probe of ``url`` from ``cache`` (one per flow), probing on first use.
+
+    Only reachable boxes are kept, so a box that was down is asked again.
+    """
+    probe = cache.get(url)
+    if probe is None:
+        probe = await probe_box(hass, url)
+        if probe.reachable:
+            cache[url] = probe
+    return probe
 
 
 async def validate_wallbox_api(hass) -> bool:
@@ -103,38 +206,6 @@ async def validate_wallbox_api(hass) -> bool:
         return False
 
 
-async def detect_websocket_support(hass, base_url: str) -> bool:
-    """Detect if the Enpal box supports WebSocket connections.
-    
-    Args:
-        hass: Home Assistant instance
-        base_url: Base URL of Enpal box (e.g., http://192.168.2.70)
-        
-    Returns:
-        True if WebSocket is available, False otherwise
-    """
-    try:
-        from .api import EnpalWebSocketClient
-        
-        _LOGGER.info("[Enpal] Testing WebSocket support for %s", base_url)
-        client = EnpalWebSocketClient(base_url, groups=["Battery"])
-        
-        try:
-            connected = await client.connect()
-            if connected:
-                _LOGGER.info("[Enpal] WebSocket connection successful")
-                return True
-            else:
-                _LOGGER.info("[Enpal] WebSocket connection failed")
-                return False
-        finally:
-            await client.close()
-            
-    except Exception as e:
-        _LOGGER.info("[Enpal] WebSocket not supported: %s", e)
-        return False
-
-
 def get_default_config(options: dict[str, Any] | None = None) -> dict[str, Any]:
     src = dict(options) if options is not None else {}
     # Derive the displayed selection from the effective exclusions so groups
@@ -149,29 +220,17 @@ def get_default_config(options: dict[str, Any] | None = None) -> dict[str, Any]:
         "data_source": src.get("data_source", "auto"),  # auto, websocket, html
         "wallbox_mode_source": src.get("wallbox_mode_source", "auto"),
         "wallbox_status_source": src.get("wallbox_status_source", "auto"),
+        "write_reduction": src.get("write_reduction", DEFAULT_WRITE_REDUCTION),
+        "max_silence": src.get("max_silence", DEFAULT_MAX_SILENCE),
+        "deadbands_by_device_class": src.get(
+            "deadbands_by_device_class", format_deadbands(WRITE_DEADBANDS_BY_DEVICE_CLASS)
+        ),
+        "deadbands_by_sensor": src.get(
+            "deadbands_by_sensor", format_deadbands(WRITE_DEADBANDS_BY_SENSOR)
+        ),
     }
 
 
-async def get_firmware_version(hass, url: str) -> str | None:
-    """Fetch the deviceMessages page and extract the Enpal firmware version.
-
-    Returns the dotted version string (e.g. "8.46.4") or None if the box is
-    unreachable or the version could not be parsed.
-    """
-    try:
-        session = async_get_clientsession(hass)
-        async with session.get(url, timeout=30) as response:
-            if response.status != 200:
-                return None
-            html = await response.text()
-        version = parse_firmware_version(html)
-        _LOGGER.debug("[Enpal] Detected firmware version: %s", version)
-        return version
-    except Exception as e:
-        _LOGGER.debug("[Enpal] Could not fetch firmware version: %s", e)
-        return None
-
-
 def get_firmware_warning(hass, version: str | None) -> str:
     """Build a localized warning when firmware is too old for WebSocket mode.
 
@@ -234,22 +293,16 @@ async def get_wallbox_source_options(hass, url: str) -> dict[str, str]:
     "auto" entry. Falls back to just {"auto": ...} if the box is unreachable or
     exposes no wallbox sensors (e.g. older firmware).
     """
-    options: dict[str, str] = {"auto": "Auto-detect (recommended)"}
     try:
         session = async_get_clientsession(hass)
         async with session.get(url, timeout=30) as response:
             if response.status != 200:
-                return options
+                return _auto_wallbox_sources()
             html = await response.text()
-        sensors = parse_enpal_html_sensors(html, ["Wallbox"])
-        for sensor in sensors:
-            name = sensor.get("name", "")
-            key = make_id(name)
-            if key:
-                options[key] = name
+        return _wallbox_sources(html)
     except Exception as e:
         _LOGGER.debug("[Enpal] Could not fetch wallbox source options: %s", e)
-    return options
+        return _auto_wallbox_sources()
 
 
 def get_form_schema(config: dict[str, Any], wallbox_sources: dict[str, str] | None = None) -> vol.Schema:
@@ -264,6 +317,16 @@ def get_form_schema(config: dict[str, Any], wallbox_sources: dict[str, str] | No
             "websocket": "WebSocket (real-time)",
             "html": "HTML polling (legacy)"
         }),
+        vol.Optional("write_reduction", default=cast(Any, config["write_reduction"])): bool,
+        vol.Optional("max_silence", default=cast(Any, config["max_silence"])): vol.All(
+            int, vol.Range(min=MIN_MAX_SILENCE, max=MAX_MAX_SILENCE)
+        ),
+        vol.Optional(
+            "deadbands_by_device_class", default=cast(Any, config["deadbands_by_device_class"])
+        ): str,
+        vol.Optional(
+            "deadbands_by_sensor", default=cast(Any, config["deadbands_by_sensor"])
+        ): str,
     }
 
     # Firmware 8.50+: let the user pick which raw Wallbox sensor provides the
@@ -282,42 +345,70 @@ def get_form_schema(config: dict[str, Any], wallbox_sources: dict[str, str] | No
     return vol.Schema(schema)
 
 
-async def process_user_input(hass, user_input: dict[str, Any]) -> tuple[dict[str, Any] | None, dict[str, str]]:
-    errors: dict[str, str] = {}
-    url_input = user_input["url"]
-    url_checked, error = sanitize_url(url_input)
+async def probe_and_resolve_data_source(
+    hass, probe: Awaitable[BoxProbe], requested: str, use_wallbox: bool
+) -> tuple[BoxProbe, str, dict[str, str]]:
+    """Await the box probe and turn the requested data source into the stored one.
+
+    "auto" becomes WebSocket when the box supports it, an unavailable
+    "websocket" falls back to HTML. HTML mode with wallbox control needs the
+    legacy addon; its check runs concurrently with the probe and is
+    cancelled when it is not needed.
+
+    Returns the probe, the data source and form errors.
+    """
+    addon_check = asyncio.create_task(validate_wallbox_api(hass)) if use_wallbox else None
+    try:
+        box = await probe
+        if not box.reachable:
+            return box, requested, {"url": "unreachable"}
+
+        data_source = requested
+        if requested == "auto":
+            data_source = "websocket" if box.websocket else "html"
+            _LOGGER.info("[Enpal] Auto-detected data source: %s", data_source)
+        elif requested == "websocket" and not box.websocket:
+            _LOGGER.warning("[Enpal] WebSocket selected but not available, falling back to HTML")
+            data_source = "html"
 
-    if not error and not await validate_enpal_url(hass, url_checked):
-        error = "unreachable"
+        if addon_check is not None and data_source == "html" and not await addon_check:
+            return box, data_source, {"use_wallbox": "wallbox_unreachable"}
+        return box, data_source, {}
+    finally:
+        if addon_check is not None and not addon_check.done():
+            addon_check.cancel()
 
+
+async def process_user_input(
+    hass, user_input: dict[str, Any], probes: dict[str, BoxProbe] | None = None
+) -> tuple[dict[str, Any] | None, dict[str, str]]:
+    """Validate the options form; ``probes`` caches box probes for the flow."""
+    url_input = user_input["url"]
+    url_checked, error = sanitize_url(url_input)
     if error:
-        errors["url"] = error
+        return None, {"url": error}
 
+    deadbands = {}
+    for key, default in (
+        ("deadbands_by_device_class", WRITE_DEADBANDS_BY_DEVICE_CLASS),
+        ("deadbands_by_sensor", WRITE_DEADBANDS_BY_SENSOR),
+    ):
+        try:
+            deadbands[key] = format_deadbands(
+                parse_deadbands(user_input.get(key, format_deadbands(default)))
+            )
+        except ValueError:
+            return None, {key: "invalid_deadbands"}
+
+    _, data_source, errors = await probe_and_resolve_data_source(
+        hass,
+        async_get_box_probe(hass, url_checked, {} if probes is None else probes),
+        user_input.get("data_source", "auto"),
+        user_input.get("use_wallbox", False),
+    )
     if errors:
         return None, errors
 
-    # Handle data source selection
-    data_source = user_input.get("data_source", "auto")
-    
-    if data_source == "auto":
-        # Auto-detect: Try WebSocket first, fall back to HTML
-        base_url = url_checked.replace("/deviceMessages", "")
-        websocket_available = await detect_websocket_support(hass, base_url)
-        data_source = "websocket" if websocket_available else "html"
-        _LOGGER.info("[Enpal] Auto-detected data source: %s", data_source)
-    elif data_source == "websocket":
-        # Validate WebSocket is actually available
-        base_url = url_checked.replace("/deviceMessages", "")
-        if not await detect_websocket_support(hass, base_url):
-            _LOGGER.warning("[Enpal] WebSocket selected but not available, falling back to HTML")
-            data_source = "html"
-
-    # Validate wallbox addon if HTML mode + wallbox enabled
-    if user_input.get("use_wallbox", False) and data_source == "html":
-        if not await validate_wallbox_api(hass):
-            errors["use_wallbox"] = "wallbox_unreachable"
-            return None, errors
-
     return {
         "url": url_checked,
         "interval": user_input["interval"],
@@ -330,6 +421,9 @@ async def process_user_input(hass, user_input: dict[str, Any]) -> tuple[dict[str
         "data_source": data_source,
         "wallbox_mode_source": user_input.get("wallbox_mode_source", "auto"),
         "wallbox_status_source": user_input.get("wallbox_status_source", "auto"),
+        "write_reduction": user_input.get("write_reduction", DEFAULT_WRITE_REDUCTION),
+        "max_silence": user_input.get("max_silence", DEFAULT_MAX_SILENCE),
+        **deadbands,
     }, {}
 
 
@@ -386,6 +480,10 @@ class EnpalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         super().__init__()
         self._discovered_devices = []
         self._discovery_running = False
+        # What discovery learned per URL; saves refetching the page later.
+        self._probes = {}
+        # Box probes of this flow (see async_get_box_probe).
+        self._box_probes: dict[str, BoxProbe] = {}
 
     async def async_step_user(self, user_input=None):
         """Handle the initial step - choose between manual and auto-discovery."""
@@ -414,15 +512,30 @@ class EnpalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             # First time - show progress and start discovery
             self._discovery_running = True
             
-            # Try quick discovery first
-            _LOGGER.info("[Enpal] Starting quick discovery")
-            self._discovered_devices = await quick_discover_enpal_devices(self.hass)
-            
-            # If quick discovery found nothing, try full scan
-            if not self._discovered_devices:
-                _LOGGER.info("[Enpal] Quick discovery found nothing, starting full scan")
-                self._discovered_devices = await discover_enpal_devices(self.hass)
-            
+            # Configured boxes are probed first; stop once one more turns up.
+            expected = len(self._async_current_entries()) + 1
+
+            # Boxes identified before are re-checked at their last address;
+            # the network is only scanned when they do not cover all boxes.
+            cache = async_get_discovery_cache(self.hass)
+            found = {probe.url: probe for probe in await cache.async_revalidate()}
+            scanned = []
+
+            if len(found) < expected:
+                # Try quick discovery first
+                _LOGGER.info("[Enpal] Starting quick discovery")
+                scanned = await quick_discover_enpal_devices(self.hass, expected)
+
+                # If quick discovery found nothing, try full scan
+                if not scanned and not found:
+                    _LOGGER.info("[Enpal] Quick discovery found nothing, starting full scan")
+                    scanned = await discover_enpal_devices(self.hass, expected=expected)
+
+            for probe in scanned:
+                found.setdefault(probe.url, probe)
+            await cache.async_remember(scanned)
+            self._discovered_devices = list(found.values())
+            self._probes = found
             self._discovery_running = False
         
         if user_input is not None:
@@ -454,7 +567,7 @@ class EnpalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             )
         
         # Create selection dict from discovered devices
-        device_options = {url: url for url in self._discovered_devices}
+        device_options = {probe.url: probe.url for probe in self._discovered_devices}
         device_options.update(get_localized_options(self.hass, "discovered_device_none"))
         
         return self.async_show_form(
@@ -491,7 +604,23 @@ class EnpalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             url_input = user_input["url"]
             url_checked, error = sanitize_url(url_input)
             
-            if error or not await validate_enpal_url(self.hass, url_checked):
+            # A box discovery just identified does not need another request.
+            # Its Blazor flag only covers the page up to the identification
+            # marker (the script tag can follow it), so the negotiate is only
+            # skipped for firmware too old for WebSocket mode.
+            discovered = self._probes.get(url_checked)
+            if discovered is not None and not discovered.blazor and firmware_supports_websocket(
+                discovered.firmware_version, WEBSOCKET_MIN_FIRMWARE
+            ) is False:
+                self._box_probes.setdefault(
+                    url_checked, BoxProbe(True, discovered.firmware_version)
+                )
+            if error or (
+                discovered is None
+                and not (await async_get_box_probe(
+                    self.hass, url_checked, self._box_probes
+                )).reachable
+            ):
                 errors = {"url": error or "unreachable"}
                 return self.async_show_form(
                     step_id="manual",
@@ -515,32 +644,25 @@ class EnpalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         # Detect firmware to warn the user before they enable WebSocket mode
         # on a box that is too old (< 8.50).
-        firmware_version = await get_firmware_version(self.hass, config["url"])
+        probe = self._probes.get(config["url"]) or await async_get_box_probe(
+            self.hass, config["url"], self._box_probes
+        )
+        firmware_version = probe.firmware_version
         firmware_warning = get_firmware_warning(self.hass, firmware_version)
 
         if user_input is not None and "interval" in user_input:
             # Final step - validate and create entry
-            errors: dict[str, str] = {}
-            
             # Resolve data_source first so we know which wallbox validation to use
-            data_source = user_input.get("data_source", "auto")
-            
-            if data_source == "auto":
-                base_url = self._url.replace("/deviceMessages", "")
-                websocket_available = await detect_websocket_support(self.hass, base_url)
-                data_source = "websocket" if websocket_available else "html"
-                _LOGGER.info("[Enpal] Auto-detected data source: %s", data_source)
-            elif data_source == "websocket":
-                base_url = self._url.replace("/deviceMessages", "")
-                if not await detect_websocket_support(self.hass, base_url):
-                    _LOGGER.warning("[Enpal] WebSocket selected but not available, falling back to HTML")
-                    data_source = "html"
-
-            # Validate wallbox addon if HTML mode + wallbox enabled
-            if user_input.get("use_wallbox", False) and data_source == "html":
-                if not await validate_wallbox_api(self.hass):
-                    errors["use_wallbox"] = "wallbox_unreachable"
-            
+            _, data_source, errors = await probe_and_resolve_data_source(
+                self.hass,
+                async_get_box_probe(self.hass, self._url, self._box_probes),
+                user_input.get("data_source", "auto"),
+                user_input.get("use_wallbox", False),
+            )
+            if "url" in errors:
+                # The box went away since the URL step; this form has no URL field.
+                errors = {"base": errors["url"]}
+
             if not errors:
                 
                 # Set unique_id based on URL to prevent duplicate entries
@@ -613,6 +735,8 @@ class EnpalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 class EnpalOptionsFlowHandler(config_entries.OptionsFlow):
     def __init__(self, config_entry):
         self._config_entry = config_entry
+        # Box probes of this flow (see async_get_box_probe).
+        self._box_probes: dict[str, BoxProbe] = {}
 
     async def async_step_init(self, user_input=None):
         _LOGGER.info("[Enpal] OptionsFlow started")
@@ -621,19 +745,19 @@ class EnpalOptionsFlowHandler(config_entries.OptionsFlow):
 
         if user_input:
             _LOGGER.debug("[Enpal] OptionsFlow input: %s", user_input)
-            result, errors = await process_user_input(self.hass, user_input)
+            result, errors = await process_user_input(self.hass, user_input, self._box_probes)
             if result:
                 return self.async_create_entry(title="", data=result)
             config.update(user_input)
 
+        # One probe of the box serves the wallbox sources and the firmware.
+        probe = await async_get_box_probe(self.hass, config["url"], self._box_probes)
+
         # Offer wallbox source selection (firmware 8.50+) when wallbox is enabled.
-        wallbox_sources = None
-        if config.get("use_wallbox"):
-            wallbox_sources = await get_wallbox_source_options(self.hass, config["url"])
+        wallbox_sources = probe.wallbox_sources if config.get("use_wallbox") else None
 
         # Detect firmware to warn before enabling WebSocket mode on old boxes.
-        firmware_version = await get_firmware_version(self.hass, config["url"])
-        firmware_warning = get_firmware_warning(self.hass, firmware_version)
+        firmware_warning = get_firmware_warning(self.hass, probe.firmware_version)
 
         # Hint to disable the legacy wallbox add-on in WebSocket + wallbox mode.
         wallbox_addon_warning = get_wallbox_addon_warning(self.hass, config)
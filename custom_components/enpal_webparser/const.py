@@ -25,6 +25,35 @@ DEFAULT_URL = "http://192.168.1.1/deviceMessages"  # Placeholder - use discovery
 DEFAULT_INTERVAL = 60
 DEFAULT_TIMEOUT = 30
 
+# --- Sensor catalog (storage) ---
+# The last known sensor list is kept in .storage so entities can be created at
+# startup before the box answers; see catalog.py.
+CATALOG_STORAGE_VERSION = 1
+CATALOG_SAVE_DELAY = 60
+
+# --- Discovery cache (storage) ---
+# Last seen address, MAC and firmware of every identified box, shared by the
+# config flow and all entries; see discovery_cache.py.
+DISCOVERY_CACHE_STORAGE_VERSION = 1
+DISCOVERY_CACHE_SAVE_DELAY = 10
+# Consecutive failed updates after which the box is looked for at another
+# address, and the least seconds between two such searches.
+RELOCATE_AFTER_FAILURES = 3
+RELOCATE_MIN_INTERVAL = 900
+
+# --- Dynamic entities ---
+# Seconds new sensor ids are collected before their entities are added in one
+# async_add_entities call (8.51 delivers its initial render in many batches).
+NEW_ENTITY_BATCH_DELAY = 1
+# Most coordinator-driven state writes done per event loop iteration; larger
+# flushes continue on the next iteration so other tasks get a turn.
+WRITE_FLUSH_CHUNK = 250
+
+# --- Energy integration ---
+# Longest gap (seconds) between two box samples over which the last power is
+# held when integrating power into energy; see energy_integrator.py.
+INTEGRATION_MAX_GAP_SECONDS = 300
+
 # --- Firmware ---
 # Minimum Enpal firmware (major, minor) required for WebSocket mode and native
 # wallbox control (Solar Rel. 8.50). Older firmware only supports HTML polling.
@@ -101,6 +130,51 @@ STATE_CLASS_OVERRIDES = {
     "energy_battery_charge_load": "measurement",
 }
 
+# --- Write reduction (opt-in) ---
+# With "write_reduction" enabled, a numeric state is only written when it moves
+# outside its deadband or when it has not been written for "max_silence"
+# seconds. A deadband is (absolute, relative): changes up to
+# max(absolute, relative * |last written value|) are dropped. Per-sensor
+# entries win over the device class; sensors without an entry (energy
+# counters, text states) are written on every change. Both tables are the
+# defaults of the "deadbands_by_device_class" / "deadbands_by_sensor" options
+# (text, see utils.parse_deadbands).
+DEFAULT_WRITE_REDUCTION = False
+DEFAULT_MAX_SILENCE = 300
+MIN_MAX_SILENCE = 30
+MAX_MAX_SILENCE = 3600
+
+WRITE_DEADBANDS_BY_DEVICE_CLASS = {
+    "power": (10.0, 0.02),
+    "current": (0.1, 0.02),
+    "voltage": (1.0, 0.0),
+    "frequency": (0.05, 0.0),
+    "temperature": (0.2, 0.0),
+}
+
+WRITE_DEADBANDS_BY_SENSOR = {
+    # Derived from the jittering phase powers; keep it as coarse as they are.
+    "site_data_self_consumption_ratio": (1.0, 0.0),
+}
+
+# Seconds without a /wallbox circuit push after which the wallbox status is
+# polled (native mode). Pushes deliver every change; the poll only reopens a
+# dropped circuit and reads the page over HTTP while it is down.
+WALLBOX_FALLBACK_POLL_INTERVAL = 300
+
+# Seconds a wallbox action waits for the /wallbox circuit to show its result
+# (requested mode, or charging started/stopped) before it returns unconfirmed.
+WALLBOX_CONFIRM_TIMEOUT = 5
+
+# Wallbox sensors whose value must be forced to 0 when not actively charging.
+# Works around an Enpal firmware bug where these values freeze after charging ends.
+WALLBOX_ZERO_OVERRIDE_IDS = frozenset({
+    "power_wallbox_connector_1_charging",
+    "current_wallbox_connector_1_phase_a",
+    "current_wallbox_connector_1_phase_b",
+    "current_wallbox_connector_1_phase_c",
+})
+
 # --- Wallbox Mode Mapping ---
 WALLBOX_MODE_MAP = {
     "eco": "Eco",
@@ -472,9 +546,6 @@ SENSOR_KEY_GROUPS.update({
     "Voltage.String.2.Huawei": "Inverter",
 })
 
-# --- Date/Time Formats ---
-ENPAL_TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M:%S"
-
 ICON_MAP = {
     # IoT Edge Device
     "iotedgedevice_cpu_load": "mdi:cpu-64-bit",
@@ -0,0 +1,134 @@
+#
+# Home Assistant Custom Component: Enpal Webparser
+#
+# File: coordinator.py
+#
+# Description:
+#   DataUpdateCoordinator with per-group listener buckets. One shared fetch
+#   feeds all sensor groups; a WebSocket push only wakes the entities of the
+#   groups it touched, and their state writes run in one batched pass.
+#
+# Author:       Oliver Stock (github.com/derolli1976)
+# License:      MIT
+# Repository:   https://github.com/derolli1976/enpal
+#
+# Compatible with Home Assistant Core 2024.x and later.
+#
+# See README.md for setup and usage instructions.
+#
+
+import asyncio
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import WRITE_FLUSH_CHUNK
+
+# Order of the state writes within one flush: entities that read other
+# entities' states are written after those.
+WRITE_ORDER_SOURCE = 0
+WRITE_ORDER_STATUS = 1  # wallbox mode/status, read by the power zero-override
+WRITE_ORDER_DERIVED = 2  # wallbox power, integrated energy counters
+
+
+class EnpalDataUpdateCoordinator(DataUpdateCoordinator):
+    """Coordinator whose listeners are bucketed by sensor group.
+
+    Entities register with their group as listener context (see
+    ``CoordinatorEntity(coordinator, context)``); listeners without a context
+    are woken on every update. :meth:`async_update_listeners` without groups
+    (polls, ``async_set_updated_data``) still wakes everyone. Disabled entities
+    never register, so a group whose entities are all disabled has an empty
+    bucket and costs nothing per push.
+
+    Entities queue their state writes with :meth:`async_schedule_write`; the
+    queue is flushed in ``WRITE_ORDER_*`` order, at most ``WRITE_FLUSH_CHUNK``
+    writes per loop iteration.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._group_listeners: Dict[Any, Dict[Callable[[], None], CALLBACK_TYPE]] = {}
+        # Queued state writes (write callback -> order), flushed in one pass.
+        self._pending_writes: Dict[Callable[[], None], int] = {}
+        self._flush_handle: Optional[asyncio.Handle] = None
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        remove = super().async_add_listener(update_callback, context)
+        bucket = self._group_listeners.setdefault(context, {})
+        owner = getattr(update_callback, "__self__", None)
+
+        @callback
+        def remove_listener() -> None:
+            bucket.pop(remove_listener, None)
+            remove()
+            if owner is not None and self._pending_writes:
+                # A removed entity must not write its state back.
+                stale = [
+                    write for write in self._pending_writes
+                    if getattr(write, "__self__", None) is owner
+                ]
+                for write in stale:
+                    del self._pending_writes[write]
+
+        bucket[remove_listener] = update_callback
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self, groups: Optional[Iterable[str]] = None) -> None:
+        """Wake the listeners of ``groups`` plus the group-less ones.
+
+        ``None`` wakes every listener, like the base class.
+        """
+        if groups is None:
+            super().async_update_listeners()
+            return
+        for group in (None, *groups):
+            bucket = self._group_listeners.get(group)
+            if bucket:
+                for update_callback in list(bucket.values()):
+                    update_callback()
+
+    @callback
+    def async_schedule_write(
+        self, write: Callable[[], None], order: int = WRITE_ORDER_SOURCE
+    ) -> None:
+        """Queue a state write for the next flush.
+
+        All listeners of one notification run before the flush, so a push
+        that touches hundreds of entities ends in a single pass of writes
+        instead of one loop callback each. Queuing the same write twice
+        before the flush writes once.
+        """
+        self._pending_writes[write] = order
+        if self._flush_handle is None:
+            self._flush_handle = self.hass.loop.call_soon(self._async_flush_writes)
+
+    @callback
+    def _async_flush_writes(self) -> None:
+        self._flush_handle = None
+        pending = self._pending_writes
+        batch = sorted(pending, key=pending.__getitem__)[:WRITE_FLUSH_CHUNK]
+        for write in batch:
+            del pending[write]
+        if pending:
+            self._flush_handle = self.hass.loop.call_soon(self._async_flush_writes)
+        for write in batch:
+            write()
+
+
+@callback
+def async_write_batched(
+    coordinator: DataUpdateCoordinator,
+    write: Callable[[], None],
+    order: int = WRITE_ORDER_SOURCE,
+) -> None:
+    """Queue ``write`` on an Enpal coordinator, run it right away on any other."""
+    if isinstance(coordinator, EnpalDataUpdateCoordinator):
+        coordinator.async_schedule_write(write, order)
+    else:
+        write()
@@ -0,0 +1,317 @@
+#
+# Home Assistant Custom Component: Enpal Webparser
+#
+# File: derived.py
+#
+# Description:
+#   Declarative derived sensors (phase currents, net grid power, self
+#   consumption ratio, battery net flow) computed from other sensor readings.
+#   A static dependency graph maps every input sensor id to the outputs that
+#   read it, so a WebSocket diff only recomputes what it actually touched.
+#
+# Author:       Oliver Stock (github.com/derolli1976)
+# License:      MIT
+# Repository:   https://github.com/derolli1976/enpal
+#
+# Compatible with Home Assistant Core 2024.x and later.
+#
+# See README.md for setup and usage instructions.
+#
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .models import SensorReading
+from .utils import make_id
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DerivedMetric:
+    """One derived sensor: a formula over the values of other sensors.
+
+    Each entry of ``inputs`` is a tuple of candidate sensor ids; the first
+    candidate present in the sensor list is used (firmware versions name some
+    sensors differently). ``formula`` receives the input values as floats in
+    order and returns the result, or None when it is undefined.
+    ``enabled_default`` False registers the output disabled; it is still
+    computed, since other sensors may read it.
+    """
+
+    name: str
+    group: str
+    unit: Optional[str]
+    device_class: Optional[str]
+    inputs: Tuple[Tuple[str, ...], ...]
+    formula: Callable[..., Optional[float]]
+    precision: int = 2
+    enabled_default: bool = True
+
+    @property
+    def sensor_id(self) -> str:
+        return make_id(self.name)
+
+
+def _current(power: float, voltage: float) -> Optional[float]:
+    """I = P / U."""
+    if voltage == 0:
+        return None
+    return power / voltage
+
+
+def _self_consumption(production: float, grid_net: float) -> Optional[float]:
+    """Share of the PV production used on site, in percent."""
+    if production <= 0:
+        return None
+    export = max(0.0, -grid_net)
+    return max(0.0, min(100.0, (production - export) / production * 100))
+
+
+CURRENT_METRICS: Tuple[DerivedMetric, ...] = tuple(
+    DerivedMetric(
+        name=f"PowerSensor: Current Phase ({phase})",
+        group="PowerSensor",
+        unit="A",
+        device_class="current",
+        inputs=(
+            (f"powersensor_power_ac_phase_{phase.lower()}",),
+            (f"powersensor_voltage_phase_{phase.lower()}",),
+        ),
+        formula=_current,
+    )
+    for phase in ("A", "B", "C")
+)
+
+# Sensors beyond the phase currents are new for existing installs; they are
+# disabled by default like the integrated energy counters.
+DERIVED_METRICS: Tuple[DerivedMetric, ...] = CURRENT_METRICS + (
+    # Sign follows the PowerSensor phases: positive = import, negative = export.
+    DerivedMetric(
+        name="PowerSensor: Power Grid Net",
+        group="PowerSensor",
+        unit="W",
+        device_class="power",
+        inputs=(
+            ("powersensor_power_ac_phase_a",),
+            ("powersensor_power_ac_phase_b",),
+            ("powersensor_power_ac_phase_c",),
+        ),
+        formula=lambda a, b, c: a + b + c,
+        precision=1,
+        enabled_default=False,
+    ),
+    DerivedMetric(
+        name="Site Data: Self Consumption Ratio",
+        group="Site Data",
+        unit="%",
+        device_class=None,
+        inputs=(
+            ("inverter_power_dc_total",),
+            ("powersensor_power_grid_net",),
+        ),
+        formula=_self_consumption,
+        precision=1,
+        enabled_default=False,
+    ),
+    # Energy charged into minus energy drawn from the battery today.
+    DerivedMetric(
+        name="Energy Battery Net Day",
+        group="Battery",
+        unit="kWh",
+        device_class=None,
+        inputs=(
+            ("energy_battery_charge_day", "inverter_energy_battery_charge_day"),
+            ("energy_battery_discharge_day", "inverter_energy_battery_discharge_day"),
+        ),
+        formula=lambda charged, discharged: charged - discharged,
+        enabled_default=False,
+    ),
+)
+
+
+class DerivedGraph:
+    """Evaluation order and input → output edges of a set of metrics.
+
+    Metrics may read other metrics' outputs (self consumption reads net grid
+    power), so they are evaluated in dependency order. Built once per metric
+    set; cycles are rejected.
+    """
+
+    def __init__(self, metrics: Iterable[DerivedMetric]) -> None:
+        by_id = {metric.sensor_id: metric for metric in metrics}
+        self.order: List[DerivedMetric] = []
+        self.dependents: Dict[str, Set[str]] = {}
+        for metric in by_id.values():
+            for candidates in metric.inputs:
+                for input_id in candidates:
+                    self.dependents.setdefault(input_id, set()).add(metric.sensor_id)
+
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(sensor_id: str) -> None:
+            if state.get(sensor_id) == 2:
+                return
+            if state.get(sensor_id) == 1:
+                raise ValueError(f"Derived metric cycle at {sensor_id}")
+            state[sensor_id] = 1
+            metric = by_id[sensor_id]
+            for candidates in metric.inputs:
+                for input_id in candidates:
+                    if input_id in by_id:
+                        visit(input_id)
+            state[sensor_id] = 2
+            self.order.append(metric)
+
+        for sensor_id in by_id:
+            visit(sensor_id)
+
+        # Every id the metrics read or write; other sensors are not tracked.
+        self.tracked: FrozenSet[str] = frozenset(self.dependents) | frozenset(by_id)
+
+    def affected(self, changed_ids: Iterable[str]) -> Set[str]:
+        """Output ids that (transitively) read any of ``changed_ids``."""
+        result: Set[str] = set()
+        pending = list(changed_ids)
+        while pending:
+            for output_id in self.dependents.get(pending.pop(), ()):
+                if output_id not in result:
+                    result.add(output_id)
+                    pending.append(output_id)
+        return result
+
+
+_GRAPHS: Dict[Tuple[DerivedMetric, ...], DerivedGraph] = {}
+
+
+def _graph_for(metrics: Tuple[DerivedMetric, ...]) -> DerivedGraph:
+    graph = _GRAPHS.get(metrics)
+    if graph is None:
+        graph = DerivedGraph(metrics)
+        _GRAPHS[metrics] = graph
+    return graph
+
+
+class DerivedSensorEngine:
+    """Keeps derived sensors of one sensor list up to date.
+
+    :meth:`apply` runs a full pass over a freshly parsed list and appends or
+    replaces the derived readings in it. :meth:`update` then recomputes only
+    the outputs whose inputs changed (WebSocket diff path). Sensors the box
+    already provides under an output id are left alone.
+    """
+
+    def __init__(self, metrics: Tuple[DerivedMetric, ...] = DERIVED_METRICS) -> None:
+        self._graph = _graph_for(tuple(metrics))
+        self._sensors: List[SensorReading] = []
+        self._by_id: Dict[str, SensorReading] = {}
+        self._positions: Dict[str, int] = {}  # derived output id -> list index
+
+    def apply(self, sensors: List[SensorReading]) -> List[SensorReading]:
+        """Bind to ``sensors`` and (re)compute every derived sensor in it."""
+        self._sensors = sensors
+        tracked = self._graph.tracked
+        self._by_id = {s.sensor_id: s for s in sensors if s.sensor_id in tracked}
+        self._positions = {
+            sensor.sensor_id: i for i, sensor in enumerate(sensors) if sensor.derived
+        }
+        computed = self._evaluate(self._graph.order)
+        if computed:
+            _LOGGER.debug("[Enpal] Calculated %d derived sensor(s)", len(computed))
+        return sensors
+
+    def update(self, changed: Dict[str, SensorReading]) -> List[str]:
+        """Recompute the outputs that read any sensor in ``changed``.
+
+        ``changed`` maps sensor id → current reading of the bound list, so
+        sensors that were appended since the last :meth:`apply` become visible
+        too. Returns the ids of the derived sensors whose value was written.
+        """
+        if not changed:
+            return []
+        tracked = self._graph.tracked
+        for sensor_id, reading in changed.items():
+            if sensor_id in tracked:
+                self._by_id[sensor_id] = reading
+        affected = self._graph.affected(changed)
+        if not affected:
+            return []
+        return self._evaluate(m for m in self._graph.order if m.sensor_id in affected)
+
+    @property
+    def tracked(self) -> FrozenSet[str]:
+        """Every id the metrics read or write."""
+        return self._graph.tracked
+
+    def get(self, sensor_id: str) -> Optional[SensorReading]:
+        """Current reading of a tracked (input or derived) sensor."""
+        return self._by_id.get(sensor_id)
+
+    def _evaluate(self, metrics: Iterable[DerivedMetric]) -> List[str]:
+        written: List[str] = []
+        for metric in metrics:
+            sensor_id = metric.sensor_id
+            existing = self._by_id.get(sensor_id)
+            if existing is not None and not existing.derived:
+                continue  # provided by the box itself
+            sources = self._resolve_inputs(metric)
+            if sources is None:
+                continue
+            values = [s.numeric for s in sources]
+            if None in values:
+                continue
+            try:
+                result = metric.formula(*values)
+            except (ValueError, TypeError, ZeroDivisionError) as e:
+                _LOGGER.debug("[Enpal] Could not calculate %s: %s", metric.name, e)
+                continue
+            if result is None:
+                continue
+
+            value = str(round(result, metric.precision))
+            if existing is not None and existing.value == value:
+                continue
+            timestamp = next(
+                (s.enpal_last_update for s in sources if s.enpal_last_update),
+                None,
+            )
+            if existing is None:
+                reading = SensorReading.create(
+                    metric.name,
+                    value,
+                    unit=metric.unit,
+                    device_class=metric.device_class,
+                    # Inherit the registry default from the first source so a
+                    # deselected group stays disabled.
+                    enabled=metric.enabled_default and sources[0].enabled,
+                    enpal_last_update=timestamp,
+                    group=metric.group,
+                    derived=True,
+                    sensor_id=sensor_id,
+                )
+                self._positions[sensor_id] = len(self._sensors)
+                self._sensors.append(reading)
+            else:
+                reading = existing.with_value(value, timestamp)
+                self._sensors[self._positions[sensor_id]] = reading
+            self._by_id[sensor_id] = reading
+            written.append(sensor_id)
+        return written
+
+    def _resolve_inputs(self, metric: DerivedMetric) -> Optional[List[SensorReading]]:
+        sources = []
+        for candidates in metric.inputs:
+            source = next((self._by_id[c] for c in candidates if c in self._by_id), None)
+            if source is None:
+                return None
+            sources.append(source)
+        return sources
+
+
+def apply_derived_sensors(
+    sensors: List[SensorReading],
+    metrics: Tuple[DerivedMetric, ...] = DERIVED_METRICS,
+) -> List[SensorReading]:
+    """One-shot full pass: add the derived sensors to a parsed sensor list."""
+    return DerivedSensorEngine(metrics).apply(sensors)
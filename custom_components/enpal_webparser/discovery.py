@@ -6,7 +6,9 @@
 #
 # Description:
 #   Network discovery utilities for finding Enpal boxes on the local network.
-#   Scans subnet for devices responding to /deviceMessages endpoint.
+#   Scans subnet for devices responding to /deviceMessages endpoint: a cheap
+#   TCP connect to port 80 first, the HTTP identification only for open ports.
+#   Hosts from the kernel neighbor table and known box addresses go first.
 #
 # Author:       Oliver Stock (github.com/derolli1976)
 # License:      MIT
@@ -20,7 +22,10 @@
 import asyncio
 import ipaddress
 import logging
-from typing import List, Optional
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
 
 try:
     import psutil
@@ -28,10 +33,12 @@ try:
 except ImportError:
     HAS_PSUTIL = False
 
-from bs4 import BeautifulSoup
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from .const import DOMAIN
+from .utils import FIRMWARE_VERSION_RE
+
 _LOGGER = logging.getLogger(__name__)
 
 # Enpal device identification markers
@@ -39,6 +46,34 @@ DEVICE_MESSAGES_PATH = "/deviceMessages"
 IDENTIFY_TEXT = "Device Messages"
 IDENTIFY_CLASS = "m-3"
 
+# The identification reads the page in chunks: any <h1> whose class list
+# contains IDENTIFY_CLASS and whose text is IDENTIFY_TEXT identifies a box.
+# The Blazor script tag may come well after it (~35 KB into a heat pump
+# page), so reading goes on until that marker or the budget, which also
+# bounds what a foreign web server costs.
+IDENTIFY_MARKER_RE = re.compile(
+    rb"<h1\b[^>]*\bclass\s*=\s*[\"'][^\"']*(?<![\w-])%s(?![\w-])[^\"']*[\"'][^>]*>\s*%s\s*</h1>"
+    % (re.escape(IDENTIFY_CLASS.encode()), re.escape(IDENTIFY_TEXT.encode())),
+    re.IGNORECASE,
+)
+FIRMWARE_VERSION_BYTES_RE = re.compile(FIRMWARE_VERSION_RE.pattern.encode(), re.IGNORECASE)
+BLAZOR_MARKER_RE = re.compile(rb"<!--Blazor:|blazor\.(?:web|server)\.js")
+IDENTIFY_CHUNK_SIZE = 4096
+IDENTIFY_BYTE_BUDGET = 64 * 1024
+
+# Candidate ranking: hosts the kernel has recently talked to are alive and
+# are probed before the rest of the subnet.
+NEIGHBOR_TABLE_PATH = "/proc/net/arp"
+IP_NEIGH_TIMEOUT = 2
+
+# Scanner pacing: hosts probed at once (sliding window, not lockstep batches)
+# and the TCP connect timeout. A LAN host answers a SYN within milliseconds;
+# a missing one costs the full timeout, so it is kept short.
+HTTP_PORT = 80
+TCP_PROBE_TIMEOUT = 0.4
+TCP_PROBE_CONCURRENCY = 128
+IDENTIFY_CONCURRENCY = 8
+
 
 def get_local_subnets() -> List[ipaddress.IPv4Network]:
     """Get all local network subnets from the host machine.
@@ -90,11 +125,83 @@ def get_local_subnets() -> List[ipaddress.IPv4Network]:
     return subnets
 
 
+@dataclass(frozen=True)
+class EnpalProbe:
+    """What one identification request learned about a box."""
+
+    url: str
+    firmware_version: Optional[str] = None
+    blazor: bool = False  # page carries Blazor components (WebSocket capable)
+
+
+def _search_from(pattern: "re.Pattern[bytes]", buffer: bytearray, start: int) -> Optional["re.Match[bytes]"]:
+    # Markers are short; starting a little before the new chunk covers
+    # matches split across chunk boundaries.
+    return pattern.search(buffer, max(start - 128, 0))
+
+
+async def identify_enpal_device(hass: HomeAssistant, ip: str, timeout: int = 2) -> Optional[EnpalProbe]:
+    """Identify an Enpal box at ``ip`` without downloading the whole page.
+
+    Streams ``/deviceMessages`` in ``IDENTIFY_CHUNK_SIZE`` chunks and looks
+    for ``<h1 class="m-3">Device Messages</h1>`` with a precompiled byte
+    pattern. Firmware version and Blazor support are taken from the same
+    bytes. The connection is closed once both the marker and the Blazor
+    marker were found, at the end of the page, or after
+    ``IDENTIFY_BYTE_BUDGET`` bytes.
+
+    Returns:
+        An :class:`EnpalProbe` if an Enpal device was found, None otherwise
+    """
+    url = f"http://{ip}{DEVICE_MESSAGES_PATH}"
+    buffer = bytearray()
+    firmware = None
+    blazor = False
+    identified = False
+
+    try:
+        session = async_get_clientsession(hass)
+        async with session.get(url, timeout=timeout) as response:
+            if response.status != 200:
+                return None
+            try:
+                while len(buffer) < IDENTIFY_BYTE_BUDGET:
+                    chunk = await response.content.read(IDENTIFY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    start = len(buffer)
+                    buffer += chunk
+                    if firmware is None:
+                        match = _search_from(FIRMWARE_VERSION_BYTES_RE, buffer, start)
+                        if match:
+                            firmware = match.group(1).decode("ascii")
+                    if not blazor:
+                        blazor = _search_from(BLAZOR_MARKER_RE, buffer, start) is not None
+                    if not identified:
+                        identified = _search_from(IDENTIFY_MARKER_RE, buffer, start) is not None
+                    if identified and blazor:
+                        break
+            finally:
+                # Do not drain or reuse the connection for the unread rest.
+                response.close()
+
+    except asyncio.TimeoutError:
+        pass  # Timeout is expected for non-responsive IPs
+    except Exception:
+        pass  # Connection errors are expected during scanning
+
+    # A box stays identified when reading on for the Blazor marker fails.
+    if identified:
+        _LOGGER.info("[Enpal] Found Enpal device at %s (firmware %s)", url, firmware)
+        return EnpalProbe(url, firmware, blazor)
+    return None
+
+
 async def check_enpal_device(hass: HomeAssistant, ip: str, timeout: int = 2) -> Optional[str]:
     """Check if a given IP address hosts an Enpal device.
     
-    Uses the same detection method as the working reference implementation:
-    Looks for <h1 class="m-3">Device Messages</h1>
+    Looks for <h1 class="m-3">Device Messages</h1>, see
+    :func:`identify_enpal_device`.
     
     Args:
         hass: Home Assistant instance
@@ -104,44 +211,212 @@ async def check_enpal_device(hass: HomeAssistant, ip: str, timeout: int = 2) ->
     Returns:
         Full URL if Enpal device found, None otherwise
     """
-    url = f"http://{ip}{DEVICE_MESSAGES_PATH}"
-    
+    probe = await identify_enpal_device(hass, ip, timeout)
+    return probe.url if probe else None
+
+
+async def probe_tcp_port(ip: str, port: int = HTTP_PORT, timeout: float = TCP_PROBE_TIMEOUT) -> bool:
+    """True if ``ip`` accepts a TCP connection on ``port`` within ``timeout``."""
     try:
-        session = async_get_clientsession(hass)
-        async with session.get(url, timeout=timeout) as response:
-            if response.status != 200:
-                return None
-            
-            # Parse HTML and look for Enpal-specific markers
-            html = await response.text()
-            soup = BeautifulSoup(html, "html.parser")
-            
-            # Look for <h1 class="m-3">Device Messages</h1>
-            h1 = soup.find("h1", class_=IDENTIFY_CLASS)
-            if h1 and h1.text.strip() == IDENTIFY_TEXT:
-                _LOGGER.info("[Enpal] Found Enpal device at %s", url)
-                return url
-                
+        _reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(ip, port), timeout
+        )
+    except (asyncio.TimeoutError, OSError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+def parse_neighbor_table(text: str) -> Dict[str, str]:
+    """IPv4 neighbors (IP -> lower-case MAC) from ``/proc/net/arp`` or ``ip neigh`` output.
+
+    Incomplete and failed entries are skipped.
+    """
+    neighbors: Dict[str, str] = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        if "lladdr" in fields:
+            # ip neigh: "192.168.1.20 dev eth0 lladdr aa:bb:cc:dd:ee:ff STALE"
+            if fields[-1] in ("FAILED", "INCOMPLETE"):
+                continue
+            mac = fields[fields.index("lladdr") + 1]
+        elif fields[2].startswith("0x"):
+            # /proc/net/arp: IP, HW type, flags, HW address, mask, device
+            if fields[2] == "0x0":
+                continue
+            mac = fields[3]
+        else:
+            continue
+        try:
+            ipaddress.IPv4Address(fields[0])
+        except ValueError:
+            continue
+        if mac != "00:00:00:00:00:00":
+            neighbors[fields[0]] = mac.lower()
+    return neighbors
+
+
+def _read_text(path: str) -> str:
+    with open(path, encoding="ascii", errors="replace") as file:
+        return file.read()
+
+
+async def _ip_neigh_output() -> str:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "ip", "-4", "neigh", "show",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return ""
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), IP_NEIGH_TIMEOUT)
     except asyncio.TimeoutError:
-        pass  # Timeout is expected for non-responsive IPs
-    except Exception:
-        pass  # Connection errors are expected during scanning
-    
-    return None
+        proc.kill()
+        return ""
+    return stdout.decode("ascii", errors="replace")
+
+
+async def read_neighbor_table(hass: HomeAssistant, path: str = NEIGHBOR_TABLE_PATH) -> Dict[str, str]:
+    """Kernel neighbor table; falls back to ``ip neigh`` where ``path`` is missing."""
+    try:
+        text = await hass.async_add_executor_job(_read_text, path)
+    except OSError:
+        text = await _ip_neigh_output()
+    return parse_neighbor_table(text)
+
+
+def known_box_ips(hass: HomeAssistant) -> List[str]:
+    """Box addresses of the existing config entries."""
+    ips = []
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        host = urlparse(entry.options.get("url", "")).hostname
+        if host and host not in ips:
+            ips.append(host)
+    return ips
+
+
+def rank_candidates(
+    neighbors: Dict[str, str],
+    known_ips: Iterable[str] = (),
+) -> List[str]:
+    """Hosts to probe before the numeric sweep, best first.
+
+    Known box addresses, then neighbors sharing the vendor prefix (OUI) of a
+    known box, then all other neighbors. The ranking only reorders probes,
+    so a box of another vendor is still found.
+    """
+    known = list(dict.fromkeys(known_ips))
+    prefixes = {neighbors[ip][:8] for ip in known if ip in neighbors}
+
+    def _rank(ip: str) -> Tuple[int, int]:
+        return (0 if neighbors[ip][:8] in prefixes else 1, int(ipaddress.IPv4Address(ip)))
+
+    rest = sorted((ip for ip in neighbors if ip not in known), key=_rank)
+    return known + rest
 
 
-async def discover_enpal_devices(hass: HomeAssistant, progress_callback=None, max_hosts: int = 1024) -> List[str]:
+async def async_ranked_candidates(hass: HomeAssistant, subnets: List[ipaddress.IPv4Network]) -> List[str]:
+    """:func:`rank_candidates` for the host: known boxes plus live hosts in ``subnets``."""
+    neighbors = await read_neighbor_table(hass)
+    in_subnets = {
+        ip: mac for ip, mac in neighbors.items()
+        if any(ipaddress.IPv4Address(ip) in subnet for subnet in subnets)
+    }
+    known = known_box_ips(hass)
+    # The MAC of a known box is still wanted for its vendor prefix.
+    for ip in known:
+        if ip in neighbors:
+            in_subnets[ip] = neighbors[ip]
+    candidates = rank_candidates(in_subnets, known)
+    _LOGGER.debug("[Enpal] Ranked candidates: %s", candidates)
+    return candidates
+
+
+async def scan_hosts(
+    hass: HomeAssistant,
+    ips: List[str],
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    expected: Optional[int] = None,
+    accept: Optional[Callable[[EnpalProbe], bool]] = None,
+) -> List[EnpalProbe]:
+    """Identify Enpal boxes among ``ips`` in two stages.
+
+    Stage one is a TCP connect to port 80 with at most
+    ``TCP_PROBE_CONCURRENCY`` hosts in flight; a finished probe immediately
+    frees its slot for the next host, so one slow host never stalls the
+    others. Only hosts with an open port get the HTTP identification
+    (``identify_enpal_device``), at most ``IDENTIFY_CONCURRENCY`` at once.
+    ``progress_callback(done, total)`` is called after every host.
+
+    With ``expected``, all outstanding probes are cancelled as soon as that
+    many boxes were found; with ``accept`` only boxes it accepts count.
+
+    Returns the boxes found, in the order of ``ips``.
+    """
+    total = len(ips)
+    found: List[Optional[EnpalProbe]] = [None] * total
+    probe_slots = asyncio.Semaphore(TCP_PROBE_CONCURRENCY)
+    identify_slots = asyncio.Semaphore(IDENTIFY_CONCURRENCY)
+    done = 0
+    hits = 0
+    tasks: List[asyncio.Task] = []
+
+    async def _scan_one(index: int, ip: str) -> None:
+        nonlocal done, hits
+        try:
+            async with probe_slots:
+                port_open = await probe_tcp_port(ip)
+            if port_open:
+                async with identify_slots:
+                    found[index] = await identify_enpal_device(hass, ip)
+            if found[index] is not None and (accept is None or accept(found[index])):
+                hits += 1
+                if expected is not None and hits >= expected:
+                    current = asyncio.current_task()
+                    for task in tasks:
+                        if task is not current:
+                            task.cancel()
+        finally:
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+
+    tasks.extend(asyncio.ensure_future(_scan_one(i, ip)) for i, ip in enumerate(ips))
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if progress_callback and done < total:
+        progress_callback(total, total)  # the rest was cancelled
+    return [probe for probe in found if probe]
+
+
+async def discover_enpal_devices(
+    hass: HomeAssistant,
+    progress_callback=None,
+    max_hosts: int = 1024,
+    expected: Optional[int] = None,
+    accept: Optional[Callable[[EnpalProbe], bool]] = None,
+) -> List[EnpalProbe]:
     """Discover Enpal devices on the local network.
     
-    Scans all IP addresses in local subnets for Enpal devices.
+    Scans all IP addresses in local subnets for Enpal devices, ranked
+    candidates (see :func:`async_ranked_candidates`) first.
     
     Args:
         hass: Home Assistant instance
         progress_callback: Optional callback function(current, total) for progress updates
         max_hosts: Maximum number of hosts to scan (safety limit to prevent scanning huge networks)
+        expected: Stop as soon as this many devices were found
+        accept: Only devices it accepts count towards ``expected``
         
     Returns:
-        List of discovered Enpal device URLs
+        List of discovered Enpal devices (URL, firmware, Blazor support)
     """
     _LOGGER.info("[Enpal] Starting Enpal device discovery")
     
@@ -152,10 +427,9 @@ async def discover_enpal_devices(hass: HomeAssistant, progress_callback=None, ma
     
     _LOGGER.info("[Enpal] Scanning subnets: %s", [str(s) for s in subnets])
     
-    discovered_urls = []
-    
-    # Collect all IPs to scan
-    ips_to_scan = []
+    # Collect all IPs to scan, live and known hosts first
+    ips_to_scan = (await async_ranked_candidates(hass, subnets))[:max_hosts]
+    queued = set(ips_to_scan)
     total_possible_ips = 0
     
     for subnet in subnets:
@@ -178,7 +452,8 @@ async def discover_enpal_devices(hass: HomeAssistant, progress_callback=None, ma
                     max_hosts
                 )
                 break
-            ips_to_scan.append(str(ip))
+            if str(ip) not in queued:
+                ips_to_scan.append(str(ip))
         
         if len(ips_to_scan) >= max_hosts:
             break
@@ -187,59 +462,40 @@ async def discover_enpal_devices(hass: HomeAssistant, progress_callback=None, ma
     
     # Log IP ranges being scanned
     if ips_to_scan:
-        first_ip = ips_to_scan[0]
-        last_ip = ips_to_scan[-1]
         _LOGGER.info(
-            "[Enpal] Scanning %d IP addresses (out of %d possible) from %s to %s",
-            total_ips, total_possible_ips, first_ip, last_ip
+            "[Enpal] Scanning %d IP addresses (out of %d possible), %d ranked first",
+            total_ips, total_possible_ips, len(queued)
         )
     else:
         _LOGGER.info("[Enpal] No IPs to scan")
     
-    # Scan in batches to avoid overwhelming the network
-    batch_size = 50
-    completed = 0
-    
-    for i in range(0, total_ips, batch_size):
-        batch = ips_to_scan[i:i + batch_size]
-        batch_tasks = [check_enpal_device(hass, ip) for ip in batch]
-        
-        results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-        
-        for result in results:
-            if isinstance(result, str):
-                discovered_urls.append(result)
-        
-        completed += len(batch)
-        
-        if progress_callback:
-            progress_callback(completed, total_ips)
-        
-        _LOGGER.debug("[Enpal] Discovery progress: %d/%d", completed, total_ips)
-    
-    _LOGGER.info("[Enpal] Discovery complete. Found %d device(s)", len(discovered_urls))
-    return discovered_urls
+    discovered = await scan_hosts(hass, ips_to_scan, progress_callback, expected, accept)
+
+    _LOGGER.info("[Enpal] Discovery complete. Found %d device(s)", len(discovered))
+    return discovered
 
 
-async def quick_discover_enpal_devices(hass: HomeAssistant) -> List[str]:
-    """Quick discovery that checks common IP patterns in detected subnets.
+async def quick_discover_enpal_devices(hass: HomeAssistant, expected: Optional[int] = None) -> List[EnpalProbe]:
+    """Quick discovery of live hosts and common IP patterns in detected subnets.
     
-    This is faster than full subnet scan. It checks IPs ending in common patterns
+    This is faster than full subnet scan. It checks known box addresses and
+    the hosts of the kernel neighbor table, then IPs ending in common patterns
     like .1, .10, .50, .100, .150, .200, .254 across all detected subnets.
     
     Args:
         hass: Home Assistant instance
+        expected: Stop as soon as this many devices were found
         
     Returns:
-        List of discovered Enpal device URLs
+        List of discovered Enpal devices (URL, firmware, Blazor support)
     """
     _LOGGER.info("[Enpal] Starting quick Enpal device discovery")
     
     # Common host numbers to check (router is often .1, devices often .10-.254)
     common_host_numbers = [1, 2, 10, 20, 50, 100, 150, 200, 250, 254]
     
-    check_ips = []
     subnets = get_local_subnets()
+    check_ips = await async_ranked_candidates(hass, subnets)
     
     for subnet in subnets:
         # For each subnet, try common host numbers
@@ -248,7 +504,8 @@ async def quick_discover_enpal_devices(hass: HomeAssistant) -> List[str]:
                 # Create IP address from subnet base + host number
                 ip = ipaddress.IPv4Address(int(subnet.network_address) + host_num)
                 # Make sure it's actually in the subnet (not network or broadcast)
-                if ip in subnet and ip != subnet.network_address and ip != subnet.broadcast_address:
+                if (ip in subnet and ip != subnet.network_address
+                        and ip != subnet.broadcast_address and str(ip) not in check_ips):
                     check_ips.append(str(ip))
             except (ValueError, ipaddress.AddressValueError):
                 continue
@@ -262,10 +519,7 @@ async def quick_discover_enpal_devices(hass: HomeAssistant) -> List[str]:
     else:
         _LOGGER.warning("[Enpal] Quick scan: No IPs to check")
     
-    tasks = [check_enpal_device(hass, ip, timeout=2) for ip in check_ips]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    discovered_urls = [result for result in results if isinstance(result, str)]
-    
-    _LOGGER.info("[Enpal] Quick discovery found %d device(s)", len(discovered_urls))
-    return discovered_urls
+    discovered = await scan_hosts(hass, check_ips, expected=expected)
+
+    _LOGGER.info("[Enpal] Quick discovery found %d device(s)", len(discovered))
+    return discovered
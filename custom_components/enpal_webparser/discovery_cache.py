@@ -0,0 +1,308 @@
+#
+# Home Assistant Custom Component: Enpal Webparser
+#
+# File: discovery_cache.py
+#
+# Description:
+#   Persisted discovery cache (last seen address, MAC, firmware and time of
+#   every identified box) and the per-entry locator that finds a configured
+#   box again after its DHCP lease moved it to another address.
+#
+# Author:       Oliver Stock (github.com/derolli1976)
+# License:      MIT
+# Repository:   https://github.com/derolli1976/enpal
+#
+# Compatible with Home Assistant Core 2024.x and later.
+#
+# See README.md for setup and usage instructions.
+#
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DISCOVERY_CACHE_SAVE_DELAY,
+    DISCOVERY_CACHE_STORAGE_VERSION,
+    DOMAIN,
+    RELOCATE_AFTER_FAILURES,
+    RELOCATE_MIN_INTERVAL,
+)
+from .discovery import (
+    EnpalProbe,
+    discover_enpal_devices,
+    identify_enpal_device,
+    known_box_ips,
+    probe_tcp_port,
+    read_neighbor_table,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DISCOVERY_CACHE_DATA = f"{DOMAIN}_discovery_cache"
+
+
+@dataclass(frozen=True)
+class CachedBox:
+    """Where and when a box was last identified."""
+
+    ip: str
+    mac: Optional[str] = None
+    firmware_version: Optional[str] = None
+    last_seen: Optional[str] = None  # ISO 8601, UTC
+
+
+def _host(url: str) -> Optional[str]:
+    return urlparse(url).hostname
+
+
+class DiscoveryCache:
+    """Identified boxes in ``.storage``, keyed by MAC where it is known.
+
+    A box is only keyed by its address until the kernel neighbor table has
+    shown its MAC; one address never belongs to two cached boxes.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._store: Store = Store(
+            hass, DISCOVERY_CACHE_STORAGE_VERSION, f"{DOMAIN}.discovery"
+        )
+        self._boxes: Optional[Dict[str, CachedBox]] = None
+
+    async def async_load(self) -> List[CachedBox]:
+        """Cached boxes; empty when nothing usable is stored."""
+        if self._boxes is None:
+            try:
+                data = await self._store.async_load()
+            except Exception as e:  # corrupt file: start with an empty cache
+                _LOGGER.warning("[Enpal] Could not load the discovery cache: %s", e)
+                data = None
+            boxes: Dict[str, CachedBox] = {}
+            if isinstance(data, dict):
+                for item in data.get("boxes", []):
+                    if not isinstance(item, dict) or not isinstance(item.get("ip"), str):
+                        continue
+                    box = CachedBox(
+                        item["ip"], item.get("mac"),
+                        item.get("firmware_version"), item.get("last_seen"),
+                    )
+                    boxes[box.mac or f"ip:{box.ip}"] = box
+            self._boxes = boxes
+        return list(self._boxes.values())
+
+    async def async_find(self, ip: str) -> Optional[CachedBox]:
+        """The cached box last seen at ``ip``."""
+        return next((box for box in await self.async_load() if box.ip == ip), None)
+
+    async def async_remember(self, probes: Iterable[EnpalProbe]) -> None:
+        """Record ``probes`` as seen now, with the MACs the neighbor table knows."""
+        probes = list(probes)
+        if not probes:
+            return
+        await self.async_load()
+        assert self._boxes is not None
+        neighbors = await read_neighbor_table(self._hass)
+        now = dt_util.utcnow().isoformat()
+        for probe in probes:
+            ip = _host(probe.url)
+            if not ip:
+                continue
+            mac = neighbors.get(ip)
+            key = mac or next(
+                (key for key, box in self._boxes.items() if box.ip == ip), f"ip:{ip}"
+            )
+            previous = self._boxes.get(key)
+            for stale in [k for k, box in self._boxes.items() if box.ip == ip and k != key]:
+                del self._boxes[stale]
+            self._boxes[key] = CachedBox(
+                ip,
+                mac or (previous.mac if previous else None),
+                probe.firmware_version or (previous.firmware_version if previous else None),
+                now,
+            )
+        self._store.async_delay_save(self._data_to_save, DISCOVERY_CACHE_SAVE_DELAY)
+
+    async def async_revalidate(self) -> List[EnpalProbe]:
+        """Cached boxes that still answer at their address, checked concurrently.
+
+        A TCP connect rules out a vacated address within ``TCP_PROBE_TIMEOUT``
+        before the identification request is sent; a box that is still there
+        answers both within a few milliseconds on a LAN.
+        """
+        boxes = await self.async_load()
+
+        async def _check(box: CachedBox) -> Optional[EnpalProbe]:
+            if not await probe_tcp_port(box.ip):
+                return None
+            return await identify_enpal_device(self._hass, box.ip)
+
+        results = await asyncio.gather(*(_check(box) for box in boxes))
+        probes = [probe for probe in results if probe is not None]
+        _LOGGER.debug(
+            "[Enpal] %d of %d cached box(es) still answer", len(probes), len(boxes)
+        )
+        await self.async_remember(probes)
+        return probes
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {
+            "boxes": [
+                {
+                    "ip": box.ip,
+                    "mac": box.mac,
+                    "firmware_version": box.firmware_version,
+                    "last_seen": box.last_seen,
+                }
+                for box in (self._boxes or {}).values()
+            ]
+        }
+
+
+@callback
+def async_get_discovery_cache(hass: HomeAssistant) -> DiscoveryCache:
+    """The discovery cache shared by the config flow and all entries."""
+    cache = hass.data.get(DISCOVERY_CACHE_DATA)
+    if cache is None:
+        cache = hass.data[DISCOVERY_CACHE_DATA] = DiscoveryCache(hass)
+    return cache
+
+
+class BoxLocator:
+    """Follows the box of one config entry across address changes.
+
+    The coordinator reports the outcome of every update. The first success
+    records the box in the discovery cache. After
+    ``RELOCATE_AFTER_FAILURES`` consecutive failures the box is searched for
+    in the background, at most once per ``RELOCATE_MIN_INTERVAL`` seconds:
+    first where the neighbor table now shows its MAC, then with a discovery
+    scan. When it answers at a new address the entry URL is updated, which
+    reloads the entry.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self._hass = hass
+        self._entry = entry
+        self._cache = async_get_discovery_cache(hass)
+        self._failures = 0
+        self._recorded = False
+        self._searching = False
+        self._last_search: Optional[float] = None
+
+    @callback
+    def async_report_success(self, firmware_version: Optional[str] = None) -> None:
+        self._failures = 0
+        if self._recorded:
+            return
+        self._recorded = True
+        probe = EnpalProbe(self._entry.options.get("url", ""), firmware_version)
+        self._entry.async_create_background_task(
+            self._hass, self._cache.async_remember([probe]), "enpal_webparser_record_box"
+        )
+
+    @callback
+    def async_report_failure(self) -> None:
+        self._failures += 1
+        if self._failures < RELOCATE_AFTER_FAILURES or self._searching:
+            return
+        now = time.monotonic()
+        if self._last_search is not None and now - self._last_search < RELOCATE_MIN_INTERVAL:
+            return
+        self._last_search = now
+        self._searching = True
+        self._entry.async_create_background_task(
+            self._hass, self._async_search(), "enpal_webparser_relocate_box"
+        )
+
+    async def _async_search(self) -> None:
+        try:
+            await self.async_relocate()
+        finally:
+            self._searching = False
+
+    async def async_relocate(self) -> Optional[EnpalProbe]:
+        """Find the box at a new address and move the entry there.
+
+        Returns the box at its new address, or None if it still answers at
+        the configured one, was not found, or could not be told apart from
+        other boxes.
+        """
+        old_ip = _host(self._entry.options.get("url", ""))
+        if not old_ip:
+            return None
+        if await identify_enpal_device(self._hass, old_ip):
+            # The box is where it was; the updates fail for another reason.
+            return None
+
+        cached = await self._cache.async_find(old_ip)
+        mac = cached.mac if cached else None
+        probe = None
+        if mac:
+            neighbors = await read_neighbor_table(self._hass)
+            for ip, neighbor_mac in neighbors.items():
+                if neighbor_mac == mac and ip != old_ip and await probe_tcp_port(ip):
+                    probe = await identify_enpal_device(self._hass, ip)
+                    if probe:
+                        break
+        if probe is None:
+            probe = await self._async_scan(old_ip, mac)
+        if probe is None:
+            _LOGGER.info("[Enpal] Box last seen at %s not found at another address", old_ip)
+            return None
+
+        _LOGGER.warning(
+            "[Enpal] Box moved from %s to %s, updating the entry URL", old_ip, _host(probe.url)
+        )
+        await self._cache.async_remember([probe])
+        old_url = self._entry.options.get("url")
+        self._hass.config_entries.async_update_entry(
+            self._entry,
+            unique_id=probe.url if self._entry.unique_id == old_url else self._entry.unique_id,
+            options={**self._entry.options, "url": probe.url},
+        )
+        return probe
+
+    async def _async_scan(self, old_ip: str, mac: Optional[str]) -> Optional[EnpalProbe]:
+        """Scan for a box that is neither at ``old_ip`` nor configured elsewhere.
+
+        With a known MAC only that box is accepted; without one only a single
+        unclaimed box, so the entry is never moved to a neighbor's box.
+
+        Claimed boxes never end the scan early. With a MAC the whole network
+        is scanned (the MAC of a box is only known after talking to it);
+        without one the scan stops at the second unclaimed box, which
+        already rules out a guess.
+        """
+        claimed = set(known_box_ips(self._hass)) | {old_ip}
+
+        def _unclaimed(probe: EnpalProbe) -> bool:
+            return _host(probe.url) not in claimed
+
+        found = [
+            probe
+            for probe in await discover_enpal_devices(
+                self._hass, expected=None if mac else 2, accept=_unclaimed
+            )
+            if _unclaimed(probe)
+        ]
+        if mac:
+            # The scan has just talked to every host it found.
+            neighbors = await read_neighbor_table(self._hass)
+            return next((p for p in found if neighbors.get(_host(p.url) or "") == mac), None)
+        if len(found) > 1:
+            _LOGGER.warning(
+                "[Enpal] Box last seen at %s is gone and %d unconfigured boxes answer; "
+                "not guessing, reconfigure the entry",
+                old_ip, len(found),
+            )
+            return None
+        return found[0] if found else None
@@ -0,0 +1,134 @@
+#
+# Home Assistant Custom Component: Enpal Webparser
+#
+# File: energy_integrator.py
+#
+# Description:
+#   Power → energy integration keyed by the box's own sample timestamps
+#   (enpal_last_update). Trapezoidal rule, duplicate deliveries of the same
+#   sample are dropped and gaps are bounded by a maximum-hold policy.
+#   IntegratedMetric declares one integrated output (grid import/export,
+#   battery charge/discharge, ...) on top of it.
+#
+# Author:       Oliver Stock (github.com/derolli1976)
+# License:      MIT
+# Repository:   https://github.com/derolli1976/enpal
+#
+# Compatible with Home Assistant Core 2024.x and later.
+#
+# See README.md for setup and usage instructions.
+#
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from .const import INTEGRATION_MAX_GAP_SECONDS
+from .models import SensorReading
+from .timestamps import parse_box_datetime
+
+
+def sample_time(reading: SensorReading) -> datetime:
+    """Box timestamp of a reading; wall clock when it carries none."""
+    raw = reading.enpal_last_update
+    if raw:
+        try:
+            stamp = datetime.fromisoformat(raw)
+        except ValueError:
+            stamp = None
+        if stamp is None or stamp.tzinfo is None:
+            stamp = parse_box_datetime(raw)  # raw or zone-less (box-local) value
+        if stamp is not None:
+            return stamp
+    return datetime.now(timezone.utc)
+
+
+class EnergyIntegrator:
+    """Trapezoidal integration of power samples (W) into energy (kWh).
+
+    Samples are keyed by their box timestamp: a push that re-delivers the
+    sample already seen adds nothing, however often it arrives. Between two
+    samples more than ``max_gap`` seconds apart (connection loss, box
+    reboot) the last power is held for ``max_gap`` seconds only. A timestamp
+    far behind the last one (box clock reset) restarts the integration.
+    """
+
+    def __init__(self, max_gap: float = INTEGRATION_MAX_GAP_SECONDS) -> None:
+        self.max_gap = max_gap
+        self._last_time: Optional[datetime] = None
+        self._last_power: Optional[float] = None
+
+    @property
+    def last_time(self) -> Optional[datetime]:
+        return self._last_time
+
+    def add(self, timestamp: datetime, power: float) -> float:
+        """Feed one sample; returns the energy (kWh) since the previous one."""
+        last_time = self._last_time
+        if last_time is not None:
+            elapsed = (timestamp - last_time).total_seconds()
+            if elapsed <= 0 and elapsed > -self.max_gap:
+                return 0.0  # same sample again, or out of order
+            if elapsed > 0:
+                if elapsed > self.max_gap:
+                    energy = self._last_power * self.max_gap
+                else:
+                    energy = (self._last_power + power) / 2 * elapsed
+                self._last_time = timestamp
+                self._last_power = power
+                return energy / 3_600_000
+        self._last_time = timestamp
+        self._last_power = power
+        return 0.0
+
+
+@dataclass(frozen=True)
+class IntegratedMetric:
+    """One energy counter integrated from a power sensor.
+
+    ``sources`` are candidate sensor ids, the first one present is used.
+    ``sign`` selects the direction that is counted: +1 integrates the
+    positive part of the power, -1 the negative part (as a positive energy).
+    """
+
+    name: str
+    unique_id: str
+    sources: Tuple[str, ...]
+    sign: int = 1
+    icon: Optional[str] = None
+    enabled_default: bool = False
+
+    def power(self, watts: float) -> float:
+        return max(0.0, self.sign * watts)
+
+
+INTEGRATED_METRICS: Tuple[IntegratedMetric, ...] = (
+    # Sign follows the PowerSensor phases: positive = import, negative = export.
+    IntegratedMetric(
+        name="PowerSensor: Energy Grid Import (integrated)",
+        unique_id="integrated_energy_grid_import_kwh",
+        sources=("powersensor_power_grid_net",),
+        icon="mdi:transmission-tower-import",
+    ),
+    IntegratedMetric(
+        name="PowerSensor: Energy Grid Export (integrated)",
+        unique_id="integrated_energy_grid_export_kwh",
+        sources=("powersensor_power_grid_net",),
+        sign=-1,
+        icon="mdi:transmission-tower-export",
+    ),
+    # Positive = charging, negative = discharging.
+    IntegratedMetric(
+        name="Battery: Energy Charged (integrated)",
+        unique_id="integrated_energy_battery_charge_kwh",
+        sources=("inverter_power_battery_charge_discharge", "power_battery_charge_discharge"),
+        icon="mdi:battery-arrow-up",
+    ),
+    IntegratedMetric(
+        name="Battery: Energy Discharged (integrated)",
+        unique_id="integrated_energy_battery_discharge_kwh",
+        sources=("inverter_power_battery_charge_discharge", "power_battery_charge_discharge"),
+        sign=-1,
+        icon="mdi:battery-arrow-down",
+    ),
+)
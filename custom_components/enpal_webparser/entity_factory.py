@@ -6,7 +6,7 @@
 # Description:
 #   Entity factory and base classes for Enpal Webparser sensors.
 #   Provides a flexible, testable way to create Home Assistant SensorEntity objects
-#   from parsed sensor data dictionaries.
+#   from parsed sensor readings.
 #
 # Author:       Oliver Stock (github.com/derolli1976)
 # License:      MIT
@@ -17,87 +17,140 @@
 # See README.md for setup and usage instructions.
 #
 
+import time
+from dataclasses import dataclass, field
 from functools import cached_property
+from typing import Mapping, Optional, Tuple
 
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
+from homeassistant.core import Event, callback
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, CoordinatorEntity
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.restore_state import RestoreEntity
 
-from .utils import make_id
-from .const import ICON_MAP, STATE_CLASS_OVERRIDES
+from .const import (
+    DEFAULT_MAX_SILENCE,
+    DOMAIN,
+    STATE_CLASS_OVERRIDES,
+    WRITE_DEADBANDS_BY_DEVICE_CLASS,
+    WRITE_DEADBANDS_BY_SENSOR,
+)
+from .coordinator import WRITE_ORDER_DERIVED, WRITE_ORDER_SOURCE, async_write_batched
+from .models import SensorReading
+from .registry import ENTITY_TYPE_ENERGY, ENTITY_TYPE_WALLBOX_POWER, SensorSpec, get_registry
 
-import re
 
+@dataclass
+class StateWriteStats:
+    """Coordinator-driven state writes done and skipped, across all entities."""
 
-def _display_name(name: str, group: str) -> str:
-    """Build a consistent display name with 'Group: Label' format.
+    written: int = 0
+    suppressed: int = 0
 
-    The internal *name* (used for unique_id generation) sometimes already
-    contains the group word embedded (e.g. 'Current Wallbox Connector 1
-    Phase (B)').  For display purposes we always want the canonical form
-    'Wallbox: Current Connector 1 Phase (B)'.
-    """
-    group_lower = group.lower()
 
-    # Already has a proper 'Group: ...' prefix → keep as-is
-    if name.lower().startswith(group_lower + ":"):
-        return name
+WRITE_STATS = StateWriteStats()
+
 
-    # Remove the embedded group word (case-insensitive, whole word)
-    pattern = re.compile(r'\b' + re.escape(group) + r'\b', re.IGNORECASE)
-    label = pattern.sub('', name).strip()
-    # Collapse any double spaces left behind
-    label = re.sub(r' {2,}', ' ', label).strip(': ')
+@dataclass(frozen=True)
+class WritePolicy:
+    """Opt-in write reduction: numeric deadbands plus a max-silence heartbeat.
 
-    return f"{group}: {label}" if label else name
+    Deadbands are ``(absolute, relative)`` tuples, see const.py. A reading
+    within its deadband of the last written value is not written unless the
+    entity has been silent for ``max_silence`` seconds.
+    """
+
+    max_silence: float = DEFAULT_MAX_SILENCE
+    by_device_class: Mapping[str, Tuple[float, float]] = field(
+        default_factory=lambda: dict(WRITE_DEADBANDS_BY_DEVICE_CLASS)
+    )
+    by_sensor: Mapping[str, Tuple[float, float]] = field(
+        default_factory=lambda: dict(WRITE_DEADBANDS_BY_SENSOR)
+    )
+
+    def deadband_for(self, spec: SensorSpec) -> Optional[Tuple[float, float]]:
+        """Deadband of one sensor, or None when every change is written."""
+        if spec.state_class != "measurement":
+            return None  # counters and text states stay exact
+        band = self.by_sensor.get(spec.sensor_id)
+        if band is None and spec.device_class:
+            band = self.by_device_class.get(spec.device_class)
+        return band
+
+
+def _as_float(value) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _spec_for(sensor: SensorReading) -> SensorSpec:
+    """Registry spec for a parsed sensor reading."""
+    return get_registry().lookup(
+        sensor.name or "unknown",
+        sensor.group,
+        sensor.unit,
+        sensor.device_class,
+    )
 
 
 class EnpalBaseSensor(CoordinatorEntity, SensorEntity, RestoreEntity):
     """Generic Enpal sensor entity using the update coordinator."""
 
-    def __init__(self, sensor: dict, coordinator: DataUpdateCoordinator):
-        super().__init__(coordinator)
+    # Changes with every push; recording it would store a new attribute row
+    # for every state, even for flat values.
+    _unrecorded_attributes = frozenset({"enpal_last_update"})
+    # Position in the coordinator's batched write pass.
+    _write_order = WRITE_ORDER_SOURCE
+
+    def __init__(
+        self,
+        sensor: SensorReading,
+        coordinator: DataUpdateCoordinator,
+        spec: SensorSpec | None = None,
+        write_policy: WritePolicy | None = None,
+    ):
+        # The group is the listener context: pushes only wake touched groups.
+        super().__init__(coordinator, sensor.group or None)
+        spec = spec or _spec_for(sensor)
+        self._spec = spec
         self._restored_value = None
         self._sensor = sensor
-        raw_name = sensor.get("name", "unknown")
-        group = sensor.get("group", "")
-        self._attr_name = _display_name(raw_name, group) if group else raw_name
-        self._attr_unique_id = make_id(raw_name)  # ID stays based on original name
-        self._attr_native_unit_of_measurement = sensor.get("unit")
-        self._attr_enabled_default = sensor.get("enabled", True)
-
-        icon_key = make_id(sensor.get("name", ""))
-        if icon_key in ICON_MAP:
-            self._attr_icon = ICON_MAP[icon_key]
-
-
-        device_class = sensor.get("device_class")
+        self._last_written = None  # fingerprint of the last written state
+        self._last_written_at = 0.0
+        self._writes_suppressed = 0
+        self._write_policy = write_policy
+        self._deadband = write_policy.deadband_for(spec) if write_policy else None
+        self._attr_name = spec.display_name
+        self._attr_unique_id = spec.sensor_id  # ID stays based on original name
+        self._attr_native_unit_of_measurement = sensor.unit
+        self._attr_enabled_default = sensor.enabled
+
+        if spec.icon:
+            self._attr_icon = spec.icon
+
+        device_class = spec.device_class
         if device_class and hasattr(SensorDeviceClass, device_class.upper()):
             self._attr_device_class = getattr(SensorDeviceClass, device_class.upper())
         else:
             self._attr_device_class = device_class
-        
-        # allow explicit state_class from sensor dict
-        self._attr_state_class = self._sensor.get("state_class")
-
-        # measurement state class for numeric sensors if not explicitly set
-        numeric_device_classes = {
-            "power", "voltage", "current", "temperature", "frequency",
-            "battery", "humidity", "pressure"
-        }
-        if self._attr_state_class is None:
-            if device_class in numeric_device_classes or self._attr_native_unit_of_measurement in {"W","kW","V","A","Hz","°C","%"}:
-                self._attr_state_class = "measurement"
 
-        # custom overrides for state class if specified
-        sensor_id = self._attr_unique_id
-        if sensor_id in STATE_CLASS_OVERRIDES:
-            self._attr_state_class = STATE_CLASS_OVERRIDES[sensor_id]
+        # An explicit state_class on the reading wins over the registry
+        # default, but not over the custom overrides in STATE_CLASS_OVERRIDES.
+        explicit = sensor.state_class
+        if explicit and spec.sensor_id not in STATE_CLASS_OVERRIDES:
+            self._attr_state_class = explicit
+        else:
+            self._attr_state_class = spec.state_class
 
     @property
     def native_value(self):
-        value = self._sensor.get("value")
+        value = self._sensor.value
         # Fall back to the value restored from the last Home Assistant run
         # when the sensor is (temporarily) missing from the coordinator data,
         # e.g. right after a restart or while the sensor disappears from the
@@ -109,7 +162,7 @@ class EnpalBaseSensor(CoordinatorEntity, SensorEntity, RestoreEntity):
     @property
     def extra_state_attributes(self):
         return {
-            "enpal_last_update": self._sensor.get("enpal_last_update")
+            "enpal_last_update": self._sensor.enpal_last_update
         }
 
     @cached_property
@@ -121,11 +174,67 @@ class EnpalBaseSensor(CoordinatorEntity, SensorEntity, RestoreEntity):
             "model": "Webparser",
         }
 
+    def _refresh_sensor(self) -> None:
+        sensor = self.coordinator.data.get(self._attr_unique_id) if self.coordinator.data else None
+        if sensor is not None:
+            self._sensor = sensor
+
     def _handle_coordinator_update(self):
-        for s in self.coordinator.data:
-            if make_id(s.get("name", "")) == self._attr_unique_id:
-                self._sensor = s
-                break
+        self._refresh_sensor()
+        # The fingerprint is taken at flush time, after the entities this one
+        # reads (lower write order) have written theirs.
+        async_write_batched(self.coordinator, self._async_write_if_changed, self._write_order)
+
+    def _state_fingerprint(self) -> tuple:
+        """Everything the written state depends on.
+
+        Built from the computed properties rather than the raw reading, so
+        subclasses that derive the state from elsewhere (e.g. the wallbox
+        power zeroing) are covered too.
+        """
+        attrs = self.extra_state_attributes
+        if attrs and self._write_policy is not None:
+            # In write-reduction mode a new box timestamp alone is no reason
+            # to write; it is refreshed with the next real change.
+            attrs = {k: v for k, v in attrs.items() if k != "enpal_last_update"}
+        return (
+            self.available,
+            self.native_value,
+            self.native_unit_of_measurement,
+            tuple(attrs.items()) if attrs else None,
+        )
+
+    def _within_deadband(self, fingerprint: tuple, now: float) -> bool:
+        """True if only the value moved, and by no more than the deadband."""
+        last = self._last_written
+        if self._deadband is None or last is None:
+            return False
+        if now - self._last_written_at >= self._write_policy.max_silence:
+            return False  # heartbeat
+        if fingerprint[0] != last[0] or fingerprint[2:] != last[2:]:
+            return False
+        new, old = _as_float(fingerprint[1]), _as_float(last[1])
+        if new is None or old is None:
+            return False
+        absolute, relative = self._deadband
+        return abs(new - old) <= max(absolute, relative * abs(old))
+
+    def _async_write_if_changed(self):
+        """Write the state unless it equals the last written one.
+
+        Pushes arrive every few seconds but most sensors do not change in
+        between; an unchanged write still fires a state_changed event and
+        recorder work.
+        """
+        fingerprint = self._state_fingerprint()
+        now = time.monotonic()
+        if fingerprint == self._last_written or self._within_deadband(fingerprint, now):
+            self._writes_suppressed += 1
+            WRITE_STATS.suppressed += 1
+            return
+        self._last_written = fingerprint
+        self._last_written_at = now
+        WRITE_STATS.written += 1
         self.async_write_ha_state()
 
     async def async_added_to_hass(self):
@@ -136,33 +245,55 @@ class EnpalBaseSensor(CoordinatorEntity, SensorEntity, RestoreEntity):
         last_state = await self.async_get_last_state()
         if last_state is not None and last_state.state not in (None, "unknown", "unavailable"):
             self._restored_value = last_state.state
-        self._handle_coordinator_update()
-
-
-# Wallbox sensors whose value must be forced to 0 when not actively charging.
-# Works around an Enpal firmware bug where these values freeze after charging ends.
-_WALLBOX_ZERO_OVERRIDE_IDS = {
-    "power_wallbox_connector_1_charging",
-    "current_wallbox_connector_1_phase_a",
-    "current_wallbox_connector_1_phase_b",
-    "current_wallbox_connector_1_phase_c",
-}
+        self._refresh_sensor()
+        self._async_write_if_changed()
 
 
 def build_sensor_entity(
-    sensor: dict,
+    sensor: SensorReading,
     coordinator: DataUpdateCoordinator,
     use_wallbox: bool = False,
+    write_policy: WritePolicy | None = None,
 ) -> SensorEntity:
     """
     Factory function: Builds the appropriate sensor entity.
     Extendable for special cases or subclasses.
     """
-    if sensor.get("device_class") == "energy":
-        return EnpalEnergySensor(sensor, coordinator)
-    if use_wallbox and make_id(sensor.get("name", "")) in _WALLBOX_ZERO_OVERRIDE_IDS:
-        return EnpalWallboxPowerSensor(sensor, coordinator)
-    return EnpalBaseSensor(sensor, coordinator)
+    spec = _spec_for(sensor)
+    if spec.entity_type == ENTITY_TYPE_ENERGY:
+        return EnpalEnergySensor(sensor, coordinator, spec, write_policy)
+    if use_wallbox and spec.entity_type == ENTITY_TYPE_WALLBOX_POWER:
+        return EnpalWallboxPowerSensor(sensor, coordinator, spec, write_policy)
+    return EnpalBaseSensor(sensor, coordinator, spec, write_policy)
+
+
+def register_dormant_sensor(
+    ent_reg: er.EntityRegistry,
+    entry,
+    sensor: SensorReading,
+    device_id: str | None,
+) -> None:
+    """Create the disabled registry entry of a sensor without building its entity.
+
+    Used for disabled-by-default groups: the user can still find and enable
+    the entity; Home Assistant then reloads the config entry and the entity
+    is built by :func:`build_sensor_entity` like any other.
+    """
+    spec = _spec_for(sensor)
+    ent_reg.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        spec.sensor_id,
+        config_entry=entry,
+        device_id=device_id,
+        disabled_by=er.RegistryEntryDisabler.INTEGRATION,
+        suggested_object_id=spec.display_name,
+        original_name=spec.display_name,
+        original_device_class=spec.device_class,
+        original_icon=spec.icon,
+        unit_of_measurement=sensor.unit,
+        capabilities={"state_class": spec.state_class} if spec.state_class else None,
+    )
 
 
 class EnpalWallboxPowerSensor(EnpalBaseSensor):
@@ -173,10 +304,11 @@ class EnpalWallboxPowerSensor(EnpalBaseSensor):
     """
 
     _WALLBOX_STATUS_ENTITY = "sensor.wallbox_status"
+    _write_order = WRITE_ORDER_DERIVED
 
     @property
     def native_value(self):
-        raw = self._sensor.get("value")
+        raw = self._sensor.value
         status_state = self.hass.states.get(self._WALLBOX_STATUS_ENTITY)
         if status_state is not None and status_state.state != "charging":
             return 0
@@ -187,17 +319,34 @@ class EnpalWallboxPowerSensor(EnpalBaseSensor):
         attrs = super().extra_state_attributes
         status_state = self.hass.states.get(self._WALLBOX_STATUS_ENTITY)
         if status_state is not None and status_state.state != "charging":
-            attrs["enpal_raw_value"] = self._sensor.get("value")
+            attrs["enpal_raw_value"] = self._sensor.value
             attrs["enpal_zero_reason"] = "wallbox not charging"
         return attrs
 
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        # The status comes from the wallbox coordinator, not from this
+        # entity's group, so its changes do not wake the listener context.
+        self.async_on_remove(
+            async_track_state_change_event(
+                self.hass, [self._WALLBOX_STATUS_ENTITY], self._handle_status_change
+            )
+        )
+
+    @callback
+    def _handle_status_change(self, event: Event) -> None:
+        async_write_batched(self.coordinator, self._async_write_if_changed, self._write_order)
+
 
 class EnpalEnergySensor(EnpalBaseSensor):
-    def __init__(self, sensor: dict, coordinator: DataUpdateCoordinator):
-        super().__init__(sensor, coordinator)
-        # Default: Energy counter is total_increasing
-        self._attr_state_class = "total_increasing"
-        # Allow explicit overrides
-        sensor_id = self._attr_unique_id
-        if sensor_id in STATE_CLASS_OVERRIDES:
-            self._attr_state_class = STATE_CLASS_OVERRIDES[sensor_id]
+    def __init__(
+        self,
+        sensor: SensorReading,
+        coordinator: DataUpdateCoordinator,
+        spec: SensorSpec | None = None,
+        write_policy: WritePolicy | None = None,
+    ):
+        super().__init__(sensor, coordinator, spec, write_policy)
+        # Energy counters are always total_increasing unless overridden in
+        # STATE_CLASS_OVERRIDES; the registry spec already resolves both.
+        self._attr_state_class = self._spec.state_class
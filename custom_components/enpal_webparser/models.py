@@ -1,6 +1,7 @@
 """Data models for Enpal API"""
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+import math
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 
 
 @dataclass
@@ -41,3 +42,156 @@ class ComponentDescriptor:
     descriptor: str = ""
     prerender_id: str = ""
     key: Dict[str, str] = field(default_factory=dict)
+
+
+def _to_number(value: Optional[str]) -> Optional[float]:
+    """Numeric value of a display string, or None for text states."""
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+@dataclass(frozen=True, slots=True)
+class SensorReading:
+    """One sensor reading as parsed from the box.
+
+    Immutable: an update produces a new instance via :meth:`replace`.
+    ``sensor_id`` (the entity unique_id) and ``numeric`` are computed once
+    when the reading is created instead of on every lookup.
+    """
+    sensor_id: str
+    name: str
+    value: Optional[str]
+    numeric: Optional[float] = None
+    unit: Optional[str] = None
+    device_class: Optional[str] = None
+    enabled: bool = True
+    enpal_last_update: Optional[str] = None
+    group: str = ""
+    raw_key: Optional[str] = None
+    derived: bool = False
+    state_class: Optional[str] = None
+
+    @classmethod
+    def create(
+        cls,
+        name: str,
+        value: Optional[str],
+        unit: Optional[str] = None,
+        device_class: Optional[str] = None,
+        enabled: bool = True,
+        enpal_last_update: Optional[str] = None,
+        group: str = "",
+        raw_key: Optional[str] = None,
+        derived: bool = False,
+        state_class: Optional[str] = None,
+        sensor_id: Optional[str] = None,
+    ) -> "SensorReading":
+        """Build a reading, deriving ``sensor_id`` (unless already known) and ``numeric``."""
+        if sensor_id is None:
+            from .utils import make_id
+
+            sensor_id = make_id(name)
+        return cls(
+            sensor_id, name, value, _to_number(value), unit, device_class,
+            enabled, enpal_last_update, group, raw_key, derived, state_class,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SensorReading":
+        """Build a reading from the legacy sensor dict shape."""
+        return cls.create(
+            data.get("name", ""),
+            data.get("value"),
+            unit=data.get("unit"),
+            device_class=data.get("device_class"),
+            enabled=data.get("enabled", True),
+            enpal_last_update=data.get("enpal_last_update"),
+            group=data.get("group", ""),
+            raw_key=data.get("raw_key"),
+            derived=data.get("derived", False),
+            state_class=data.get("state_class"),
+            sensor_id=data.get("sensor_id"),
+        )
+
+    def replace(self, **changes: Any) -> "SensorReading":
+        """Copy with ``changes`` applied; ``numeric`` follows a new value."""
+        if "value" in changes and "numeric" not in changes:
+            changes["numeric"] = _to_number(changes["value"])
+        return replace(self, **changes)
+
+    def with_value(
+        self,
+        value: Optional[str],
+        enpal_last_update: Optional[str],
+        unit: Optional[str] = None,
+    ) -> "SensorReading":
+        """Copy carrying a new reading (the per-update hot path).
+
+        Same as ``replace(value=..., enpal_last_update=..., unit=...)`` but
+        built positionally; ``unit`` None keeps the current unit.
+        """
+        return SensorReading(
+            self.sensor_id, self.name, value, _to_number(value),
+            unit or self.unit, self.device_class, self.enabled,
+            enpal_last_update, self.group, self.raw_key, self.derived,
+            self.state_class,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Legacy sensor dict shape, for consumers outside the integration."""
+        data: Dict[str, Any] = {
+            "name": self.name,
+            "value": self.value,
+            "unit": self.unit,
+            "device_class": self.device_class,
+            "enabled": self.enabled,
+            "enpal_last_update": self.enpal_last_update,
+            "group": self.group,
+        }
+        if self.raw_key:
+            data["raw_key"] = self.raw_key
+        if self.derived:
+            data["derived"] = True
+        if self.state_class:
+            data["state_class"] = self.state_class
+        return data
+
+
+class SensorSnapshot:
+    """Coordinator payload: the ordered readings of one update plus an id index.
+
+    Built once per update so every entity resolves its reading with a single
+    dict lookup instead of scanning the list. Iterating yields the readings in
+    box order. If an id occurs twice, :meth:`get` returns the first reading,
+    as the former linear scan did.
+    """
+
+    __slots__ = ("_readings", "_by_id")
+
+    def __init__(self, readings: Iterable[SensorReading] = ()) -> None:
+        self._readings = tuple(readings)
+        by_id: Dict[str, SensorReading] = {}
+        for reading in self._readings:
+            by_id.setdefault(reading.sensor_id, reading)
+        self._by_id = by_id
+
+    def get(self, sensor_id: str) -> Optional[SensorReading]:
+        return self._by_id.get(sensor_id)
+
+    def ids(self):
+        """View of all sensor ids in the snapshot."""
+        return self._by_id.keys()
+
+    def __iter__(self) -> Iterator[SensorReading]:
+        return iter(self._readings)
+
+    def __len__(self) -> int:
+        return len(self._readings)
+
+    def __getitem__(self, index: int) -> SensorReading:
+        return self._readings[index]
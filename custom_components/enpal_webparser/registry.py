@@ -0,0 +1,186 @@
+#
+# Home Assistant Custom Component: Enpal Webparser
+#
+# File: registry.py
+#
+# Description:
+#   Process-wide sensor metadata registry. Resolves a sensor (group + dotted
+#   key, or its internal name) once to an immutable SensorSpec that carries the
+#   unique id, display name, device/state class, icon and entity type. Shared
+#   by the HTML parser, the WebSocket diff path and the entity factory.
+#
+# Author:       Oliver Stock (github.com/derolli1976)
+# License:      MIT
+# Repository:   https://github.com/derolli1976/enpal
+#
+# Compatible with Home Assistant Core 2024.x and later.
+#
+# See README.md for setup and usage instructions.
+#
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .const import (
+    DEVICE_CLASS_OVERRIDES,
+    ICON_MAP,
+    SENSOR_KEY_ALIASES,
+    SENSOR_KEY_GROUPS,
+    STATE_CLASS_OVERRIDES,
+    WALLBOX_ZERO_OVERRIDE_IDS,
+)
+from .utils import friendly_name, make_id
+
+_LOGGER = logging.getLogger(__name__)
+
+# Entity classes built by entity_factory.build_sensor_entity().
+ENTITY_TYPE_BASE = "base"
+ENTITY_TYPE_ENERGY = "energy"
+ENTITY_TYPE_WALLBOX_POWER = "wallbox_power"
+
+# Device classes / units that default to the "measurement" state class.
+_MEASUREMENT_DEVICE_CLASSES = frozenset({
+    "power", "voltage", "current", "temperature", "frequency",
+    "battery", "humidity", "pressure",
+})
+_MEASUREMENT_UNITS = frozenset({"W", "kW", "V", "A", "Hz", "°C", "%"})
+
+
+@dataclass(frozen=True)
+class SensorSpec:
+    """Resolved, immutable metadata of one sensor."""
+
+    sensor_id: str
+    name: str
+    display_name: str
+    group: str
+    unit: Optional[str]
+    device_class: Optional[str]
+    state_class: Optional[str]
+    icon: Optional[str]
+    entity_type: str
+
+
+def _display_name(name: str, group: str) -> str:
+    """Build a consistent display name with 'Group: Label' format.
+
+    The internal *name* (used for unique_id generation) sometimes already
+    contains the group word embedded (e.g. 'Current Wallbox Connector 1
+    Phase (B)').  For display purposes we always want the canonical form
+    'Wallbox: Current Connector 1 Phase (B)'.
+    """
+    if not group:
+        return name
+
+    group_lower = group.lower()
+
+    # Already has a proper 'Group: ...' prefix → keep as-is
+    if name.lower().startswith(group_lower + ":"):
+        return name
+
+    # Remove the embedded group word (case-insensitive, whole word)
+    pattern = re.compile(r'\b' + re.escape(group) + r'\b', re.IGNORECASE)
+    label = pattern.sub('', name).strip()
+    # Collapse any double spaces left behind
+    label = re.sub(r' {2,}', ' ', label).strip(': ')
+
+    return f"{group}: {label}" if label else name
+
+
+def _state_class(sensor_id: str, unit: Optional[str], device_class: Optional[str]) -> Optional[str]:
+    """Default state class: explicit override, energy counter or measurement."""
+    if sensor_id in STATE_CLASS_OVERRIDES:
+        return STATE_CLASS_OVERRIDES[sensor_id]
+    if device_class == "energy":
+        return "total_increasing"
+    if device_class in _MEASUREMENT_DEVICE_CLASSES or unit in _MEASUREMENT_UNITS:
+        return "measurement"
+    return None
+
+
+class SensorRegistry:
+    """Cache of SensorSpec objects keyed by what the parsers know about a row.
+
+    Known keys (``SENSOR_KEY_GROUPS``) have their names resolved up front;
+    everything else is resolved and cached on first sight. Unit and device
+    class come from the reading itself, so they are part of the cache key;
+    in practice every sensor resolves to exactly one spec.
+    """
+
+    def __init__(self) -> None:
+        self._names: Dict[Tuple[str, str], str] = {}
+        self._specs: Dict[Tuple[str, str, Optional[str], Optional[str]], SensorSpec] = {}
+        for raw_key, group in SENSOR_KEY_GROUPS.items():
+            self.name_for_key(group, SENSOR_KEY_ALIASES.get(raw_key, raw_key))
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def name_for_key(self, group: str, key: str) -> str:
+        """Internal sensor name (``friendly_name``) for a group and dotted key."""
+        cache_key = (group, key)
+        name = self._names.get(cache_key)
+        if name is None:
+            name = friendly_name(group, key)
+            self._names[cache_key] = name
+        return name
+
+    def lookup(
+        self,
+        name: str,
+        group: str = "",
+        unit: Optional[str] = None,
+        device_class: Optional[str] = None,
+    ) -> SensorSpec:
+        """Spec for a sensor by its internal name (as carried in sensor readings)."""
+        cache_key = (name, group, unit, device_class)
+        spec = self._specs.get(cache_key)
+        if spec is not None:
+            return spec
+
+        sensor_id = make_id(name)
+        device_class = DEVICE_CLASS_OVERRIDES.get(sensor_id, device_class)
+        if device_class == "energy":
+            entity_type = ENTITY_TYPE_ENERGY
+        elif sensor_id in WALLBOX_ZERO_OVERRIDE_IDS:
+            entity_type = ENTITY_TYPE_WALLBOX_POWER
+        else:
+            entity_type = ENTITY_TYPE_BASE
+
+        spec = SensorSpec(
+            sensor_id=sensor_id,
+            name=name,
+            display_name=_display_name(name, group),
+            group=group,
+            unit=unit,
+            device_class=device_class,
+            state_class=_state_class(sensor_id, unit, device_class),
+            icon=ICON_MAP.get(sensor_id),
+            entity_type=entity_type,
+        )
+        self._specs[cache_key] = spec
+        return spec
+
+    def lookup_key(
+        self,
+        group: str,
+        key: str,
+        unit: Optional[str] = None,
+        device_class: Optional[str] = None,
+    ) -> SensorSpec:
+        """Spec for a sensor by its group and dotted key (parser side)."""
+        return self.lookup(self.name_for_key(group, key), group, unit, device_class)
+
+
+_REGISTRY: Optional[SensorRegistry] = None
+
+
+def get_registry() -> SensorRegistry:
+    """Return the process-wide registry, building it on first use."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = SensorRegistry()
+        _LOGGER.debug("[Enpal] Sensor registry built (%d known keys)", len(SENSOR_KEY_GROUPS))
+    return _REGISTRY
@@ -28,10 +28,12 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import issue_registry as ir
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import (
@@ -40,12 +42,23 @@ from homeassistant.helpers.update_coordinator import (
     UpdateFailed,
 )
 
-from .entity_factory import build_sensor_entity
+from .catalog import SensorCatalog
+from .coordinator import (
+    WRITE_ORDER_DERIVED,
+    WRITE_ORDER_STATUS,
+    EnpalDataUpdateCoordinator,
+    async_write_batched,
+)
+from .discovery_cache import BoxLocator
+from .energy_integrator import INTEGRATED_METRICS, EnergyIntegrator, IntegratedMetric, sample_time
+from .entity_factory import WritePolicy, build_sensor_entity, register_dormant_sensor
+from .models import SensorSnapshot
 
 from .utils import (
     excluded_groups_from_options,
     firmware_supports_websocket,
     make_id,
+    parse_deadbands,
     parse_enpal_html_sensors
 )
 
@@ -53,12 +66,17 @@ from .api import EnpalWebSocketClient, EnpalHtmlClient, EnpalApiClient
 
 from .const import (
     DEFAULT_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    NEW_ENTITY_BATCH_DELAY,
     DEFAULT_TIMEOUT,
     DEFAULT_URL,
     DOMAIN,
     HTML_MODE_BROKEN_FIRMWARE,
+    WALLBOX_FALLBACK_POLL_INTERVAL,
     WALLBOX_MODE_SOURCE_CANDIDATES,
     WALLBOX_STATUS_SOURCE_CANDIDATES,
+    WRITE_DEADBANDS_BY_DEVICE_CLASS,
+    WRITE_DEADBANDS_BY_SENSOR,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -71,7 +89,7 @@ def _find_wallbox_source(data, configured, candidates):
     otherwise the first matching auto-detect candidate, or ``None`` if neither
     is available (e.g. older firmware that does not expose the value).
     """
-    available = {make_id(s.get("name", "")) for s in (data or [])}
+    available = {s.sensor_id for s in (data or [])}
     if configured and configured not in (None, "", "auto") and configured in available:
         return configured
     for candidate in candidates:
@@ -80,6 +98,62 @@ def _find_wallbox_source(data, configured, candidates):
     return None
 
 
+def _find_dc_power_source(data) -> str:
+    """Name of the DC power sensor the produced-energy counter integrates.
+
+    Priority: Huawei-specific, other manufacturer-specific
+    ("Inverter: Power DC Total (<Manufacturer>)"), generic, calculated.
+    Looks sensors up by id instead of scanning every name.
+    """
+    huawei = data.get("inverter_power_dc_total_huawei")
+    if huawei is not None:
+        _LOGGER.info("[Enpal] Using Huawei-specific DC power sensor: %s", huawei.name)
+        return huawei.name
+
+    for sensor_id in data.ids():
+        # Match manufacturer-specific format but exclude Calculated
+        if (sensor_id.startswith("inverter_power_dc_total_")
+                and sensor_id != "inverter_power_dc_total_calculated"):
+            name = data.get(sensor_id).name
+            _LOGGER.info("[Enpal] Found manufacturer-specific DC power sensor: %s", name)
+            return name
+
+    generic = data.get("inverter_power_dc_total")
+    if generic is not None:
+        _LOGGER.info("[Enpal] Using generic DC power sensor: %s", generic.name)
+        return generic.name
+
+    calculated = data.get("inverter_power_dc_total_calculated")
+    if calculated is not None:
+        _LOGGER.warning(
+            "[Enpal] Using calculated DC power sensor (least accurate): %s", calculated.name
+        )
+        return calculated.name
+
+    # Nothing found: use Huawei as default (the entity warns until it appears)
+    source_sensor = "Inverter: Power DC Total (Huawei)"
+    _LOGGER.warning(
+        "[Enpal] No DC power sensor found. Available power sensors: %s. Using fallback: %s",
+        ", ".join(sensor_id for sensor_id in data.ids() if "power" in sensor_id),
+        source_sensor,
+    )
+    return source_sensor
+
+
+def _deadbands_option(
+    entry: ConfigEntry, key: str, default: dict[str, tuple[float, float]]
+) -> dict[str, tuple[float, float]]:
+    """Deadband table of an option; the built-in one when unset or invalid."""
+    text = entry.options.get(key)
+    if text is None:
+        return dict(default)
+    try:
+        return parse_deadbands(text)
+    except ValueError as e:
+        _LOGGER.warning("[Enpal] Ignoring option %s: %s", key, e)
+        return dict(default)
+
+
 def _wallbox_status_issue_id(entry: ConfigEntry) -> str:
     return f"wallbox_status_source_missing_{entry.entry_id}"
 
@@ -127,7 +201,7 @@ def _manage_wallbox_status_issue(hass, entry, data, status_source) -> None:
     """
     issue_id = _wallbox_status_issue_id(entry)
     has_wallbox_sensors = any(
-        "wallbox" in make_id(s.get("name", "")) for s in (data or [])
+        "wallbox" in s.sensor_id for s in (data or [])
     )
     if status_source is None and has_wallbox_sensors:
         _LOGGER.warning(
@@ -175,6 +249,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         api_client = EnpalHtmlClient(base_url, groups=groups, excluded_groups=excluded_groups)
 
     last_successful_data = []
+    # Records the box in the discovery cache and looks for it at another
+    # address when it stops answering (DHCP lease change).
+    locator = BoxLocator(hass, entry)
+    # Sensor ids the client reported as new and that still need an entity
+    # check (see _async_add_new_sensors).
+    pending_new_ids: list[str] = []
 
     async def async_update_data():
         nonlocal last_successful_data
@@ -187,17 +267,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
             
             # Fetch data using unified interface
             result = await api_client.fetch_data()
-            sensors = result['sensors']
+            sensors = SensorSnapshot(result['sensors'])
+            pending_new_ids.extend(result.get('new_sensors', ()))
             
             _LOGGER.debug("[Enpal] Fetched %d sensors from %s", len(sensors), result['source'])
             last_successful_data = sensors
 
+            firmware_version = getattr(api_client, "firmware_version", None)
             if isinstance(api_client, EnpalHtmlClient):
-                _manage_html_mode_issue(hass, entry, api_client.firmware_version)
+                _manage_html_mode_issue(hass, entry, firmware_version)
+            locator.async_report_success(firmware_version)
 
             return sensors
 
         except Exception as e:
+            locator.async_report_failure()
             if last_successful_data:
                 _LOGGER.warning("[Enpal] Error during update, using last known good values: %s", e)
                 return last_successful_data
@@ -206,8 +290,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
                 raise UpdateFailed(f"Initial data fetch failed: {e}")
 
     # Both modes use the configured interval for polling.
-    # WebSocket additionally processes any server-pushed data between polls.
-    coordinator = DataUpdateCoordinator(
+    # WebSocket additionally processes any server-pushed data between polls,
+    # waking only the entities of the groups a push touched.
+    coordinator = EnpalDataUpdateCoordinator(
         hass,
         logger=_LOGGER,
         name="Enpal Webparser",
@@ -234,15 +319,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
             value while only ``enpal_last_update`` keeps advancing.
 
             We therefore update the data and notify listeners directly and leave
-            the scheduled full scrape intact.
+            the scheduled full scrape intact. Only the listeners of the groups
+            the push touched are woken; after a failed poll every entity has to
+            become available again, so all of them are.
             """
             nonlocal last_successful_data
-            sensors = result.get('sensors', [])
+            sensors = SensorSnapshot(result.get('sensors', []))
+            pending_new_ids.extend(result.get('new_sensors', ()))
             if sensors:
+                groups = result.get('changed_groups')
+                if not coordinator.last_update_success:
+                    groups = None
                 last_successful_data = sensors
                 coordinator.data = sensors
                 coordinator.last_update_success = True
-                coordinator.async_update_listeners()
+                coordinator.async_update_listeners(groups)
                 _LOGGER.debug(
                     "[Enpal] Push update: %d sensors received", len(sensors)
                 )
@@ -250,19 +341,49 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         api_client.set_data_callback(_on_push_data)
 
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN].setdefault("cumulative_energy_state", {
-        "value": 0.0,
-        "last_updated": datetime.now().isoformat()
-    })
 
     hass.data[DOMAIN]["coordinator"] = coordinator
 
-    await coordinator.async_config_entry_first_refresh()
-    _LOGGER.info("[Enpal] Verfügbare Sensoren nach HTML-Parsing:")
-    for sensor in coordinator.data:
-        _LOGGER.info("[Enpal]   Name: %s -> UID: %s", sensor["name"], make_id(sensor["name"]))
+    # With a stored catalog all entities are created from it right away and
+    # the live connection (scrape, negotiate, handshake, circuit start) runs
+    # in the background, so Home Assistant startup does not wait for the box.
+    catalog = SensorCatalog(hass, entry.entry_id)
+    cached = await catalog.async_load(excluded_groups)
+    if cached:
+        _LOGGER.info(
+            "[Enpal] Starting from %d cataloged sensor(s), connecting in the background",
+            len(cached),
+        )
+        # Only the entity layout comes from the catalog: its values are not
+        # "last known good", so a failed first refresh marks the entities
+        # unavailable instead of serving them as current.
+        coordinator.data = SensorSnapshot(cached)
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), "enpal_webparser_first_refresh"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
+        _LOGGER.info("[Enpal] Verfügbare Sensoren nach HTML-Parsing:")
+        for sensor in coordinator.data:
+            _LOGGER.info("[Enpal]   Name: %s -> UID: %s", sensor.name, sensor.sensor_id)
+
+    @callback
+    def _async_save_catalog() -> None:
+        if coordinator.data:
+            catalog.async_schedule_save(coordinator.data)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_save_catalog))
 
     use_wallbox = entry.options.get("use_wallbox", False)
+    write_policy = None
+    if entry.options.get("write_reduction", False):
+        write_policy = WritePolicy(
+            max_silence=entry.options.get("max_silence", DEFAULT_MAX_SILENCE),
+            by_device_class=_deadbands_option(
+                entry, "deadbands_by_device_class", WRITE_DEADBANDS_BY_DEVICE_CLASS
+            ),
+            by_sensor=_deadbands_option(entry, "deadbands_by_sensor", WRITE_DEADBANDS_BY_SENSOR),
+        )
 
     # Track which sensor unique_ids we have already created so we can add new
     # ones dynamically when they appear in later coordinator updates.  Some
@@ -271,57 +392,55 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     # were missing at startup.
     created_uids: set[str] = set()
 
-    entities = []
-    for sensor_dict in coordinator.data:
-        _LOGGER.debug("[Enpal] Adding sensor entity: %s", sensor_dict["name"])
-        created_uids.add(make_id(sensor_dict.get("name", "")))
-        entities.append(build_sensor_entity(sensor_dict, coordinator, use_wallbox=use_wallbox))
+    # Sensors of deselected groups only get a disabled registry entry; their
+    # entity is built once the user enables it (HA then reloads the entry).
+    ent_reg = er.async_get(hass)
+    dormant_ids: set[str] = set()
+    device_id = None
+
+    def _is_dormant(sensor) -> bool:
+        nonlocal device_id
+        if sensor.enabled:
+            return False
+        entity_id = ent_reg.async_get_entity_id("sensor", DOMAIN, sensor.sensor_id)
+        if entity_id is not None:
+            return ent_reg.async_get(entity_id).disabled_by is not None
+        if device_id is None:
+            device_id = dr.async_get(hass).async_get_or_create(
+                config_entry_id=entry.entry_id,
+                identifiers={(DOMAIN, "enpal_device")},
+                name="Enpal Webgerät",
+                manufacturer="Enpal",
+                model="Webparser",
+            ).id
+        register_dormant_sensor(ent_reg, entry, sensor, device_id)
+        return True
 
+    entities = []
+    for sensor in coordinator.data:
+        created_uids.add(sensor.sensor_id)
+        if _is_dormant(sensor):
+            dormant_ids.add(sensor.sensor_id)
+            continue
+        _LOGGER.debug("[Enpal] Adding sensor entity: %s", sensor.name)
+        entities.append(build_sensor_entity(
+            sensor, coordinator, use_wallbox=use_wallbox, write_policy=write_policy
+        ))
+    if dormant_ids:
+        _LOGGER.info(
+            "[Enpal] %d sensor(s) of deselected groups registered without an entity",
+            len(dormant_ids),
+        )
 
     # Create cumulative energy sensor with smart fallback for different inverter types
-    
-    source_sensor = None
-    available_sensor_names = [s.get("name", "") for s in coordinator.data]
-    
-    # Priority 1: Try Huawei-specific sensor first
-    if "Inverter: Power DC Total (Huawei)" in available_sensor_names:
-        source_sensor = "Inverter: Power DC Total (Huawei)"
-        _LOGGER.info("[Enpal] Using Huawei-specific DC power sensor: %s", source_sensor)
-    
-    # Priority 2: Try other manufacturer-specific sensors (SMA, Fronius, etc.)
-    # Look for pattern: "Inverter: Power DC Total (<Manufacturer>)"
-    if not source_sensor:
-        for name in available_sensor_names:
-            name_id = make_id(name)
-            # Match manufacturer-specific format but exclude Calculated
-            if (name_id.startswith("inverter_power_dc_total_") and 
-                name_id != "inverter_power_dc_total_calculated" and
-                name_id != "inverter_power_dc_total"):
-                source_sensor = name
-                _LOGGER.info("[Enpal] Found manufacturer-specific DC power sensor: %s", name)
-                break
-    
-    # Priority 3: Try generic "Inverter: Power DC Total"
-    if not source_sensor and "Inverter: Power DC Total" in available_sensor_names:
-        source_sensor = "Inverter: Power DC Total"
-        _LOGGER.info("[Enpal] Using generic DC power sensor: %s", source_sensor)
-    
-    # Priority 4: Last resort - use calculated sensor
-    if not source_sensor and "Inverter: Power DC Total Calculated" in available_sensor_names:
-        source_sensor = "Inverter: Power DC Total Calculated"
-        _LOGGER.warning("[Enpal] Using calculated DC power sensor (least accurate): %s", source_sensor)
-    
-    # Final fallback: If nothing found, use Huawei as default (will trigger warning)
-    if not source_sensor:
-        source_sensor = "Inverter: Power DC Total (Huawei)"
-        _LOGGER.warning(
-            "[Enpal] No DC power sensor found. Available power sensors: %s. Using fallback: %s",
-            ", ".join([make_id(n) for n in available_sensor_names if "power" in make_id(n).lower()]),
-            source_sensor
-        )
-    
-    entities.append(CumulativeEnergySensor(hass, coordinator, [source_sensor], interval))
+    source_sensor = _find_dc_power_source(coordinator.data)
+    # Sensors read by other entities must keep updating even when dormant.
+    consumed_ids = {make_id(source_sensor)}
+    consumed_ids.update(s for metric in INTEGRATED_METRICS for s in metric.sources)
+    entities.append(CumulativeEnergySensor(hass, coordinator, [source_sensor]))
     entities.append(DailyResetFromEntitySensor(hass, "sensor.inverter_energy_produced_total_dc"))
+    # Further integrated counters (grid, battery); disabled by default.
+    entities.extend(IntegratedEnergySensor(coordinator, metric) for metric in INTEGRATED_METRICS)
 
     if entry.options.get("use_wallbox", False):
         _LOGGER.info("[Enpal] Wallbox control enabled, setting up sensors")
@@ -354,6 +473,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
                 entities.append(WallboxNativeModeSensor(coordinator, mode_source))
             if status_source:
                 entities.append(WallboxNativeStatusSensor(coordinator, status_source))
+            consumed_ids.update({mode_source, status_source} - {None})
         else:
             _LOGGER.info(
                 "[Enpal] Native wallbox status not found, falling back to addon poll"
@@ -384,14 +504,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
                             _LOGGER.warning("[Enpal] Wallbox update failed - no previous data yet: %s", e)
                             raise UpdateFailed(f"Wallbox update failed and no previous data: {e}")
 
+                # Native mode: the open /wallbox circuit pushes every status
+                # change. async_set_updated_data also restarts the poll timer,
+                # so the poll only runs after WALLBOX_FALLBACK_POLL_INTERVAL
+                # without a push; it reopens a dropped circuit and reads the
+                # page over HTTP while the circuit is down.
+                poll_interval = interval
+                if data_source == "websocket":
+                    poll_interval = max(interval, WALLBOX_FALLBACK_POLL_INTERVAL)
+
                 wallbox_coordinator = DataUpdateCoordinator(
                     hass,
                     logger=_LOGGER,
                     name="Wallbox Status",
                     update_method=async_wallbox_update,
-                    update_interval=timedelta(seconds=interval),
+                    update_interval=timedelta(seconds=poll_interval),
                 )
 
+                @callback
+                def _on_wallbox_status(data: dict) -> None:
+                    nonlocal wallbox_data
+                    _LOGGER.debug("[Enpal] Wallbox status pushed: %s", data)
+                    wallbox_data = data
+                    wallbox_coordinator.async_set_updated_data(data)
+
+                wallbox_api_client.set_status_callback(_on_wallbox_status)
+                entry.async_on_unload(lambda: wallbox_api_client.set_status_callback(None))
+
                 hass.async_create_task(wallbox_coordinator.async_refresh())
 
                 entities.extend([
@@ -401,49 +540,94 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
                 _LOGGER.debug("[Enpal] Wallbox-Sensoren hinzugefügt")
 
     async_add_entities(entities)
+    api_client.set_dormant_ids(dormant_ids - consumed_ids)
+
+    # Ids reported so far mostly got their entity in the loop above.
+    pending_new_ids[:] = [uid for uid in pending_new_ids if uid not in created_uids]
+    flush_scheduled = None
 
     @callback
     def _async_add_new_sensors() -> None:
         """Add entities for sensors that appear after startup.
 
-        Enpal sensors can appear/disappear between updates.  Whenever the
-        coordinator reports a sensor we have not created an entity for yet,
-        build and register it on the fly.  Existing entities keep their last
-        value when a sensor temporarily disappears (handled in the entity).
+        Enpal sensors can appear/disappear between updates.  The API clients
+        report the ids they have not reported before (``new_sensors``), so
+        only those are checked here instead of the whole coordinator data.
+        Existing entities keep their last value when a sensor temporarily
+        disappears (handled in the entity).
+
+        On firmware 8.51 the initial render delivers the device rows over
+        several RenderBatches; new ids are therefore collected for
+        ``NEW_ENTITY_BATCH_DELAY`` seconds and added in one call.
         """
+        nonlocal flush_scheduled
+        if pending_new_ids and flush_scheduled is None:
+            flush_scheduled = async_call_later(
+                hass, NEW_ENTITY_BATCH_DELAY, _async_flush_new_sensors
+            )
+
+    @callback
+    def _async_flush_new_sensors(_now=None) -> None:
+        nonlocal flush_scheduled
+        flush_scheduled = None
+        new_ids = list(pending_new_ids)
+        pending_new_ids.clear()
         if not coordinator.data:
             return
         new_entities = []
-        for sensor_dict in coordinator.data:
-            uid = make_id(sensor_dict.get("name", ""))
-            if not uid or uid in created_uids:
+        for uid in new_ids:
+            if uid in created_uids:
+                continue
+            sensor = coordinator.data.get(uid)
+            if sensor is None:
                 continue
             created_uids.add(uid)
-            _LOGGER.info("[Enpal] New sensor appeared, adding entity: %s", sensor_dict["name"])
+            if _is_dormant(sensor):
+                dormant_ids.add(uid)
+                continue
+            _LOGGER.info("[Enpal] New sensor appeared, adding entity: %s", sensor.name)
             new_entities.append(
-                build_sensor_entity(sensor_dict, coordinator, use_wallbox=use_wallbox)
+                build_sensor_entity(
+                    sensor, coordinator, use_wallbox=use_wallbox, write_policy=write_policy
+                )
             )
         if new_entities:
             async_add_entities(new_entities)
+        api_client.set_dormant_ids(dormant_ids - consumed_ids)
+
+    @callback
+    def _async_cancel_flush() -> None:
+        if flush_scheduled is not None:
+            flush_scheduled()
 
+    entry.async_on_unload(_async_cancel_flush)
     entry.async_on_unload(coordinator.async_add_listener(_async_add_new_sensors))
+    _async_add_new_sensors()
 
 
-class CumulativeEnergySensor(SensorEntity, RestoreEntity):  
-    def __init__(self, hass: HomeAssistant, coordinator: DataUpdateCoordinator, sensor_names: list[str], interval_seconds: int):
-        self.hass = hass
-        self._attr_name = str("Inverter: Energy produced total (DC)")
-        self._attr_unique_id = str("cumulative_energy_produced_dc_kwh")
-        self._attr_device_class = SensorDeviceClass.ENERGY   
-        self._attr_state_class = "total_increasing"
-        self._attr_native_unit_of_measurement = "kWh"
-        self._attr_icon = "mdi:solar-power"
+class IntegratedEnergySensor(SensorEntity, RestoreEntity):
+    """kWh counter integrated from a coordinator power sensor.
+
+    Samples are keyed by the box timestamp (``enpal_last_update``) and
+    integrated with the trapezoidal rule, see :mod:`.energy_integrator`.
+    """
+
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = "total_increasing"
+    _attr_native_unit_of_measurement = "kWh"
+    _MISSING_SOURCE_LOG = "[Enpal] No power sensor found for %s. Tried: %s"
+
+    def __init__(self, coordinator: DataUpdateCoordinator, metric: IntegratedMetric):
+        self._attr_name = metric.name
+        self._attr_unique_id = metric.unique_id
+        self._attr_icon = metric.icon
+        self._attr_entity_registry_enabled_default = metric.enabled_default
+        self._metric = metric
         self._coordinator = coordinator
-        self._source_candidates = [make_id(name) for name in sensor_names]
+        self._source_candidates = list(metric.sources)
         self._active_source_uid = None  # Will be determined from available sensors
-        self._fallback_interval_hours = interval_seconds / 3600
-        self._last_update_time = None  # Track real elapsed time between updates
-        self._state = self.hass.data[DOMAIN]["cumulative_energy_state"]
+        self._missing_source_logged = False
+        self._integrator = EnergyIntegrator()
         self._value = None
         self._last_updated = None
 
@@ -464,62 +648,56 @@ class CumulativeEnergySensor(SensorEntity, RestoreEntity):
         if last_state and last_state.state not in (None, 'unknown', 'unavailable'):
             try:
                 self._value = float(last_state.state)
-                _LOGGER.info("[Enpal] Recovered Energy Value: %.3f kWh", self._value)
+                _LOGGER.info("[Enpal] Recovered %s: %.3f kWh", self._metric.name, self._value)
             except ValueError:
                 self._value = 0.0
         else:
             self._value = 0.0
-        self._coordinator.async_add_listener(self._handle_coordinator_update)
+        self.async_on_remove(
+            self._coordinator.async_add_listener(self._handle_coordinator_update)
+        )
 
     def _handle_coordinator_update(self):
         # If we haven't determined the active source yet, find the first available one
         if self._active_source_uid is None:
-            available_sensors = {make_id(s["name"]) for s in self._coordinator.data}
             for candidate in self._source_candidates:
-                if candidate in available_sensors:
+                if self._coordinator.data.get(candidate) is not None:
                     self._active_source_uid = candidate
-                    _LOGGER.info("[Enpal] Using DC power sensor: %s", candidate)
+                    _LOGGER.info("[Enpal] Integrating %s from: %s", self._metric.name, candidate)
                     break
-            
+
             if self._active_source_uid is None:
-                _LOGGER.warning(
-                    "[Enpal] No suitable DC power sensor found. Tried: %s",
-                    ", ".join(self._source_candidates)
-                )
-                self.async_write_ha_state()
+                if not self._missing_source_logged:
+                    self._missing_source_logged = True
+                    _LOGGER.warning(
+                        self._MISSING_SOURCE_LOG,
+                        self._metric.name,
+                        ", ".join(self._source_candidates),
+                    )
+                async_write_batched(self._coordinator, self.async_write_ha_state, WRITE_ORDER_DERIVED)
                 return
-        
-        # Now process the update with the active source
-        now = datetime.now()
-        for sensor in self._coordinator.data:
-            if make_id(sensor["name"]) == self._active_source_uid:
-                try:
-                    power_watt = float(sensor["value"])
-
-                    # Use actual elapsed time between updates instead of
-                    # the configured interval.  In WebSocket mode, push
-                    # updates can arrive much more frequently than the
-                    # polling interval, which would otherwise multiply
-                    # the energy by the wrong factor.
-                    if self._last_update_time is not None:
-                        elapsed_hours = (now - self._last_update_time).total_seconds() / 3600
-                    else:
-                        # First update after start/restore — use the
-                        # configured interval as a reasonable fallback.
-                        elapsed_hours = self._fallback_interval_hours
-
-                    energy_kwh = power_watt * elapsed_hours / 1000
-                    if self._value is None:
-                        self._value = 0.0
-                    self._value += energy_kwh
-                    self._last_update_time = now
-                    self._last_updated = now.isoformat()
-                    _LOGGER.debug("[Enpal] +%.5f kWh (%.1fs elapsed) -> Total: %.3f kWh",
-                                  energy_kwh, elapsed_hours * 3600, self._value)
-                except Exception as e:
-                    _LOGGER.warning("[Enpal] Error in energy calculation: %s", e)
-                break
-        self.async_write_ha_state()
+
+        sensor = self._coordinator.data.get(self._active_source_uid)
+        if sensor is None:
+            return
+        power_watt = sensor.numeric
+        if power_watt is None:
+            _LOGGER.warning(
+                "[Enpal] Error in energy calculation: non-numeric power value %r", sensor.value
+            )
+            return
+        # Re-deliveries of the same box sample add nothing, so a push storm
+        # cannot over-count and a slow poll cannot under-count.
+        energy_kwh = self._integrator.add(sample_time(sensor), self._metric.power(power_watt))
+        if not energy_kwh and self._last_updated is not None:
+            return
+        if self._value is None:
+            self._value = 0.0
+        self._value += energy_kwh
+        self._last_updated = self._integrator.last_time.isoformat()
+        _LOGGER.debug("[Enpal] %s +%.5f kWh -> Total: %.3f kWh",
+                      self._metric.name, energy_kwh, self._value)
+        async_write_batched(self._coordinator, self.async_write_ha_state, WRITE_ORDER_DERIVED)
 
     @cached_property
     def device_info(self) -> DeviceInfo:
@@ -530,6 +708,26 @@ class CumulativeEnergySensor(SensorEntity, RestoreEntity):
             model="Webparser",
         )
 
+
+class CumulativeEnergySensor(IntegratedEnergySensor):
+    """DC production energy, integrated from the selected DC power sensor."""
+
+    _MISSING_SOURCE_LOG = "[Enpal] No suitable DC power sensor found (%s). Tried: %s"
+
+    def __init__(self, hass: HomeAssistant, coordinator: DataUpdateCoordinator, sensor_names: list[str]):
+        self.hass = hass
+        super().__init__(
+            coordinator,
+            IntegratedMetric(
+                name="Inverter: Energy produced total (DC)",
+                unique_id="cumulative_energy_produced_dc_kwh",
+                sources=tuple(make_id(name) for name in sensor_names),
+                icon="mdi:solar-power",
+                enabled_default=True,
+            ),
+        )
+
+
 class DailyResetFromEntitySensor(SensorEntity, RestoreEntity):  
     def __init__(self, hass: HomeAssistant, source_entity_id: str):
         self.hass = hass
@@ -668,13 +866,18 @@ class WallboxNativeSensor(CoordinatorEntity, SensorEntity):
 
     @property
     def native_value(self) -> StateType:
-        for sensor in (self.coordinator.data or []):
-            if make_id(sensor.get("name", "")) == self._source_key:
-                value = sensor.get("value")
-                if value is not None and self._lower:
-                    return str(value).lower()
-                return value
-        return None
+        sensor = self.coordinator.data.get(self._source_key) if self.coordinator.data else None
+        if sensor is None:
+            return None
+        value = sensor.value
+        if value is not None and self._lower:
+            return str(value).lower()
+        return value
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # Written before the wallbox power sensors, which read this state.
+        async_write_batched(self.coordinator, self.async_write_ha_state, WRITE_ORDER_STATUS)
 
 
 class WallboxNativeModeSensor(WallboxNativeSensor):
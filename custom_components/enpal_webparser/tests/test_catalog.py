@@ -0,0 +1,93 @@
+"""Tests for the persisted sensor catalog."""
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.enpal_webparser.catalog import SensorCatalog
+from custom_components.enpal_webparser.models import SensorReading, SensorSnapshot
+
+
+class _MemoryStore:
+    """In-memory stand-in for homeassistant.helpers.storage.Store."""
+
+    def __init__(self, data=None):
+        self.data = data
+        self.pending = None
+        self.delayed_saves = 0
+
+    async def async_load(self):
+        return self.data
+
+    def async_delay_save(self, data_func, delay=0):
+        self.pending = data_func
+        self.delayed_saves += 1
+
+    def flush(self):
+        self.data, self.pending = self.pending(), None
+
+
+def _catalog(store):
+    catalog = SensorCatalog(MagicMock(), "entry")
+    catalog._store = store
+    return catalog
+
+
+@pytest.mark.asyncio
+async def test_catalog_round_trip_keeps_ids_and_values():
+    readings = [
+        SensorReading.create(
+            "Battery: Voltage", "53.1", unit="V", device_class="voltage",
+            group="Battery", enpal_last_update="2026-07-31T06:38:38+00:00",
+        ),
+        SensorReading.create(
+            "PowerSensor: Power Grid Net", "-4177.0", unit="W",
+            group="PowerSensor", derived=True,
+        ),
+        SensorReading.create(
+            "Inverter: State Running", "on", group="Inverter",
+            raw_key="Inverter.System.State", sensor_id="inverter_system_state_running",
+        ),
+    ]
+    store = _MemoryStore()
+    _catalog(store).async_schedule_save(SensorSnapshot(readings))
+    store.flush()
+
+    loaded = await _catalog(store).async_load()
+    assert loaded == readings
+
+
+@pytest.mark.asyncio
+async def test_catalog_follows_current_group_selection():
+    store = _MemoryStore()
+    _catalog(store).async_schedule_save([
+        SensorReading.create("Heatpump: Power", "100", group="Heatpump", enabled=False),
+        SensorReading.create("Battery: Voltage", "53", group="Battery"),
+    ])
+    store.flush()
+
+    loaded = await _catalog(store).async_load(excluded_groups=["Battery"])
+    assert [(r.group, r.enabled) for r in loaded] == [("Heatpump", True), ("Battery", False)]
+
+
+def test_saves_are_coalesced_until_written():
+    store = _MemoryStore()
+    catalog = _catalog(store)
+    first = [SensorReading.create("Battery: Voltage", "53", group="Battery")]
+    latest = [SensorReading.create("Battery: Voltage", "54", group="Battery")]
+
+    catalog.async_schedule_save(first)
+    catalog.async_schedule_save(latest)
+    assert store.delayed_saves == 1
+    store.flush()
+    assert store.data["sensors"][0]["value"] == "54"
+
+    catalog.async_schedule_save(first)
+    assert store.delayed_saves == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_or_foreign_data_loads_empty():
+    assert await _catalog(_MemoryStore()).async_load() == []
+    assert await _catalog(_MemoryStore(["not", "a", "catalog"])).async_load() == []
+    loaded = await _catalog(_MemoryStore({"sensors": [{"value": "1"}, "x"]})).async_load()
+    assert loaded == []
@@ -0,0 +1,185 @@
+"""Tests for the one-shot box probe of the config and options flow."""
+import asyncio
+from collections import Counter
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import aiohttp
+from aiohttp import web
+import pytest
+
+from custom_components.enpal_webparser import config_flow
+from custom_components.enpal_webparser.config_flow import (
+    BoxProbe,
+    EnpalConfigFlow,
+    async_get_box_probe,
+    get_wallbox_source_options,
+    probe_and_resolve_data_source,
+    process_user_input,
+)
+from custom_components.enpal_webparser.discovery import EnpalProbe
+
+FIXTURES = Path(__file__).parent / "fixtures"
+NEGOTIATE = {
+    "negotiateVersion": 1,
+    "connectionToken": "token",
+    "availableTransports": [{"transport": "WebSockets", "transferFormats": ["Text", "Binary"]}],
+}
+
+
+async def _serve(page: str, requests: Counter, negotiate=NEGOTIATE):
+    async def device_messages(request):
+        requests["page"] += 1
+        return web.Response(text=(FIXTURES / page).read_text(encoding="utf-8"))
+
+    async def negotiate_handler(request):
+        requests["negotiate"] += 1
+        return web.json_response(negotiate)
+
+    app = web.Application()
+    app.router.add_get("/deviceMessages", device_messages)
+    app.router.add_post("/_blazor/negotiate", negotiate_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/deviceMessages"
+
+
+def _hass():
+    hass = MagicMock()
+    loop = asyncio.get_running_loop()
+    hass.async_add_executor_job = lambda func, *args: loop.run_in_executor(None, func, *args)
+    return hass
+
+
+async def _probe_twice(page, negotiate=NEGOTIATE):
+    requests = Counter()
+    runner, url = await _serve(page, requests, negotiate)
+    cache = {}
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch.object(config_flow, "async_get_clientsession", return_value=session):
+                hass = _hass()
+                probe = await async_get_box_probe(hass, url, cache)
+                assert await async_get_box_probe(hass, url, cache) is probe
+    finally:
+        await runner.cleanup()
+    return probe, requests
+
+
+@pytest.mark.asyncio
+async def test_blazor_page_is_fetched_once_and_negotiated():
+    probe, requests = await _probe_twice("deviceMessages.html")
+    assert (probe.reachable, probe.firmware_version, probe.blazor, probe.websocket) == (
+        True, "8.46.4", True, True
+    )
+    assert requests == {"page": 1, "negotiate": 1}
+
+
+@pytest.mark.asyncio
+async def test_page_without_blazor_skips_the_negotiate():
+    probe, requests = await _probe_twice("deviceMessages_wallbox_850.html")
+    assert (probe.blazor, probe.websocket) == (False, False)
+    assert "auto" in probe.wallbox_sources and len(probe.wallbox_sources) > 1
+    assert requests == {"page": 1}
+
+
+@pytest.mark.asyncio
+async def test_negotiate_without_websockets_transport():
+    negotiate = {**NEGOTIATE, "availableTransports": [{"transport": "LongPolling"}]}
+    probe, _ = await _probe_twice("deviceMessages.html", negotiate)
+    assert (probe.blazor, probe.websocket) == (True, False)
+
+
+@pytest.mark.asyncio
+async def test_unreachable_box_is_not_cached():
+    cache = {}
+    with patch.object(config_flow, "probe_box", side_effect=[BoxProbe(), BoxProbe(True)]) as probe_box:
+        assert not (await async_get_box_probe(MagicMock(), "http://box/deviceMessages", cache)).reachable
+        assert (await async_get_box_probe(MagicMock(), "http://box/deviceMessages", cache)).reachable
+    assert probe_box.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_addon_check_runs_alongside_and_only_counts_for_html():
+    started, cancelled = asyncio.Event(), []
+
+    async def slow_addon(hass):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return True
+
+    async def websocket_box():
+        await started.wait()  # the addon check is already running
+        return BoxProbe(True, websocket=True)
+
+    with patch.object(config_flow, "validate_wallbox_api", slow_addon):
+        _, data_source, errors = await probe_and_resolve_data_source(
+            MagicMock(), websocket_box(), "auto", True
+        )
+        await asyncio.sleep(0)
+    assert (data_source, errors, cancelled) == ("websocket", {}, [True])
+
+    async def no_addon(hass):
+        return False
+
+    async def html_box():
+        return BoxProbe(True)
+
+    with patch.object(config_flow, "validate_wallbox_api", no_addon):
+        _, data_source, errors = await probe_and_resolve_data_source(
+            MagicMock(), html_box(), "websocket", True
+        )
+    assert (data_source, errors) == ("html", {"use_wallbox": "wallbox_unreachable"})
+
+
+@pytest.mark.asyncio
+async def test_repair_source_options_do_not_negotiate():
+    requests = Counter()
+    runner, url = await _serve("deviceMessages_wallbox_850.html", requests)
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch.object(config_flow, "async_get_clientsession", return_value=session):
+                sources = await get_wallbox_source_options(MagicMock(), url)
+    finally:
+        await runner.cleanup()
+    assert len(sources) > 1
+    assert requests == {"page": 1}
+
+
+@pytest.mark.parametrize(("firmware", "shortcut"), [("8.47.1", True), ("8.51.3", False), (None, False)])
+@pytest.mark.asyncio
+async def test_discovered_box_skips_the_negotiate_only_on_old_firmware(firmware, shortcut):
+    """A discovered page without Blazor marker skips the negotiate only on old firmware."""
+    url = "http://192.168.1.20/deviceMessages"
+    flow = EnpalConfigFlow()
+    flow.hass = MagicMock()
+    flow.hass.config.language = "en"
+    flow.async_show_form = MagicMock()
+    flow._probes = {url: EnpalProbe(url, firmware, False)}
+
+    await flow.async_step_configure({"url": url})
+
+    assert (url in flow._box_probes) is shortcut
+
+
+@pytest.mark.asyncio
+async def test_options_reject_malformed_deadbands_before_probing():
+    """A bad deadband text is a form error; the box is not contacted."""
+    user_input = {
+        "url": "http://192.168.1.5/deviceMessages",
+        "interval": 60,
+        "deadbands_by_device_class": "power=10:0.02",
+        "deadbands_by_sensor": "site_data_self_consumption_ratio=-1",
+    }
+    with patch.object(config_flow, "async_get_box_probe") as get_probe:
+        result, errors = await process_user_input(_hass(), user_input)
+    assert result is None
+    assert errors == {"deadbands_by_sensor": "invalid_deadbands"}
+    get_probe.assert_not_called()
@@ -0,0 +1,163 @@
+"""Tests for the per-group listener buckets and batched writes of the coordinator."""
+import asyncio
+import logging
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.enpal_webparser.api.websocket_client import EnpalWebSocketClient
+from custom_components.enpal_webparser.const import DEFAULT_GROUPS
+from custom_components.enpal_webparser import coordinator as coordinator_module
+from custom_components.enpal_webparser.coordinator import (
+    WRITE_ORDER_DERIVED,
+    WRITE_ORDER_STATUS,
+    EnpalDataUpdateCoordinator,
+)
+from custom_components.enpal_webparser.entity_factory import build_sensor_entity
+from custom_components.enpal_webparser.models import SensorReading
+
+
+def _coordinator(hass=None):
+    return EnpalDataUpdateCoordinator(
+        hass or MagicMock(), logging.getLogger(__name__), name="test", update_interval=None
+    )
+
+
+def _recorder(coordinator, calls, context):
+    return coordinator.async_add_listener(lambda: calls.append(context), context)
+
+
+def test_update_wakes_only_touched_groups_and_groupless_listeners():
+    coordinator = _coordinator()
+    calls = []
+    _recorder(coordinator, calls, "Battery")
+    _recorder(coordinator, calls, "Inverter")
+    _recorder(coordinator, calls, None)
+
+    coordinator.async_update_listeners({"Battery"})
+    assert sorted(calls, key=str) == ["Battery", None]
+
+    calls.clear()
+    coordinator.async_update_listeners(set())
+    assert calls == [None]
+
+    calls.clear()
+    coordinator.async_update_listeners()
+    assert sorted(calls, key=str) == ["Battery", "Inverter", None]
+
+
+def test_removed_listener_leaves_its_bucket():
+    coordinator = _coordinator()
+    calls = []
+    remove = _recorder(coordinator, calls, "Battery")
+    remove()
+
+    coordinator.async_update_listeners({"Battery"})
+    coordinator.async_update_listeners()
+    assert calls == []
+    assert not coordinator._listeners
+
+
+def test_entities_register_with_their_group():
+    reading = SensorReading.create("Battery: Voltage", "53", unit="V", group="Battery")
+    entity = build_sensor_entity(reading, _coordinator())
+    assert entity.coordinator_context == "Battery"
+
+
+@pytest.mark.asyncio
+async def test_websocket_push_reports_changed_groups():
+    client = EnpalWebSocketClient("http://box.local", groups=list(DEFAULT_GROUPS))
+    client._set_baseline([])
+    pushed = []
+
+    async def _callback(result):
+        pushed.append(result["changed_groups"])
+
+    client.set_data_callback(_callback)
+    await client._push()  # fresh baseline: every group
+
+    client._apply_diff([
+        {"key": "Voltage.Battery", "value": "53.1", "unit": "V",
+         "timestamp": "06:38:38.87"},
+    ])
+    await client._push()
+    await client._push()  # nothing changed in between
+
+    client._apply_diff([
+        {"key": "Power.AC.Phase.A", "value": "476", "unit": "W",
+         "timestamp": "06:38:38.87"},
+        {"key": "Voltage.Phase.A", "value": "231.3", "unit": "V",
+         "timestamp": "06:35:39.90"},
+    ])
+    await client._push()
+
+    assert pushed[0] is None
+    assert pushed[1] == {"Battery"}
+    assert pushed[2] == frozenset()
+    # The derived phase current lives in the same group as its inputs.
+    assert pushed[3] == {"PowerSensor"}
+
+
+class _Writer:
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def write(self):
+        self.log.append(self.name)
+
+    def handle_update(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_writes_of_one_notification_flush_once_in_order():
+    coordinator = _coordinator(MagicMock(loop=asyncio.get_running_loop()))
+    log = []
+    power = _Writer("wallbox power", log)
+    status = _Writer("wallbox status", log)
+    battery = _Writer("battery", log)
+
+    def _notify():
+        coordinator.async_schedule_write(power.write, WRITE_ORDER_DERIVED)
+        coordinator.async_schedule_write(status.write, WRITE_ORDER_STATUS)
+        coordinator.async_schedule_write(battery.write)
+        coordinator.async_schedule_write(battery.write)
+
+    coordinator.async_add_listener(_notify)
+    coordinator.async_update_listeners()
+    assert log == []  # nothing written inside the notification
+
+    await asyncio.sleep(0)
+    assert log == ["battery", "wallbox status", "wallbox power"]
+
+
+@pytest.mark.asyncio
+async def test_removed_entity_drops_its_queued_write():
+    coordinator = _coordinator(MagicMock(loop=asyncio.get_running_loop()))
+    log = []
+    kept, removed = _Writer("kept", log), _Writer("removed", log)
+    coordinator.async_add_listener(kept.handle_update)
+    remove = coordinator.async_add_listener(removed.handle_update)
+
+    coordinator.async_schedule_write(kept.write)
+    coordinator.async_schedule_write(removed.write)
+    remove()
+    await asyncio.sleep(0)
+    assert log == ["kept"]
+
+
+@pytest.mark.asyncio
+async def test_large_flush_yields_between_chunks(monkeypatch):
+    monkeypatch.setattr(coordinator_module, "WRITE_FLUSH_CHUNK", 2)
+    coordinator = _coordinator(MagicMock(loop=asyncio.get_running_loop()))
+    log = []
+    writers = [_Writer(i, log) for i in range(5)]
+    for writer in writers:
+        coordinator.async_schedule_write(writer.write)
+
+    await asyncio.sleep(0)
+    assert log == [0, 1]
+    for _ in range(2):
+        await asyncio.sleep(0)
+    assert log == [0, 1, 2, 3, 4]
@@ -1,6 +1,7 @@
 """Test calculated current sensors for PowerSensor."""
 import pytest
-from custom_components.enpal_webparser.utils import add_calculated_current_sensors
+from custom_components.enpal_webparser.models import SensorReading
+from custom_components.enpal_webparser.derived import CURRENT_METRICS, apply_derived_sensors
 
 
 def test_calculate_current_sensors():
@@ -61,15 +62,15 @@ def test_calculate_current_sensors():
         },
     ]
     
-    result = add_calculated_current_sensors(sensors)
+    result = apply_derived_sensors([SensorReading.from_dict(s) for s in sensors], CURRENT_METRICS)
     
     # Should have original 6 sensors + 3 calculated current sensors
     assert len(result) == 9
     
     # Find calculated current sensors by name
-    current_a = next((s for s in result if "Current Phase (A)" in s["name"]), None)
-    current_b = next((s for s in result if "Current Phase (B)" in s["name"]), None)
-    current_c = next((s for s in result if "Current Phase (C)" in s["name"]), None)
+    current_a = next((s for s in result if "Current Phase (A)" in s.name), None)
+    current_b = next((s for s in result if "Current Phase (B)" in s.name), None)
+    current_c = next((s for s in result if "Current Phase (C)" in s.name), None)
     
     assert current_a is not None, "Current sensor for phase A not found"
     assert current_b is not None, "Current sensor for phase B not found"
@@ -77,18 +78,18 @@ def test_calculate_current_sensors():
     
     # Check calculated values (I = P / U)
     # Phase A: -61 / 231.1 = -0.26A
-    assert float(current_a["value"]) == pytest.approx(-0.26, abs=0.01)
-    assert current_a["unit"] == "A"
-    assert current_a["device_class"] == "current"
-    assert current_a["group"] == "PowerSensor"
+    assert float(current_a.value) == pytest.approx(-0.26, abs=0.01)
+    assert current_a.unit == "A"
+    assert current_a.device_class == "current"
+    assert current_a.group == "PowerSensor"
     
     # Phase B: -19 / 230.1 = -0.08A
-    assert float(current_b["value"]) == pytest.approx(-0.08, abs=0.01)
-    assert current_b["unit"] == "A"
+    assert float(current_b.value) == pytest.approx(-0.08, abs=0.01)
+    assert current_b.unit == "A"
     
     # Phase C: 77 / 230.3 = 0.33A
-    assert float(current_c["value"]) == pytest.approx(0.33, abs=0.01)
-    assert current_c["unit"] == "A"
+    assert float(current_c.value) == pytest.approx(0.33, abs=0.01)
+    assert current_c.unit == "A"
 
 
 def test_calculate_current_sensors_missing_voltage():
@@ -105,11 +106,11 @@ def test_calculate_current_sensors_missing_voltage():
         # Missing voltage sensor for phase A
     ]
     
-    result = add_calculated_current_sensors(sensors)
+    result = apply_derived_sensors([SensorReading.from_dict(s) for s in sensors], CURRENT_METRICS)
     
     # Should have only the original sensor (no current calculated)
     assert len(result) == 1
-    assert "Power AC Phase (A)" in result[0]["name"]
+    assert "Power AC Phase (A)" in result[0].name
 
 
 def test_calculate_current_sensors_zero_voltage():
@@ -133,11 +134,11 @@ def test_calculate_current_sensors_zero_voltage():
         },
     ]
     
-    result = add_calculated_current_sensors(sensors)
+    result = apply_derived_sensors([SensorReading.from_dict(s) for s in sensors], CURRENT_METRICS)
     
     # Should have only the original sensors (no current calculated due to zero voltage)
     assert len(result) == 2
-    assert not any("Current Phase (A)" in s["name"] for s in result)
+    assert not any("Current Phase (A)" in s.name for s in result)
 
 
 def test_calculate_current_sensors_non_powersensor_group():
@@ -161,11 +162,11 @@ def test_calculate_current_sensors_non_powersensor_group():
         },
     ]
     
-    result = add_calculated_current_sensors(sensors)
+    result = apply_derived_sensors([SensorReading.from_dict(s) for s in sensors], CURRENT_METRICS)
     
     # Should have only the original sensors (no calculation for non-PowerSensor group)
     assert len(result) == 2
-    assert not any("Current Phase" in s["name"] for s in result)
+    assert not any("Current Phase" in s.name for s in result)
 
 
 def test_calculate_current_sensors_already_provided():
@@ -248,19 +249,19 @@ def test_calculate_current_sensors_already_provided():
         },
     ]
     
-    result = add_calculated_current_sensors(sensors)
+    result = apply_derived_sensors([SensorReading.from_dict(s) for s in sensors], CURRENT_METRICS)
     
     # Should have exactly 9 sensors (no duplicates added)
     assert len(result) == 9
     
     # Find current sensors
-    current_sensors = [s for s in result if "Current Phase" in s["name"]]
+    current_sensors = [s for s in result if "Current Phase" in s.name]
     assert len(current_sensors) == 3
     
     # Verify these are the ORIGINAL sensors (not calculated)
     # The original values should be preserved (1.5, 1.2, 1.8 A)
-    current_a = next(s for s in current_sensors if "Phase (A)" in s["name"])
-    assert float(current_a["value"]) == 1.5
+    current_a = next(s for s in current_sensors if "Phase (A)" in s.name)
+    assert float(current_a.value) == 1.5
 
 
 def test_calculate_current_sensors_partial_provided():
@@ -326,21 +327,21 @@ def test_calculate_current_sensors_partial_provided():
         },
     ]
     
-    result = add_calculated_current_sensors(sensors)
+    result = apply_derived_sensors([SensorReading.from_dict(s) for s in sensors], CURRENT_METRICS)
     
     # Should have 7 original + 2 calculated (B and C) = 9 sensors
     assert len(result) == 9
     
     # Find all current sensors
-    current_sensors = [s for s in result if "Current Phase" in s["name"]]
+    current_sensors = [s for s in result if "Current Phase" in s.name]
     assert len(current_sensors) == 3
     
     # Phase A should be the original (1.5 A)
-    current_a = next(s for s in current_sensors if "Phase (A)" in s["name"])
-    assert float(current_a["value"]) == 1.5
+    current_a = next(s for s in current_sensors if "Phase (A)" in s.name)
+    assert float(current_a.value) == 1.5
     
     # Phase B and C should be calculated
-    current_b = next(s for s in current_sensors if "Phase (B)" in s["name"])
-    current_c = next(s for s in current_sensors if "Phase (C)" in s["name"])
-    assert float(current_b["value"]) == pytest.approx(-0.08, abs=0.01)
-    assert float(current_c["value"]) == pytest.approx(0.33, abs=0.01)
+    current_b = next(s for s in current_sensors if "Phase (B)" in s.name)
+    current_c = next(s for s in current_sensors if "Phase (C)" in s.name)
+    assert float(current_b.value) == pytest.approx(-0.08, abs=0.01)
+    assert float(current_c.value) == pytest.approx(0.33, abs=0.01)
@@ -0,0 +1,186 @@
+"""Tests for the derived-sensor engine (phase currents, net grid power, ...)."""
+import pytest
+
+from custom_components.enpal_webparser.api.websocket_client import EnpalWebSocketClient
+from custom_components.enpal_webparser.const import DEFAULT_GROUPS
+from custom_components.enpal_webparser.derived import (
+    DERIVED_METRICS,
+    DerivedGraph,
+    DerivedMetric,
+    DerivedSensorEngine,
+)
+from custom_components.enpal_webparser.models import SensorReading
+from custom_components.enpal_webparser.utils import parse_enpal_html_sensors
+
+
+def _sensor(name, value, unit, group, ts="2026-07-31T06:38:38"):
+    return SensorReading.create(name, value, unit=unit, group=group, enpal_last_update=ts)
+
+
+def _by_id(sensors):
+    return {s.sensor_id: s for s in sensors}
+
+
+def _power_sensor_inputs():
+    return [
+        _sensor("PowerSensor: Power AC Phase (A)", "-218", "W", "PowerSensor"),
+        _sensor("PowerSensor: Power AC Phase (B)", "476", "W", "PowerSensor"),
+        _sensor("PowerSensor: Power AC Phase (C)", "-223", "W", "PowerSensor"),
+        _sensor("PowerSensor: Voltage Phase (A)", "231.8", "V", "PowerSensor"),
+        _sensor("PowerSensor: Voltage Phase (B)", "231.3", "V", "PowerSensor"),
+        _sensor("PowerSensor: Voltage Phase (C)", "231.3", "V", "PowerSensor"),
+        _sensor("Inverter: Power DC Total", "787.7", "W", "Inverter"),
+    ]
+
+
+def test_graph_orders_chained_metrics_after_their_inputs():
+    graph = DerivedGraph(DERIVED_METRICS)
+    order = [m.sensor_id for m in graph.order]
+    assert order.index("powersensor_power_grid_net") < order.index(
+        "site_data_self_consumption_ratio"
+    )
+    # A phase power feeds the current, the net power and (through it) the ratio.
+    assert graph.affected(["powersensor_power_ac_phase_a"]) == {
+        "powersensor_current_phase_a",
+        "powersensor_power_grid_net",
+        "site_data_self_consumption_ratio",
+    }
+    assert graph.affected(["powersensor_voltage_phase_b"]) == {"powersensor_current_phase_b"}
+
+
+def test_graph_rejects_cycles():
+    a = DerivedMetric("X: A", "X", None, None, (("x_b",),), lambda v: v)
+    b = DerivedMetric("X: B", "X", None, None, (("x_a",),), lambda v: v)
+    with pytest.raises(ValueError):
+        DerivedGraph((a, b))
+
+
+def test_full_pass_on_real_html(real_html):
+    sensors = _by_id(parse_enpal_html_sensors(real_html, DEFAULT_GROUPS))
+
+    # -1421 - 1319 - 1437: exporting, matches the box's own calculated value.
+    assert sensors["powersensor_power_grid_net"].value == "-4177.0"
+    assert sensors["powersensor_power_grid_net"].derived is True
+    # 4768 W produced, 4177 W exported.
+    assert sensors["site_data_self_consumption_ratio"].numeric == pytest.approx(12.4, abs=0.1)
+    # 10.74 kWh charged, 7.7 kWh discharged.
+    assert sensors["energy_battery_net_day"].numeric == pytest.approx(3.04)
+    # This firmware still reports the phase currents itself.
+    assert sensors["powersensor_current_phase_a"].value == "-6.21"
+    assert sensors["powersensor_current_phase_a"].derived is False
+
+
+def test_battery_net_flow_uses_firmware_851_names(real_html_851):
+    sensors = _by_id(parse_enpal_html_sensors(real_html_851, DEFAULT_GROUPS))
+    # Inverter: 0.2 kWh charged, 3.02 kWh discharged.
+    assert sensors["energy_battery_net_day"].numeric == pytest.approx(-2.82)
+
+
+def test_sign_conventions():
+    """Positive grid power is import, positive battery net flow is charging."""
+    sensors = _by_id(DerivedSensorEngine().apply([
+        _sensor("PowerSensor: Power AC Phase (A)", "1000", "W", "PowerSensor"),
+        _sensor("PowerSensor: Power AC Phase (B)", "-500", "W", "PowerSensor"),
+        _sensor("PowerSensor: Power AC Phase (C)", "-2500", "W", "PowerSensor"),
+        _sensor("Inverter: Power DC Total", "5000", "W", "Inverter"),
+        _sensor("Energy Battery Charge Day", "3", "kWh", "Battery"),
+        _sensor("Energy Battery Discharge Day", "5", "kWh", "Battery"),
+    ]))
+    # 2000 W net export: 3000 of the 5000 W produced are used on site.
+    assert sensors["powersensor_power_grid_net"].value == "-2000.0"
+    assert sensors["site_data_self_consumption_ratio"].value == "60.0"
+    assert sensors["energy_battery_net_day"].value == "-2.0"
+
+    sensors = _by_id(DerivedSensorEngine().apply([
+        _sensor("PowerSensor: Power AC Phase (A)", "1000", "W", "PowerSensor"),
+        _sensor("PowerSensor: Power AC Phase (B)", "500", "W", "PowerSensor"),
+        _sensor("PowerSensor: Power AC Phase (C)", "0", "W", "PowerSensor"),
+        _sensor("Inverter: Power DC Total", "800", "W", "Inverter"),
+        _sensor("Energy Battery Charge Day", "4.5", "kWh", "Battery"),
+        _sensor("Energy Battery Discharge Day", "1", "kWh", "Battery"),
+    ]))
+    # Importing: the whole production is used on site.
+    assert sensors["powersensor_power_grid_net"].value == "1500.0"
+    assert sensors["site_data_self_consumption_ratio"].value == "100.0"
+    assert sensors["energy_battery_net_day"].value == "3.5"
+
+
+def test_new_outputs_are_disabled_by_default():
+    sensors = _by_id(DerivedSensorEngine().apply(_power_sensor_inputs()))
+    assert sensors["powersensor_current_phase_a"].enabled is True
+    assert sensors["powersensor_power_grid_net"].enabled is False
+    assert sensors["site_data_self_consumption_ratio"].enabled is False
+
+
+def test_update_recomputes_only_affected_outputs():
+    sensors = _power_sensor_inputs()
+    engine = DerivedSensorEngine()
+    engine.apply(sensors)
+    before = _by_id(sensors)
+
+    voltage_a = before["powersensor_voltage_phase_a"].replace(value="200")
+    sensors[sensors.index(before["powersensor_voltage_phase_a"])] = voltage_a
+    written = engine.update({"powersensor_voltage_phase_a": voltage_a})
+
+    after = _by_id(sensors)
+    assert written == ["powersensor_current_phase_a"]
+    assert after["powersensor_current_phase_a"].value == "-1.09"
+    # Untouched outputs keep the very same reading object.
+    assert after["powersensor_current_phase_b"] is before["powersensor_current_phase_b"]
+    assert after["site_data_self_consumption_ratio"] is before["site_data_self_consumption_ratio"]
+
+
+def test_update_propagates_through_chained_outputs():
+    sensors = _power_sensor_inputs()
+    engine = DerivedSensorEngine()
+    engine.apply(sensors)
+    power_b = _by_id(sensors)["powersensor_power_ac_phase_b"]
+    sensors[sensors.index(power_b)] = power_b = power_b.replace(value="-300")
+    written = engine.update({"powersensor_power_ac_phase_b": power_b})
+
+    by_id = _by_id(sensors)
+    assert set(written) == {
+        "powersensor_current_phase_b",
+        "powersensor_power_grid_net",
+        "site_data_self_consumption_ratio",
+    }
+    # -218 - 300 - 223 = -741 W exported out of 787.7 W produced.
+    assert by_id["powersensor_power_grid_net"].value == "-741.0"
+    assert by_id["site_data_self_consumption_ratio"].value == "5.9"
+
+
+def test_box_provided_output_is_not_overwritten():
+    sensors = _power_sensor_inputs()
+    sensors.append(_sensor("PowerSensor: Power Grid Net", "-1", "W", "PowerSensor"))
+    engine = DerivedSensorEngine()
+    engine.apply(sensors)
+    power_a = _by_id(sensors)["powersensor_power_ac_phase_a"]
+    sensors[sensors.index(power_a)] = power_a = power_a.replace(value="100")
+    engine.update({"powersensor_power_ac_phase_a": power_a})
+
+    grid_net = _by_id(sensors)["powersensor_power_grid_net"]
+    assert grid_net.value == "-1"
+    assert grid_net.derived is False
+
+
+def test_websocket_diff_creates_and_updates_phase_current():
+    client = EnpalWebSocketClient("http://box.local", groups=list(DEFAULT_GROUPS))
+    client._set_baseline([])
+
+    client._apply_diff([
+        {"key": "Power.AC.Phase.A", "value": "476", "unit": "W",
+         "timestamp": "06:38:38.87"},
+        {"key": "Voltage.Phase.A", "value": "231.3", "unit": "V",
+         "timestamp": "06:35:39.90"},
+    ])
+    current = _by_id(client._baseline)["powersensor_current_phase_a"]
+    assert current.value == "2.06"
+    assert current.enpal_last_update.endswith("T06:38:38.870000+00:00")
+
+    client._apply_diff([
+        {"key": "Power.AC.Phase.A", "value": "-231", "unit": "W",
+         "timestamp": "06:38:43.87"},
+    ])
+    current = _by_id(client._baseline)["powersensor_current_phase_a"]
+    assert current.value == "-1.0"
+    assert current.enpal_last_update.endswith("T06:38:43.870000+00:00")
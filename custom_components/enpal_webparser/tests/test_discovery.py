@@ -16,13 +16,27 @@
 # To run: pytest custom_components/enpal_webparser/tests/test_discovery.py
 #
 
+import asyncio
 import ipaddress
+import socket
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+from aiohttp import web
 import pytest
 
+from custom_components.enpal_webparser import discovery
 from custom_components.enpal_webparser.discovery import (
+    EnpalProbe,
     get_local_subnets,
     check_enpal_device,
+    identify_enpal_device,
+    parse_neighbor_table,
+    probe_tcp_port,
+    rank_candidates,
+    read_neighbor_table,
+    scan_hosts,
 )
 
 
@@ -62,10 +76,9 @@ async def test_check_enpal_device_valid():
     # Mock HTML response with Enpal markers (updated to match actual Enpal device HTML)
     mock_response = MagicMock()
     mock_response.status = 200
-    # Use AsyncMock for the async text() method
-    mock_response.text = AsyncMock(
-        return_value='<html><h1 class="m-3">Device Messages</h1><div class="card"><h2>Inverter</h2><table></table></div></html>'
-    )
+    # The page is streamed through response.content.read()
+    page = b'<html><h1 class="m-3">Device Messages</h1><div class="card"><h2>Inverter</h2><table></table></div></html>'
+    mock_response.content.read = AsyncMock(side_effect=[page, b""])
     
     # Properly mock the async context manager
     mock_session = MagicMock()
@@ -112,3 +125,252 @@ async def test_check_enpal_device_not_reachable():
         result = await check_enpal_device(hass, "192.168.1.1")
         
         assert result is None
+
+
+@pytest.mark.asyncio
+async def test_probe_tcp_port_open_and_closed():
+    """An accepting listener is open; a just-released port is closed."""
+    server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+    open_port = server.sockets[0].getsockname()[1]
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+
+    try:
+        assert await probe_tcp_port("127.0.0.1", open_port) is True
+        assert await probe_tcp_port("127.0.0.1", closed_port) is False
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_scan_hosts_identifies_only_open_ports():
+    """Closed hosts never reach the HTTP stage; progress reports every host."""
+    ips = [f"192.168.178.{n}" for n in range(1, 255)]
+    open_ips = {"192.168.178.20", "192.168.178.178"}
+    in_flight = 0
+    peak = 0
+
+    async def fake_probe(ip, port=80, timeout=0.4):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01 if ip in open_ips else 0.02)
+        in_flight -= 1
+        return ip in open_ips
+
+    async def fake_check(hass, ip, timeout=2):
+        return EnpalProbe(f"http://{ip}/deviceMessages") if ip.endswith(".178") else None
+
+    check = AsyncMock(side_effect=fake_check)
+    progress = []
+    with patch.object(discovery, "probe_tcp_port", fake_probe), \
+            patch.object(discovery, "identify_enpal_device", check), \
+            patch.object(discovery, "TCP_PROBE_CONCURRENCY", 32):
+        result = await scan_hosts(MagicMock(), ips, lambda done, total: progress.append((done, total)))
+
+    assert [probe.url for probe in result] == ["http://192.168.178.178/deviceMessages"]
+    assert sorted(call.args[1] for call in check.call_args_list) == sorted(open_ips)
+    assert peak == 32
+    assert [done for done, _ in progress] == list(range(1, len(ips) + 1))
+    assert {total for _, total in progress} == {len(ips)}
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+async def _serve_page(body: bytes, sent: list):
+    """Local stand-in box streaming ``body`` in 1 KiB writes; logs bytes sent."""
+
+    async def handler(request):
+        response = web.StreamResponse()
+        response.content_type = "text/html"
+        await response.prepare(request)
+        try:
+            for start in range(0, len(body), 1024):
+                await response.write(body[start:start + 1024])
+                sent.append(1024)
+                await asyncio.sleep(0)
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        return response
+
+    app = web.Application()
+    app.router.add_get("/deviceMessages", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"127.0.0.1:{port}"
+
+
+@pytest.mark.asyncio
+async def test_identify_stops_at_marker_with_firmware_and_blazor():
+    """A large page is abandoned right after the marker."""
+    page = (FIXTURES / "deviceMessages.html").read_bytes()
+    body = page + b"<!-- padding -->" * 40000  # ~640 KB, like 8.50 pages
+    sent = []
+    runner, host = await _serve_page(body, sent)
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch.object(discovery, "async_get_clientsession", return_value=session):
+                probe = await identify_enpal_device(MagicMock(), host)
+    finally:
+        await runner.cleanup()
+
+    assert probe == EnpalProbe(f"http://{host}/deviceMessages", "8.46.4", True)
+    assert sum(sent) < discovery.IDENTIFY_BYTE_BUDGET + 64 * 1024
+    assert sum(sent) < len(body) // 4
+
+
+@pytest.mark.asyncio
+async def test_identify_reads_on_to_a_late_blazor_marker():
+    """The heat pump page has its Blazor script ~20 KB after the marker; the
+    h1 may carry more classes and attributes than the plain one."""
+    page = (FIXTURES / "deviceMessagesHP.html").read_bytes()
+    page = page.replace(
+        b'<h1 class="m-3">Device Messages</h1>',
+        b'<h1 id="title" class="display-6 m-3">\n  Device Messages\n</h1>',
+    )
+    sent = []
+    runner, host = await _serve_page(page + b"<!-- padding -->" * 40000, sent)
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch.object(discovery, "async_get_clientsession", return_value=session):
+                probe = await identify_enpal_device(MagicMock(), host)
+    finally:
+        await runner.cleanup()
+
+    assert probe is not None and probe.blazor is True
+    assert sum(sent) < discovery.IDENTIFY_BYTE_BUDGET + 64 * 1024
+
+
+@pytest.mark.asyncio
+async def test_identify_gives_up_after_byte_budget():
+    """A foreign server without the marker costs at most the byte budget."""
+    body = b"<html><body>" + b"<p>router admin</p>" * 50000 + b"</body></html>"
+    sent = []
+    runner, host = await _serve_page(body, sent)
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch.object(discovery, "async_get_clientsession", return_value=session):
+                probe = await identify_enpal_device(MagicMock(), host)
+    finally:
+        await runner.cleanup()
+
+    assert probe is None
+    assert sum(sent) < len(body) // 4
+
+
+PROC_NET_ARP = """IP address       HW type     Flags       HW address            Mask     Device
+192.168.178.1    0x1         0x2         3c:a6:2f:00:00:01     *        eth0
+192.168.178.99   0x1         0x0         00:00:00:00:00:00     *        eth0
+192.168.178.178  0x1         0x2         B8:27:EB:12:34:56     *        eth0
+192.168.178.40   0x1         0x2         b8:27:eb:aa:bb:cc     *        eth0
+192.168.178.23   0x1         0x2         f0:9f:c2:00:00:17     *        eth0
+"""
+
+IP_NEIGH = """192.168.178.1 dev eth0 lladdr 3c:a6:2f:00:00:01 REACHABLE
+192.168.178.99 dev eth0  FAILED
+192.168.178.50 dev eth0 lladdr 02:00:00:00:00:50 INCOMPLETE
+192.168.178.23 dev eth0 lladdr f0:9f:c2:00:00:17 STALE
+"""
+
+
+@pytest.mark.asyncio
+async def test_read_neighbor_table_from_file(tmp_path):
+    arp = tmp_path / "arp"
+    arp.write_text(PROC_NET_ARP)
+    hass = MagicMock()
+    hass.async_add_executor_job = AsyncMock(side_effect=lambda func, *args: func(*args))
+
+    neighbors = await read_neighbor_table(hass, str(arp))
+
+    assert neighbors == {
+        "192.168.178.1": "3c:a6:2f:00:00:01",
+        "192.168.178.178": "b8:27:eb:12:34:56",
+        "192.168.178.40": "b8:27:eb:aa:bb:cc",
+        "192.168.178.23": "f0:9f:c2:00:00:17",
+    }
+
+
+def test_parse_ip_neigh_output_skips_unresolved():
+    assert parse_neighbor_table(IP_NEIGH) == {
+        "192.168.178.1": "3c:a6:2f:00:00:01",
+        "192.168.178.23": "f0:9f:c2:00:00:17",
+    }
+
+
+def test_rank_candidates_known_box_then_vendor_then_neighbors():
+    neighbors = parse_neighbor_table(PROC_NET_ARP)
+
+    # The configured box moved away from .178; its vendor prefix still
+    # ranks the other host with the same prefix first.
+    ranked = rank_candidates(neighbors, known_ips=["192.168.178.178"])
+    assert ranked == [
+        "192.168.178.178",
+        "192.168.178.40",
+        "192.168.178.1",
+        "192.168.178.23",
+    ]
+
+    # Without a known box, neighbors are probed in address order.
+    assert rank_candidates(neighbors) == [
+        "192.168.178.1", "192.168.178.23", "192.168.178.40", "192.168.178.178",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_scan_hosts_cancels_outstanding_probes_once_expected_found():
+    ips = ["192.168.178.178"] + [f"192.168.178.{n}" for n in range(1, 101)]
+    probed = []
+
+    async def fake_probe(ip, port=80, timeout=0.4):
+        probed.append(ip)
+        if ip != "192.168.178.178":
+            await asyncio.sleep(10)  # silent host: would cost the full timeout
+        return True
+
+    async def fake_identify(hass, ip, timeout=2):
+        return EnpalProbe(f"http://{ip}/deviceMessages")
+
+    progress = []
+    with patch.object(discovery, "probe_tcp_port", fake_probe), \
+            patch.object(discovery, "identify_enpal_device", fake_identify), \
+            patch.object(discovery, "TCP_PROBE_CONCURRENCY", 16):
+        result = await asyncio.wait_for(
+            scan_hosts(MagicMock(), ips, lambda done, total: progress.append(done), expected=1),
+            timeout=1,
+        )
+
+    assert [probe.url for probe in result] == ["http://192.168.178.178/deviceMessages"]
+    # Hosts still waiting for a slot were never probed.
+    assert len(probed) <= 16
+    assert progress[-1] == len(ips)
+
+
+@pytest.mark.asyncio
+async def test_scan_hosts_counts_only_accepted_boxes():
+    """Boxes the caller does not accept never end the scan early."""
+    ips = ["192.168.178.10", "192.168.178.11", "192.168.178.12"]
+
+    async def fake_probe(ip, port=80, timeout=0.4):
+        await asyncio.sleep(0.01 * ips.index(ip))  # found in order
+        return True
+
+    async def fake_identify(hass, ip, timeout=2):
+        return EnpalProbe(f"http://{ip}/deviceMessages")
+
+    with patch.object(discovery, "probe_tcp_port", fake_probe), \
+            patch.object(discovery, "identify_enpal_device", fake_identify):
+        result = await scan_hosts(
+            MagicMock(), ips, expected=1,
+            accept=lambda probe: "192.168.178.10" not in probe.url,
+        )
+
+    assert [probe.url for probe in result] == [
+        "http://192.168.178.10/deviceMessages",
+        "http://192.168.178.11/deviceMessages",
+    ]
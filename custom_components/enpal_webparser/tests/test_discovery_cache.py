@@ -0,0 +1,206 @@
+"""Tests for the discovery cache and the box locator."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.enpal_webparser import discovery_cache
+from custom_components.enpal_webparser.const import RELOCATE_AFTER_FAILURES
+from custom_components.enpal_webparser.discovery import EnpalProbe
+from custom_components.enpal_webparser.discovery_cache import (
+    BoxLocator,
+    DiscoveryCache,
+)
+
+BOX_MAC = "aa:bb:cc:00:00:01"
+
+
+class _MemoryStore:
+    """In-memory stand-in for homeassistant.helpers.storage.Store."""
+
+    def __init__(self, data=None):
+        self.data = data
+        self.pending = None
+
+    async def async_load(self):
+        return self.data
+
+    def async_delay_save(self, data_func, delay=0):
+        self.pending = data_func
+
+    def flush(self):
+        self.data, self.pending = self.pending(), None
+
+
+def _cache(store, hass=None):
+    cache = DiscoveryCache(hass or MagicMock())
+    cache._store = store
+    return cache
+
+
+def _probe(ip, firmware=None):
+    return EnpalProbe(f"http://{ip}/deviceMessages", firmware)
+
+
+def _neighbors(table):
+    return patch.object(discovery_cache, "read_neighbor_table", AsyncMock(return_value=table))
+
+
+@pytest.mark.asyncio
+async def test_remember_keys_by_mac_and_follows_the_address():
+    store = _MemoryStore()
+    cache = _cache(store)
+    with _neighbors({"192.168.1.20": BOX_MAC}):
+        await cache.async_remember([_probe("192.168.1.20", "8.51.3")])
+    with _neighbors({"192.168.1.42": BOX_MAC}):
+        await cache.async_remember([_probe("192.168.1.42")])
+    store.flush()
+
+    boxes = await _cache(store).async_load()
+    assert [(b.ip, b.mac, b.firmware_version) for b in boxes] == [
+        ("192.168.1.42", BOX_MAC, "8.51.3")
+    ]
+    assert boxes[0].last_seen
+
+
+@pytest.mark.asyncio
+async def test_address_without_mac_replaces_its_older_record():
+    cache = _cache(_MemoryStore({"boxes": [
+        {"ip": "192.168.1.20", "mac": BOX_MAC, "firmware_version": "8.50.1"},
+        {"ip": "192.168.1.30"},
+        "not a box",
+    ]}))
+    with _neighbors({}):
+        await cache.async_remember([_probe("192.168.1.20", "8.51.3")])
+    box = await cache.async_find("192.168.1.20")
+    assert (box.mac, box.firmware_version) == (BOX_MAC, "8.51.3")
+    assert len(await cache.async_load()) == 2
+
+
+@pytest.mark.asyncio
+async def test_revalidate_keeps_only_boxes_that_answer():
+    cache = _cache(_MemoryStore({"boxes": [
+        {"ip": "192.168.1.20", "mac": BOX_MAC},
+        {"ip": "192.168.1.30"},
+        {"ip": "192.168.1.40"},
+    ]}))
+
+    async def fake_port(ip, *args, **kwargs):
+        return ip != "192.168.1.30"
+
+    async def fake_identify(hass, ip, timeout=2):
+        return _probe(ip, "8.51.3") if ip == "192.168.1.20" else None
+
+    with patch.object(discovery_cache, "probe_tcp_port", fake_port), \
+            patch.object(discovery_cache, "identify_enpal_device", fake_identify), \
+            _neighbors({"192.168.1.20": BOX_MAC}):
+        probes = await cache.async_revalidate()
+
+    assert probes == [_probe("192.168.1.20", "8.51.3")]
+
+
+def _locator(url="http://192.168.1.20/deviceMessages", cache=None):
+    hass = MagicMock()
+    entry = MagicMock(options={"url": url, "interval": 60}, unique_id=url)
+    tasks = []
+    entry.async_create_background_task.side_effect = lambda hass, coro, name: tasks.append(coro)
+    locator = BoxLocator(hass, entry)
+    locator._cache = cache or _cache(_MemoryStore())
+    return locator, hass, entry, tasks
+
+
+@pytest.mark.asyncio
+async def test_failures_start_one_rate_limited_search():
+    locator, _hass, _entry, tasks = _locator()
+    for _ in range(RELOCATE_AFTER_FAILURES - 1):
+        locator.async_report_failure()
+    assert tasks == []
+
+    locator.async_report_failure()
+    locator.async_report_failure()  # search still running
+    assert len(tasks) == 1
+    tasks.pop().close()
+    locator._searching = False
+
+    locator.async_report_success()  # records the box once
+    locator.async_report_success()
+    assert len(tasks) == 1
+    tasks.pop().close()
+    for _ in range(RELOCATE_AFTER_FAILURES):
+        locator.async_report_failure()
+    assert tasks == []  # within RELOCATE_MIN_INTERVAL of the last search
+
+
+@pytest.mark.asyncio
+async def test_relocate_follows_mac_to_new_address():
+    cache = _cache(_MemoryStore({"boxes": [{"ip": "192.168.1.20", "mac": BOX_MAC}]}))
+    locator, hass, entry, _tasks = _locator(cache=cache)
+
+    async def fake_identify(hass, ip, timeout=2):
+        return _probe(ip) if ip == "192.168.1.42" else None
+
+    scan = AsyncMock()
+    with patch.object(discovery_cache, "identify_enpal_device", fake_identify), \
+            patch.object(discovery_cache, "probe_tcp_port", AsyncMock(return_value=True)), \
+            patch.object(discovery_cache, "discover_enpal_devices", scan), \
+            _neighbors({"192.168.1.42": BOX_MAC, "192.168.1.7": "11:22:33:44:55:66"}):
+        probe = await locator.async_relocate()
+
+    new_url = "http://192.168.1.42/deviceMessages"
+    assert probe.url == new_url
+    scan.assert_not_called()
+    hass.config_entries.async_update_entry.assert_called_once_with(
+        entry, unique_id=new_url, options={"url": new_url, "interval": 60}
+    )
+    assert (await cache.async_find("192.168.1.42")).mac == BOX_MAC
+
+
+@pytest.mark.asyncio
+async def test_relocate_scan_never_guesses_between_boxes():
+    locator, hass, _entry, _tasks = _locator()
+    found = [_probe("192.168.1.42"), _probe("192.168.1.43"), _probe("192.168.1.50")]
+
+    with patch.object(discovery_cache, "identify_enpal_device", AsyncMock(return_value=None)), \
+            patch.object(discovery_cache, "known_box_ips", return_value=["192.168.1.20", "192.168.1.50"]), \
+            patch.object(discovery_cache, "discover_enpal_devices", AsyncMock(return_value=found)), \
+            _neighbors({}):
+        assert await locator.async_relocate() is None
+        hass.config_entries.async_update_entry.assert_not_called()
+
+        # A single unclaimed box is taken over; the other entry's box is not.
+        found.pop(1)
+        assert (await locator.async_relocate()).url == "http://192.168.1.42/deviceMessages"
+
+        # Claimed boxes do not count toward the early stop of the scan.
+        accept = discovery_cache.discover_enpal_devices.call_args.kwargs["accept"]
+        assert discovery_cache.discover_enpal_devices.call_args.kwargs["expected"] == 2
+        assert [accept(p) for p in found] == [True, False]
+
+
+@pytest.mark.asyncio
+async def test_relocate_with_mac_scans_the_whole_network():
+    cache = _cache(_MemoryStore({"boxes": [{"ip": "192.168.1.20", "mac": BOX_MAC}]}))
+    locator, _hass, _entry, _tasks = _locator(cache=cache)
+    # A neighbor's box answers first; the scan must go on to the moved one.
+    scan = AsyncMock(return_value=[_probe("192.168.1.43"), _probe("192.168.1.42")])
+
+    with patch.object(discovery_cache, "identify_enpal_device", AsyncMock(return_value=None)), \
+            patch.object(discovery_cache, "probe_tcp_port", AsyncMock(return_value=True)), \
+            patch.object(discovery_cache, "known_box_ips", return_value=["192.168.1.20"]), \
+            patch.object(discovery_cache, "discover_enpal_devices", scan), \
+            _neighbors({"192.168.1.42": BOX_MAC, "192.168.1.43": "11:22:33:44:55:66"}):
+        probe = await locator.async_relocate()
+
+    assert probe.url == "http://192.168.1.42/deviceMessages"
+    assert scan.call_args.kwargs["expected"] is None
+
+
+@pytest.mark.asyncio
+async def test_relocate_leaves_a_box_that_still_answers():
+    locator, hass, _entry, _tasks = _locator()
+    scan = AsyncMock()
+    with patch.object(discovery_cache, "identify_enpal_device",
+                      AsyncMock(return_value=_probe("192.168.1.20"))), \
+            patch.object(discovery_cache, "discover_enpal_devices", scan):
+        assert await locator.async_relocate() is None
+    scan.assert_not_called()
+    hass.config_entries.async_update_entry.assert_not_called()
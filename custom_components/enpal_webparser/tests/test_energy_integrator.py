@@ -0,0 +1,81 @@
+"""Tests for the box-timestamp energy integrator."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.enpal_webparser.energy_integrator import (
+    INTEGRATED_METRICS,
+    EnergyIntegrator,
+    sample_time,
+)
+from custom_components.enpal_webparser.models import SensorReading
+
+T0 = datetime(2026, 7, 31, 4, 0, tzinfo=timezone.utc)
+
+
+def test_trapezoid_and_duplicates():
+    integrator = EnergyIntegrator()
+    assert integrator.add(T0, 1000) == 0.0
+    assert integrator.add(T0 + timedelta(seconds=36), 3000) == pytest.approx(0.02)
+    # The same sample delivered again, and an older one, add nothing.
+    assert integrator.add(T0 + timedelta(seconds=36), 3000) == 0.0
+    assert integrator.add(T0 + timedelta(seconds=30), 3000) == 0.0
+    assert integrator.last_time == T0 + timedelta(seconds=36)
+
+
+def test_gap_hold_and_clock_reset():
+    integrator = EnergyIntegrator(max_gap=60)
+    integrator.add(T0, 3600)
+    # Ten minutes without samples: 3600 W held for 60 s.
+    assert integrator.add(T0 + timedelta(minutes=10), 0) == pytest.approx(0.06)
+
+    # Box clock jumps back a day: restart instead of ignoring everything after.
+    back = T0 - timedelta(days=1)
+    assert integrator.add(back, 1000) == 0.0
+    assert integrator.add(back + timedelta(seconds=36), 1000) == pytest.approx(0.01)
+
+
+def test_sample_time_prefers_box_timestamp():
+    reading = SensorReading.create("Inverter: Power DC Total", "1", enpal_last_update="2026-07-31T06:38:38.870000+00:00")
+    assert sample_time(reading) == datetime(2026, 7, 31, 6, 38, 38, 870000, tzinfo=timezone.utc)
+    raw = SensorReading.create("Inverter: Power DC Total", "1", enpal_last_update="6/5/2025 12:51:40 PM")
+    assert sample_time(raw) == datetime(2025, 6, 5, 12, 51, 40, tzinfo=timezone.utc)
+    assert sample_time(SensorReading.create("Inverter: Power DC Total", "1")).tzinfo is not None
+
+
+def test_metric_directions():
+    by_id = {metric.unique_id: metric for metric in INTEGRATED_METRICS}
+    assert by_id["integrated_energy_grid_import_kwh"].power(-500) == 0.0
+    assert by_id["integrated_energy_grid_export_kwh"].power(-500) == 500.0
+    assert by_id["integrated_energy_battery_discharge_kwh"].power(200) == 0.0
+    assert not any(metric.enabled_default for metric in INTEGRATED_METRICS)
+
+
+# Box samples every 36 s, so that 1 W for one step is 0.01 Wh, and one
+# outage of 12 minutes (longer than INTEGRATION_MAX_GAP_SECONDS).
+REPLAY_SAMPLES = (
+    (0, 1000),
+    (36, 3000),     # (1000 + 3000) / 2 W * 36 s = 20 Wh
+    (72, 3000),     # 3000 W * 36 s             = 30 Wh
+    (108, 1200),    # (3000 + 1200) / 2 W * 36 s = 21 Wh
+    (828, 500),     # outage: 1200 W held 300 s = 100 Wh
+    (864, 1500),    # (500 + 1500) / 2 W * 36 s  = 10 Wh
+)
+
+
+def test_replay_against_hand_computed_trace():
+    """Replay the trace as the WebSocket client sees it.
+
+    Pushes arrive every 2 s and mostly re-deliver the newest sample; during
+    the outage nothing arrives. The total is the 181 Wh worked out above.
+    """
+    integrator = EnergyIntegrator()
+    total = 0.0
+    for second in range(0, 880, 2):
+        if 120 <= second < 828:
+            continue
+        newest = max(s for s in REPLAY_SAMPLES if s[0] <= second)
+        total += integrator.add(T0 + timedelta(seconds=newest[0]), newest[1])
+
+    assert total == pytest.approx(0.181, abs=1e-9)
+    assert integrator.last_time == T0 + timedelta(seconds=864)
@@ -18,16 +18,20 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.core import HomeAssistant
 from custom_components.enpal_webparser.entity_factory import (
+    WRITE_STATS,
     build_sensor_entity,
     EnpalBaseSensor,
     EnpalEnergySensor,
     EnpalWallboxPowerSensor,
+    WritePolicy,
 )
+from custom_components.enpal_webparser import entity_factory
+from custom_components.enpal_webparser.models import SensorReading, SensorSnapshot
 
 class DummyCoordinator(DataUpdateCoordinator):
     # Minimal dummy for testing, no real update logic needed.
     def __init__(self):
-        pass
+        self.last_update_success = True
 
 
 def test_base_sensor_creation():
@@ -40,7 +44,7 @@ def test_base_sensor_creation():
         "enabled": True,
         "enpal_last_update": "2024-06-07T09:13:00",
     }
-    sensor = build_sensor_entity(sensor_dict, DummyCoordinator())
+    sensor = build_sensor_entity(SensorReading.from_dict(sensor_dict), DummyCoordinator())
     assert isinstance(sensor, EnpalBaseSensor)
     assert sensor.name == "Test Sensor"
     assert sensor.native_value == "42.1"
@@ -59,7 +63,7 @@ def test_energy_sensor_creation():
         "enabled": True,
         "enpal_last_update": None,
     }
-    sensor = build_sensor_entity(sensor_dict, DummyCoordinator())
+    sensor = build_sensor_entity(SensorReading.from_dict(sensor_dict), DummyCoordinator())
     assert isinstance(sensor, EnpalEnergySensor)
     assert getattr(sensor, "state_class", None) == "total_increasing"
 
@@ -69,7 +73,7 @@ def test_sensor_unique_id():
         "name": "Test Sensor 1",
         "value": "10",
     }
-    sensor = build_sensor_entity(sensor_dict, DummyCoordinator())
+    sensor = build_sensor_entity(SensorReading.from_dict(sensor_dict), DummyCoordinator())
     assert sensor.unique_id is not None
     assert "test_sensor_1" in sensor.unique_id
 
@@ -79,7 +83,7 @@ def test_sensor_device_info():
         "name": "Device Info Sensor",
         "value": "5",
     }
-    sensor = build_sensor_entity(sensor_dict, DummyCoordinator())
+    sensor = build_sensor_entity(SensorReading.from_dict(sensor_dict), DummyCoordinator())
     device_info = sensor.device_info
     assert device_info is not None
     assert device_info.get("identifiers") == {("enpal_webparser", "enpal_device")}
@@ -99,7 +103,7 @@ def test_native_value_falls_back_to_restored_value():
         "unit": "kWh",
         "device_class": "energy",
     }
-    sensor = build_sensor_entity(sensor_dict, DummyCoordinator())
+    sensor = build_sensor_entity(SensorReading.from_dict(sensor_dict), DummyCoordinator())
     # No restored value yet -> None
     assert sensor.native_value is None
     # Simulate a value restored from the previous HA run
@@ -115,10 +119,29 @@ def test_native_value_prefers_current_over_restored():
         "unit": "kWh",
         "device_class": "energy",
     }
-    sensor = build_sensor_entity(sensor_dict, DummyCoordinator())
+    sensor = build_sensor_entity(SensorReading.from_dict(sensor_dict), DummyCoordinator())
     sensor._restored_value = "999.5"
     assert sensor.native_value == "42.0"
 
+def test_coordinator_update_looks_up_reading_by_id():
+    """The entity picks its reading from the indexed snapshot and keeps the
+    last one while the sensor is missing from an update."""
+    coordinator = DummyCoordinator()
+    reading = SensorReading.create("Battery: Voltage", "53", unit="V", group="Battery")
+    sensor = build_sensor_entity(reading, coordinator)
+    sensor.async_write_ha_state = lambda: None
+
+    coordinator.data = SensorSnapshot([
+        SensorReading.create("Battery: Current", "1.2", unit="A", group="Battery"),
+        reading.with_value("54", "2024-06-07T09:14:00+00:00"),
+    ])
+    sensor._handle_coordinator_update()
+    assert sensor.native_value == "54"
+
+    coordinator.data = SensorSnapshot([])
+    sensor._handle_coordinator_update()
+    assert sensor.native_value == "54"
+
 @pytest.fixture
 def hass():
     """Return a mocked hass instance."""
@@ -141,7 +164,7 @@ def hass_coordinator():
 
 @pytest.mark.asyncio
 async def test_build_energy_sensor_full(hass: HomeAssistant, mock_sensor_dict, hass_coordinator):
-    sensor = build_sensor_entity(mock_sensor_dict, hass_coordinator)
+    sensor = build_sensor_entity(SensorReading.from_dict(mock_sensor_dict), hass_coordinator)
     assert isinstance(sensor, EnpalEnergySensor)
     assert sensor.name == "Test Sensor"
     assert sensor.native_value == 123.45
@@ -175,6 +198,158 @@ class _FakeHass:
         return self._States(self._map)
 
 
+def _counting_entity(reading, coordinator, **kwargs):
+    entity = build_sensor_entity(reading, coordinator, **kwargs)
+    entity.writes = 0
+
+    def _write():
+        entity.writes += 1
+
+    entity.async_write_ha_state = _write
+    return entity
+
+
+def test_unchanged_update_skips_state_write():
+    coordinator = DummyCoordinator()
+    reading = SensorReading.create(
+        "Battery: Voltage", "53", unit="V", group="Battery",
+        enpal_last_update="2024-06-07T09:13:00+00:00",
+    )
+    coordinator.data = SensorSnapshot([reading])
+    sensor = _counting_entity(reading, coordinator)
+    suppressed = WRITE_STATS.suppressed
+
+    sensor._handle_coordinator_update()
+    sensor._handle_coordinator_update()
+    assert sensor.writes == 1
+    assert sensor._writes_suppressed == 1
+    assert WRITE_STATS.suppressed == suppressed + 1
+
+    # A new box timestamp alone is a change of the written attributes.
+    coordinator.data = SensorSnapshot([reading.with_value("53", "2024-06-07T09:14:00+00:00")])
+    sensor._handle_coordinator_update()
+    assert sensor.writes == 2
+
+    coordinator.last_update_success = False
+    sensor._handle_coordinator_update()
+    assert sensor.writes == 3
+
+
+def test_wallbox_zeroing_is_written_when_status_changes():
+    """The zeroed power depends on another entity; a status flip with an
+    unchanged reading must still produce a write."""
+    coordinator = DummyCoordinator()
+    reading = SensorReading.create(
+        "Power Wallbox Connector 1 Charging", "4500", unit="W",
+        device_class="power", group="Wallbox",
+    )
+    coordinator.data = SensorSnapshot([reading])
+    entity = _counting_entity(reading, coordinator, use_wallbox=True)
+    states = {"sensor.wallbox_status": _FakeState("charging")}
+    entity.hass = _FakeHass(states)
+
+    entity._handle_coordinator_update()
+    assert entity.writes == 1 and entity.native_value == "4500"
+
+    states["sensor.wallbox_status"] = _FakeState("connected")
+    entity._handle_coordinator_update()
+    assert entity.writes == 2 and entity.native_value == 0
+
+    entity._handle_coordinator_update()
+    assert entity.writes == 2
+
+
+@pytest.mark.asyncio
+async def test_wallbox_zeroing_follows_status_entity_changes(monkeypatch):
+    """The status lives on the wallbox coordinator; its changes must reach the
+    power entity without a push to the Wallbox group."""
+    coordinator = DummyCoordinator()
+    reading = SensorReading.create(
+        "Power Wallbox Connector 1 Charging", "4500", unit="W",
+        device_class="power", group="Wallbox",
+    )
+    coordinator.data = SensorSnapshot([reading])
+    entity = _counting_entity(reading, coordinator, use_wallbox=True)
+    states = {"sensor.wallbox_status": _FakeState("charging")}
+    entity.hass = _FakeHass(states)
+    tracked = {}
+
+    def fake_track(hass, entity_ids, action):
+        tracked[tuple(entity_ids)] = action
+        return lambda: None
+
+    monkeypatch.setattr(entity_factory, "async_track_state_change_event", fake_track)
+    monkeypatch.setattr(EnpalBaseSensor, "async_added_to_hass", AsyncMock())
+    await entity.async_added_to_hass()
+    entity._handle_coordinator_update()
+    assert entity.writes == 1
+
+    states["sensor.wallbox_status"] = _FakeState("connected")
+    tracked[("sensor.wallbox_status",)](None)
+    assert entity.writes == 2 and entity.native_value == 0
+
+
+def _phase_power_entity(coordinator, **policy):
+    reading = SensorReading.create(
+        "PowerSensor: Power AC Phase (A)", "1000", unit="W",
+        device_class="power", group="PowerSensor",
+        enpal_last_update="2026-07-31T06:38:38+00:00",
+    )
+    coordinator.data = SensorSnapshot([reading])
+    entity = _counting_entity(reading, coordinator, write_policy=WritePolicy(**policy))
+    entity._handle_coordinator_update()
+    return entity, reading
+
+
+def _push(coordinator, entity, reading, value, stamp):
+    coordinator.data = SensorSnapshot([reading.with_value(value, stamp)])
+    entity._handle_coordinator_update()
+
+
+def test_write_reduction_deadband_and_heartbeat(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(entity_factory.time, "monotonic", lambda: clock[0])
+    coordinator = DummyCoordinator()
+    entity, reading = _phase_power_entity(coordinator, max_silence=300)
+    assert entity.writes == 1
+
+    # Power: max(10 W, 2 %) = 20 W around 1000 W; a new box timestamp alone
+    # does not force a write in this mode.
+    _push(coordinator, entity, reading, "1012", "2026-07-31T06:38:43+00:00")
+    _push(coordinator, entity, reading, "1012", "2026-07-31T06:38:48+00:00")
+    assert entity.writes == 1
+    _push(coordinator, entity, reading, "1025", "2026-07-31T06:38:53+00:00")
+    assert entity.writes == 2
+    assert entity.extra_state_attributes["enpal_last_update"] == "2026-07-31T06:38:53+00:00"
+
+    # Within the band again, but silent for max_silence: heartbeat write.
+    _push(coordinator, entity, reading, "1030", "2026-07-31T06:38:58+00:00")
+    assert entity.writes == 2
+    clock[0] += 300
+    _push(coordinator, entity, reading, "1031", "2026-07-31T06:44:00+00:00")
+    assert entity.writes == 3
+
+    # Going unavailable is never held back.
+    coordinator.last_update_success = False
+    entity._handle_coordinator_update()
+    assert entity.writes == 4
+
+
+def test_write_reduction_keeps_counters_and_text_exact():
+    policy = WritePolicy()
+    coordinator = DummyCoordinator()
+    energy = build_sensor_entity(
+        SensorReading.create("Energy: Produced", "1.0", unit="kWh", device_class="energy"),
+        coordinator, write_policy=policy,
+    )
+    status = build_sensor_entity(
+        SensorReading.create("Wallbox: Status", "Charging", group="Wallbox"),
+        coordinator, write_policy=policy,
+    )
+    assert energy._deadband is None and status._deadband is None
+    assert "enpal_last_update" in EnpalBaseSensor._unrecorded_attributes
+
+
 def _wallbox_power_sensor(status_state: str | None):
     """Create an EnpalWallboxPowerSensor with a faked wallbox status."""
     sensor_dict = {
@@ -185,7 +360,7 @@ def _wallbox_power_sensor(status_state: str | None):
         "enabled": True,
         "group": "Wallbox",
     }
-    entity = build_sensor_entity(sensor_dict, DummyCoordinator(), use_wallbox=True)
+    entity = build_sensor_entity(SensorReading.from_dict(sensor_dict), DummyCoordinator(), use_wallbox=True)
     assert isinstance(entity, EnpalWallboxPowerSensor)
 
     if status_state is not None:
@@ -227,7 +402,7 @@ def test_wallbox_current_sensor_zero_override():
         "enabled": True,
         "group": "Wallbox",
     }
-    entity = build_sensor_entity(sensor_dict, DummyCoordinator(), use_wallbox=True)
+    entity = build_sensor_entity(SensorReading.from_dict(sensor_dict), DummyCoordinator(), use_wallbox=True)
     assert isinstance(entity, EnpalWallboxPowerSensor)
     entity.hass = _FakeHass({"sensor.wallbox_status": _FakeState("connected")})
     assert entity.native_value == 0
@@ -241,7 +416,7 @@ def test_wallbox_power_not_used_without_flag():
         "unit": "W",
         "device_class": "power",
     }
-    entity = build_sensor_entity(sensor_dict, DummyCoordinator(), use_wallbox=False)
+    entity = build_sensor_entity(SensorReading.from_dict(sensor_dict), DummyCoordinator(), use_wallbox=False)
     assert isinstance(entity, EnpalBaseSensor)
     assert not isinstance(entity, EnpalWallboxPowerSensor)
 
@@ -70,7 +70,7 @@ def test_parse_heatpump_sensors():
     assert len(sensors) > 0, "Should find Heatpump sensors"
     
     # Check sensor names
-    sensor_names = [s['name'] for s in sensors]
+    sensor_names = [s.name for s in sensors]
     assert any("DomesticHotWater" in name for name in sensor_names), "Should find DomesticHotWater Temperature sensor"
     assert any("Energy" in name and "Consumption" in name for name in sensor_names), "Should find Energy Consumption sensor"
     assert any("Operation" in name and "Mode" in name for name in sensor_names), "Should find Operation Mode sensor"
@@ -79,11 +79,11 @@ def test_parse_heatpump_sensors():
     
     # Verify group is correct
     for sensor in sensors:
-        assert sensor['group'] == 'Heatpump', f"Sensor {sensor['name']} should be in Heatpump group"
+        assert sensor.group == 'Heatpump', f"Sensor {sensor.name} should be in Heatpump group"
     
     print(f"✓ Successfully parsed {len(sensors)} Heatpump sensors:")
     for sensor in sensors:
-        print(f"  - {sensor['name']} = {sensor['value']}")
+        print(f"  - {sensor.name} = {sensor.value}")
 
 
 def test_heatpump_sensors_not_parsed_when_group_not_selected():
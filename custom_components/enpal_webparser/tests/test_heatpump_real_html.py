@@ -4,7 +4,7 @@ Test parsing with real user-provided HTML containing Heatpump sensors.
 import pytest
 from pathlib import Path
 
-from custom_components.enpal_webparser.utils import parse_enpal_html_sensors, make_id
+from custom_components.enpal_webparser.utils import parse_enpal_html_sensors
 from custom_components.enpal_webparser.const import DEFAULT_GROUPS
 
 
@@ -24,18 +24,18 @@ def test_parse_real_heatpump_html():
         html_content, groups=["Heatpump"],
         excluded_groups=[g for g in DEFAULT_GROUPS if g != "Heatpump"],
     )
-    sensors = [s for s in all_sensors if s["group"] == "Heatpump"]
-    others = [s for s in all_sensors if s["group"] != "Heatpump"]
+    sensors = [s for s in all_sensors if s.group == "Heatpump"]
+    others = [s for s in all_sensors if s.group != "Heatpump"]
 
     # Verify we found sensors
     assert len(sensors) > 0, "Should find Heatpump sensors in the HTML"
 
     # Heatpump entities are enabled, all other known groups default to disabled.
-    assert all(s["enabled"] for s in sensors)
-    assert others and all(not s["enabled"] for s in others)
+    assert all(s.enabled for s in sensors)
+    assert others and all(not s.enabled for s in others)
     
     # Check for expected sensors (note: no colon between group and sensor name)
-    sensor_names = [s['name'] for s in sensors]
+    sensor_names = [s.name for s in sensors]
     
     assert "Heatpump DomesticHotWater Temperature" in sensor_names
     assert "Heatpump Energy Consumption Total Lifetime" in sensor_names
@@ -48,7 +48,7 @@ def test_parse_real_heatpump_html():
     
     print(f"\n✓ Successfully parsed {len(sensors)} Heatpump sensors:")
     for sensor in sensors:
-        print(f"  - {sensor['name']} = {sensor['value']}")
+        print(f"  - {sensor.name} = {sensor.value}")
 
 
 def test_heatpump_sensor_values():
@@ -64,38 +64,38 @@ def test_heatpump_sensor_values():
     sensors = parse_enpal_html_sensors(html_content, groups=["Heatpump"])
     
     # Create a dict for easier lookup
-    sensor_dict = {s['name']: s for s in sensors}
+    sensor_dict = {s.name: s for s in sensors}
     
     # Check DomesticHotWater Temperature (value has encoding issue: 50\'b0C instead of 50°C)
     dhw_temp = sensor_dict.get("Heatpump DomesticHotWater Temperature")
     assert dhw_temp is not None
     # The value will have escaped backslash: 50\\'b0C
-    assert "50" in str(dhw_temp['value']), \
-        f"DomesticHotWater Temperature should contain '50': {dhw_temp['value']}"
+    assert "50" in str(dhw_temp.value), \
+        f"DomesticHotWater Temperature should contain '50': {dhw_temp.value}"
     
     # Check Energy Consumption
     energy = sensor_dict.get("Heatpump Energy Consumption Total Lifetime")
     assert energy is not None
-    assert "1333" in str(energy['value']), \
-        f"Energy Consumption should contain '1333': {energy['value']}"
+    assert "1333" in str(energy.value), \
+        f"Energy Consumption should contain '1333': {energy.value}"
     
     # Check Operation Mode
     mode = sensor_dict.get("Heatpump Operation Mode Midea")
     assert mode is not None
-    assert str(mode['value']) == "3", \
-        f"Operation Mode should be '3': {mode['value']}"
+    assert str(mode.value) == "3", \
+        f"Operation Mode should be '3': {mode.value}"
     
     # Check Outside Temperature (value has encoding issue: 8\'b0C instead of 8°C)
     outside_temp = sensor_dict.get("Heatpump Outside Temperature")
     assert outside_temp is not None
-    assert "8" in str(outside_temp['value']), \
-        f"Outside Temperature should contain '8': {outside_temp['value']}"
+    assert "8" in str(outside_temp.value), \
+        f"Outside Temperature should contain '8': {outside_temp.value}"
     
     # Check Power Consumption
     power = sensor_dict.get("Heatpump Power Consumption Total")
     assert power is not None
-    assert "0.01" in str(power['value']), \
-        f"Power Consumption should contain '0.01': {power['value']}"
+    assert "0.01" in str(power.value), \
+        f"Power Consumption should contain '0.01': {power.value}"
     
     print("\n✓ All Heatpump sensor values parsed correctly")
 
@@ -116,7 +116,7 @@ def test_heatpump_with_all_groups():
     # Count sensors by group
     groups = {}
     for sensor in sensors:
-        group = sensor.get('group', 'Unknown')  # Handle sensors without group key
+        group = sensor.group
         if group:
             groups[group] = groups.get(group, 0) + 1
     
@@ -156,7 +156,7 @@ def test_heatpump_sensor_unique_ids():
     ]
     
     # Generate unique IDs from sensor names
-    actual_ids = [make_id(s['name']) for s in sensors]
+    actual_ids = [s.sensor_id for s in sensors]
     
     # Verify all expected IDs are present
     for expected_id in expected_ids:
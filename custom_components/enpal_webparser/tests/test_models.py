@@ -0,0 +1,68 @@
+"""Tests for the immutable SensorReading record and the coordinator snapshot."""
+import dataclasses
+
+import pytest
+
+from custom_components.enpal_webparser.models import SensorReading, SensorSnapshot
+
+
+def test_create_precomputes_id_and_numeric():
+    reading = SensorReading.create("Inverter: Power DC Total", "787.7", unit="W", group="Inverter")
+    assert reading.sensor_id == "inverter_power_dc_total"
+    assert reading.numeric == 787.7
+
+    text = SensorReading.create("Wallbox: Status", "Charging")
+    assert text.numeric is None
+    assert SensorReading.create("Battery: Mode", "nan").numeric is None
+
+
+def test_reading_is_immutable():
+    reading = SensorReading.create("Battery: Voltage", "53", unit="V")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        reading.value = "54"
+    assert not hasattr(reading, "__dict__")
+
+
+def test_with_value_and_replace_keep_numeric_in_sync():
+    reading = SensorReading.create("Battery: Voltage", "53", unit="V", group="Battery")
+
+    updated = reading.with_value("54.5", "2026-07-31T06:38:38+00:00")
+    assert updated.numeric == 54.5
+    assert updated.unit == "V"
+    assert updated.sensor_id == reading.sensor_id
+    assert reading.value == "53"
+
+    assert updated.replace(value="off").numeric is None
+    assert updated.replace(raw_key="Battery.Voltage").numeric == 54.5
+
+
+def test_dict_round_trip_keeps_legacy_shape():
+    legacy = {
+        "name": "Inverter: Power AC",
+        "value": "4800",
+        "unit": "W",
+        "device_class": "power",
+        "enabled": True,
+        "enpal_last_update": "2026-07-31T06:38:38+00:00",
+        "group": "Inverter",
+    }
+    reading = SensorReading.from_dict(legacy)
+    assert reading.to_dict() == legacy
+
+    derived = reading.replace(derived=True, raw_key="Power.AC")
+    assert derived.to_dict() == dict(legacy, derived=True, raw_key="Power.AC")
+
+
+def test_snapshot_indexes_readings_by_id_in_box_order():
+    first = SensorReading.create("Inverter: Power AC", "4800")
+    other = SensorReading.create("Battery: Voltage", "53")
+    duplicate = SensorReading.create("Inverter: Power AC", "1")
+    snapshot = SensorSnapshot([first, other, duplicate])
+
+    assert list(snapshot) == [first, other, duplicate]
+    assert len(snapshot) == 3 and snapshot[1] is other
+    # Same reading the former linear scan returned.
+    assert snapshot.get("inverter_power_ac") is first
+    assert snapshot.get("missing") is None
+    assert set(snapshot.ids()) == {"inverter_power_ac", "battery_voltage"}
+    assert not SensorSnapshot()
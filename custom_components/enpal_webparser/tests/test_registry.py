@@ -0,0 +1,72 @@
+#
+# Tests for Enpal Webparser - registry.py
+#
+# The sensor metadata registry resolves every sensor once to an immutable
+# SensorSpec that is shared by the parsers and the entity factory.
+#
+# To run: pytest custom_components/enpal_webparser/tests/test_registry.py
+#
+
+import dataclasses
+
+import pytest
+
+from custom_components.enpal_webparser.registry import (
+    ENTITY_TYPE_BASE,
+    ENTITY_TYPE_ENERGY,
+    ENTITY_TYPE_WALLBOX_POWER,
+    SensorRegistry,
+    get_registry,
+)
+from custom_components.enpal_webparser.utils import friendly_name, make_id
+
+
+def test_get_registry_is_a_process_singleton():
+    assert get_registry() is get_registry()
+
+
+def test_lookup_key_matches_parser_naming():
+    spec = SensorRegistry().lookup_key("Inverter", "Power.DC.Total", "W", "power")
+    assert spec.name == friendly_name("Inverter", "Power.DC.Total")
+    assert spec.sensor_id == make_id(spec.name) == "inverter_power_dc_total"
+    assert spec.group == "Inverter"
+    assert spec.unit == "W"
+    assert spec.device_class == "power"
+    assert spec.state_class == "measurement"
+    assert spec.icon == "mdi:flash"
+    assert spec.entity_type == ENTITY_TYPE_BASE
+
+
+def test_spec_is_cached_and_immutable():
+    registry = SensorRegistry()
+    first = registry.lookup_key("Battery", "Voltage.Battery", "V", "voltage")
+    assert registry.lookup_key("Battery", "Voltage.Battery", "V", "voltage") is first
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        first.unit = "mV"
+
+
+def test_unknown_key_is_cached_on_first_sight():
+    registry = SensorRegistry()
+    before = len(registry)
+    spec = registry.lookup_key("Uncategorized", "Totally.Unknown.Sensor", "W", "power")
+    assert spec.sensor_id == "uncategorized_totally_unknown_sensor"
+    assert len(registry) == before + 1
+    registry.lookup_key("Uncategorized", "Totally.Unknown.Sensor", "W", "power")
+    assert len(registry) == before + 1
+
+
+def test_device_and_state_class_overrides():
+    spec = SensorRegistry().lookup("Energy Battery Charge Level", "Battery", "%", None)
+    assert spec.device_class == "battery"
+    assert spec.state_class == "measurement"
+
+
+def test_energy_and_wallbox_entity_types():
+    registry = SensorRegistry()
+    energy = registry.lookup("Test Energy", "", "kWh", "energy")
+    assert energy.entity_type == ENTITY_TYPE_ENERGY
+    assert energy.state_class == "total_increasing"
+
+    wallbox = registry.lookup("Power Wallbox Connector 1 Charging", "Wallbox", "W", "power")
+    assert wallbox.entity_type == ENTITY_TYPE_WALLBOX_POWER
+    assert wallbox.display_name == "Wallbox: Power Connector 1 Charging"
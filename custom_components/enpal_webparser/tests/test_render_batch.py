@@ -135,8 +135,8 @@ def _find(sensors, raw_key):
     group-prefix-stripping index logic."""
     target = make_id(raw_key)
     for s in sensors:
-        name = s.get("name", "")
-        group = s.get("group", "")
+        name = s.name
+        group = s.group
         label = name
         prefix = f"{group}: "
         if group and name.startswith(prefix):
@@ -153,16 +153,19 @@ def test_apply_diff_updates_unambiguous_sensor():
 
     sensor = _find(baseline, "Battery.Unit.1.Voltage")
     assert sensor is not None
-    sensor["value"] = "999"  # stale value to be corrected
+    # Stale value to be corrected.
+    baseline[baseline.index(sensor)] = sensor.replace(value="999")
 
     client._apply_diff([
         {"key": "Battery.Unit.1.Voltage", "value": "53", "unit": "V",
          "timestamp": "2026-06-02 15:06:50.331Z"},
     ])
 
-    assert sensor["value"] == "53"
-    assert sensor["unit"] == "V"
-    assert sensor["enpal_last_update"] == "2026-06-02 15:06:50.331Z"
+    sensor = _find(baseline, "Battery.Unit.1.Voltage")
+    assert sensor.value == "53"
+    assert sensor.numeric == 53.0
+    assert sensor.unit == "V"
+    assert sensor.enpal_last_update == "2026-06-02T15:06:50.331000+00:00"
 
 
 def test_apply_diff_skips_ambiguous_cross_group_keys():
@@ -173,13 +176,12 @@ def test_apply_diff_skips_ambiguous_cross_group_keys():
     # power_ac_phase_a exists in both Inverter and PowerSensor → ambiguous.
     assert len(client._key_index.get(make_id("Power.AC.Phase.A"), [])) > 1
 
-    before = [dict(s) for s in baseline]
+    before = list(baseline)
     client._apply_diff([
         {"key": "Power.AC.Phase.A", "value": "123", "unit": "W",
          "timestamp": "2026-06-02 15:06:50.331Z"},
     ])
-    after = [dict(s) for s in baseline]
-    assert before == after, "ambiguous key must not be patched on the fast path"
+    assert before == baseline, "ambiguous key must not be patched on the fast path"
 
 
 def test_apply_diff_creates_unknown_key_as_uncategorized():
@@ -194,9 +196,9 @@ def test_apply_diff_creates_unknown_key_as_uncategorized():
     ])
     created = _find(client._baseline, "Totally.Unknown.Sensor")
     assert created is not None
-    assert created["group"] == "Uncategorized"
-    assert created["enabled"] is True
-    assert created["value"] == "5"
+    assert created.group == "Uncategorized"
+    assert created.enabled is True
+    assert created.value == "5"
 
     # Numeric pseudo-keys from misread rows are not turned into sensors.
     before = len(client._baseline)
@@ -221,8 +223,8 @@ def test_apply_diff_rejects_timestamp_as_value_for_numeric_sensor():
 
     sensor = _find(baseline, "Energy.Consumption.Total.Lifetime")
     assert sensor is not None
-    assert sensor["device_class"] == "energy"
-    good_value = sensor["value"]
+    assert sensor.device_class == "energy"
+    good_value = sensor.value
 
     client._apply_diff([
         {"key": "Energy.Consumption.Total.Lifetime",
@@ -231,7 +233,7 @@ def test_apply_diff_rejects_timestamp_as_value_for_numeric_sensor():
     ])
 
     # The last good numeric value must be retained.
-    assert sensor["value"] == good_value
+    assert _find(baseline, "Energy.Consumption.Total.Lifetime").value == good_value
 
 
 def test_apply_diff_still_patches_numeric_sensor_with_numeric_value():
@@ -248,8 +250,9 @@ def test_apply_diff_still_patches_numeric_sensor_with_numeric_value():
          "timestamp": "2026-06-02 15:05:10.244Z"},
     ])
 
-    assert sensor["value"] == "16360.30"
-    assert sensor["unit"] == "kWh"
+    sensor = _find(baseline, "Energy.Consumption.Total.Lifetime")
+    assert sensor.value == "16360.30"
+    assert sensor.unit == "kWh"
 
 
 def test_apply_diff_allows_nonnumeric_value_for_string_sensor():
@@ -260,7 +263,7 @@ def test_apply_diff_allows_nonnumeric_value_for_string_sensor():
 
     sensor = _find(baseline, "HW.Cronny.Result")
     assert sensor is not None
-    assert sensor.get("device_class") not in {
+    assert sensor.device_class not in {
         "energy", "power", "voltage", "current", "temperature",
         "frequency", "battery", "humidity", "pressure",
     }
@@ -270,7 +273,7 @@ def test_apply_diff_allows_nonnumeric_value_for_string_sensor():
          "timestamp": "2026-06-02 15:05:10.244Z"},
     ])
 
-    assert sensor["value"] == "cronny.hw_metrics.fail"
+    assert _find(baseline, "HW.Cronny.Result").value == "cronny.hw_metrics.fail"
 
 
 # ---------------------------------------------------------------------------
@@ -439,8 +442,8 @@ def test_initial_851_batch_populates_site_data_only_baseline():
 
     dc = _find(client._baseline, "Power.DC.Total")
     assert dc is not None
-    assert dc["group"] == "Inverter"
-    assert dc["value"] == "905"
+    assert dc.group == "Inverter"
+    assert dc.value == "905"
 
 
 def test_system_state_row_expands_into_split_sensors():
@@ -451,18 +454,18 @@ def test_system_state_row_expands_into_split_sensors():
     strings = parse_render_batch_strings(_load_initial_851_batch())
     client._apply_diff(client._extract_rows(strings))
 
-    by_id = {make_id(s["name"]): s for s in client._baseline}
-    assert by_id["inverter_system_state_decimal"]["value"] == "6"
-    assert by_id["inverter_system_state_flags"]["value"] == (
+    by_id = {s.sensor_id: s for s in client._baseline}
+    assert by_id["inverter_system_state_decimal"].value == "6"
+    assert by_id["inverter_system_state_flags"].value == (
         "Grid-connected, Grid-connected normally"
     )
-    assert by_id["inverter_system_state_standby"]["value"] == "off"
-    assert by_id["inverter_system_state_grid_connected"]["value"] == "on"
+    assert by_id["inverter_system_state_standby"].value == "off"
+    assert by_id["inverter_system_state_grid_connected"].value == "on"
     # No raw sensor with the oversized HTML blob as state.
     for sensor in client._baseline:
-        assert len(str(sensor["value"])) <= 255
+        assert len(str(sensor.value)) <= 255
 
-    # A second apply patches in place instead of duplicating.
+    # A second apply replaces the readings instead of duplicating them.
     count = len(client._baseline)
     client._apply_diff([{
         "key": "Inverter.System.State",
@@ -471,9 +474,10 @@ def test_system_state_row_expands_into_split_sensors():
         "timestamp": "13:00:00.00",
     }])
     assert len(client._baseline) == count
-    assert by_id["inverter_system_state_decimal"]["value"] == "1"
-    assert by_id["inverter_system_state_standby"]["value"] == "on"
-    assert by_id["inverter_system_state_grid_connected"]["value"] == "off"
+    by_id = {s.sensor_id: s for s in client._baseline}
+    assert by_id["inverter_system_state_decimal"].value == "1"
+    assert by_id["inverter_system_state_standby"].value == "on"
+    assert by_id["inverter_system_state_grid_connected"].value == "off"
 
 
 def test_system_state_row_respects_group_selection():
@@ -491,9 +495,48 @@ def test_system_state_row_respects_group_selection():
     assert created > 0
     decimal = next(
         s for s in client._baseline
-        if make_id(s["name"]) == "inverter_system_state_decimal"
+        if s.sensor_id == "inverter_system_state_decimal"
+    )
+    assert decimal.enabled is False
+
+
+def test_system_state_row_only_reports_flipped_flags():
+    client = EnpalWebSocketClient("http://box.local", groups=list(DEFAULT_GROUPS))
+    client._set_baseline(_site_data_only_baseline())
+    row = {
+        "key": "Inverter.System.State",
+        "value": "<ul><li>Decimal: 6</li><li>Bits: 0000000110</li></ul>",
+        "unit": None,
+        "timestamp": "12:00:00.00",
+    }
+    changed = {}
+    assert client._apply_system_state_row(row, changed) == 12
+    assert len(changed) == 12
+
+    # Same bitfield again (new timestamp, markup re-rendered): nothing written.
+    changed = {}
+    repeat = dict(row, value=row["value"].replace("<li>", "<li> "), timestamp="12:00:05.00")
+    assert client._apply_system_state_row(repeat, changed) == 0
+    assert changed == {}
+
+    # Standby bit set: decimal, summary and the standby flag change.
+    changed = {}
+    client._apply_system_state_row(dict(
+        row, value="<ul><li>Decimal: 7</li><li>Bits: 0000000111</li></ul>",
+        timestamp="12:01:00.00",
+    ), changed)
+    assert set(changed) == {
+        "inverter_system_state_decimal",
+        "inverter_system_state_flags",
+        "inverter_system_state_standby",
+    }
+    assert changed["inverter_system_state_standby"].value == "on"
+    assert changed["inverter_system_state_standby"].enpal_last_update.endswith("T12:01:00+00:00")
+    grid = next(
+        s for s in client._baseline
+        if s.sensor_id == "inverter_system_state_grid_connected"
     )
-    assert decimal["enabled"] is False
+    assert grid.enpal_last_update.endswith("T12:00:00+00:00")
 
 
 # ---------------------------------------------------------------------------
@@ -502,7 +545,7 @@ def test_system_state_row_respects_group_selection():
 
 def _site_data_only_baseline():
     """Simulate the 8.51 HTTP scrape, which only contains the Site Data card."""
-    return [s for s in _load_baseline() if s.get("group") == "Site Data"]
+    return [s for s in _load_baseline() if s.group == "Site Data"]
 
 
 def test_apply_diff_creates_sensor_with_known_group():
@@ -519,24 +562,24 @@ def test_apply_diff_creates_sensor_with_known_group():
 
     created = _find(client._baseline, "Current.Wallbox.Connector.1.Phase.A")
     assert created is not None
-    assert created["group"] == "Wallbox"
-    assert created["value"] == "0.02"
-    assert created["unit"] == "A"
-    assert created["raw_key"] == "Current.Wallbox.Connector.1.Phase.A"
+    assert created.group == "Wallbox"
+    assert created.value == "0.02"
+    assert created.unit == "A"
+    assert created.raw_key == "Current.Wallbox.Connector.1.Phase.A"
 
     # Wh values are normalized to kWh like in the HTML parser.
     energy = _find(client._baseline, "Energy.Wallbox.Connector.1.Charged.Total")
     assert energy is not None
-    assert energy["unit"] == "kWh"
-    assert float(energy["value"]) == 12725.4
+    assert energy.unit == "kWh"
+    assert energy.numeric == 12725.4
 
-    # A second diff patches the created sensor instead of duplicating it.
+    # A second diff replaces the created sensor instead of duplicating it.
     count_before = len(client._baseline)
     client._apply_diff([
         {"key": "Current.Wallbox.Connector.1.Phase.A", "value": "0.05",
          "unit": "A", "timestamp": "18:19:54.00"},
     ])
-    assert created["value"] == "0.05"
+    assert _find(client._baseline, "Current.Wallbox.Connector.1.Phase.A").value == "0.05"
     assert len(client._baseline) == count_before
 
 
@@ -553,9 +596,9 @@ def test_apply_diff_creates_aliased_inverter_sensor():
     # The alias strips the ".Inverter" suffix so the entity id matches 8.50.
     created = _find(client._baseline, "Power.Battery.Charge.Max")
     assert created is not None
-    assert created["group"] == "Inverter"
-    assert created["value"] == "5000"
-    assert created["raw_key"] == "Power.Battery.Charge.Max.Inverter"
+    assert created.group == "Inverter"
+    assert created.value == "5000"
+    assert created.raw_key == "Power.Battery.Charge.Max.Inverter"
 
 
 def test_apply_diff_creation_respects_group_selection():
@@ -574,8 +617,8 @@ def test_apply_diff_creation_respects_group_selection():
     # Deselected group: the sensor is created but defaults to disabled.
     created = _find(client._baseline, "Cpu.Load")
     assert created is not None
-    assert created["group"] == "IoTEdgeDevice"
-    assert created["enabled"] is False
+    assert created.group == "IoTEdgeDevice"
+    assert created.enabled is False
 
 
 def test_set_baseline_keeps_diff_created_sensors():
@@ -594,14 +637,72 @@ def test_set_baseline_keeps_diff_created_sensors():
 
     kept = _find(client._baseline, "Current.Wallbox.Connector.1.Phase.A")
     assert kept is not None
-    assert kept["value"] == "0.02"
+    assert kept.value == "0.02"
 
     # And it stays patchable after the merge.
     client._apply_diff([
         {"key": "Current.Wallbox.Connector.1.Phase.A", "value": "0.07",
          "unit": "A", "timestamp": "18:19:54.00"},
     ])
-    assert kept["value"] == "0.07"
+    assert _find(client._baseline, "Current.Wallbox.Connector.1.Phase.A").value == "0.07"
+
+
+def test_new_sensor_ids_are_reported_once():
+    baseline = _site_data_only_baseline()
+    client = EnpalWebSocketClient("http://box.local", groups=list(DEFAULT_GROUPS))
+    client._set_baseline(baseline)
+    assert client._take_new_ids() == [s.sensor_id for s in baseline]
+
+    client._apply_diff([
+        {"key": "Current.Wallbox.Connector.1.Phase.A", "value": "0.02",
+         "unit": "A", "timestamp": "18:19:44.00"},
+        {"key": "Power.AC.Phase.A", "value": "476", "unit": "W",
+         "timestamp": "06:38:38.87"},
+        {"key": "Voltage.Phase.A", "value": "231.3", "unit": "V",
+         "timestamp": "06:35:39.90"},
+    ])
+    assert client._take_new_ids() == [
+        "current_wallbox_connector_1_phase_a",
+        "powersensor_power_ac_phase_a",
+        "powersensor_voltage_phase_a",
+        "powersensor_current_phase_a",  # derived from the two rows above
+    ]
+
+    # Patches and the next full scrape report nothing already reported.
+    client._apply_diff([
+        {"key": "Current.Wallbox.Connector.1.Phase.A", "value": "0.05",
+         "unit": "A", "timestamp": "18:19:54.00"},
+    ])
+    client._set_baseline(_site_data_only_baseline())
+    assert client._take_new_ids() == []
+
+
+def test_dormant_sensors_are_not_patched_but_derived_inputs_are():
+    client = EnpalWebSocketClient("http://box.local", groups=list(DEFAULT_GROUPS))
+    client._set_baseline(_site_data_only_baseline())
+    client._apply_diff([
+        {"key": "Voltage.Battery", "value": "53.1", "unit": "V",
+         "timestamp": "06:38:38.87"},
+        {"key": "Power.AC.Phase.A", "value": "476", "unit": "W",
+         "timestamp": "06:38:38.87"},
+        {"key": "Voltage.Phase.A", "value": "231.3", "unit": "V",
+         "timestamp": "06:35:39.90"},
+    ])
+    client.set_dormant_ids({
+        "voltage_battery",
+        "powersensor_voltage_phase_a",  # input of the derived phase current
+    })
+    assert client._dormant_ids == {"voltage_battery"}
+
+    client._apply_diff([
+        {"key": "Voltage.Battery", "value": "54.0", "unit": "V",
+         "timestamp": "06:38:48.87"},
+        {"key": "Voltage.Phase.A", "value": "230.0", "unit": "V",
+         "timestamp": "06:38:48.87"},
+    ])
+    by_id = {s.sensor_id: s for s in client._baseline}
+    assert by_id["voltage_battery"].value == "53.1"
+    assert by_id["powersensor_voltage_phase_a"].value == "230.0"
 
 
 # ---------------------------------------------------------------------------
@@ -14,7 +14,9 @@ from datetime import timedelta
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from custom_components.enpal_webparser.sensor import CumulativeEnergySensor
+from custom_components.enpal_webparser.models import SensorReading, SensorSnapshot
+from custom_components.enpal_webparser.energy_integrator import INTEGRATED_METRICS
+from custom_components.enpal_webparser.sensor import CumulativeEnergySensor, IntegratedEnergySensor
 from custom_components.enpal_webparser.utils import make_id
 
 
@@ -22,14 +24,7 @@ from custom_components.enpal_webparser.utils import make_id
 def mock_hass():
     """Create a mock Home Assistant instance."""
     hass = Mock(spec=HomeAssistant)
-    hass.data = {
-        "enpal_webparser": {
-            "cumulative_energy_state": {
-                "value": 0.0,
-                "last_updated": "2024-01-01T00:00:00"
-            }
-        }
-    }
+    hass.data = {"enpal_webparser": {}}
     return hass
 
 
@@ -37,14 +32,14 @@ def mock_hass():
 def mock_coordinator(mock_hass):
     """Create a mock DataUpdateCoordinator."""
     coordinator = Mock(spec=DataUpdateCoordinator)
-    coordinator.data = []
+    coordinator.data = SensorSnapshot()
     coordinator.async_add_listener = Mock()
     return coordinator
 
 
-def create_sensor_with_mocked_state(mock_hass, mock_coordinator, sensor_names, interval=60):
+def create_sensor_with_mocked_state(mock_hass, mock_coordinator, sensor_names):
     """Helper to create a sensor with async_write_ha_state mocked."""
-    sensor = CumulativeEnergySensor(mock_hass, mock_coordinator, sensor_names, interval)
+    sensor = CumulativeEnergySensor(mock_hass, mock_coordinator, sensor_names)
     sensor.async_write_ha_state = Mock()
     return sensor
 
@@ -54,10 +49,10 @@ class TestCumulativeEnergySensorSelection:
     
     def test_huawei_sensor_selection(self, mock_hass, mock_coordinator):
         """Test that Huawei sensor is selected when available (Priority 1)."""
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power AC", "value": "4800", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total (Huawei)", "5000", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power AC", "4800", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor = create_sensor_with_mocked_state(
             mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"]
@@ -75,10 +70,10 @@ class TestCumulativeEnergySensorSelection:
         
         Calculated sensor should only be used when no other options exist.
         """
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total Calculated", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power AC", "value": "4800", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total Calculated", "5000", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power AC", "4800", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor = create_sensor_with_mocked_state(
             mock_hass, mock_coordinator, ["Inverter: Power DC Total Calculated"]
@@ -90,10 +85,10 @@ class TestCumulativeEnergySensorSelection:
     
     def test_generic_sensor_selection(self, mock_hass, mock_coordinator):
         """Test that generic sensor is selected when Huawei not available (Priority 2)."""
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power AC", "value": "4800", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total", "5000", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power AC", "4800", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor_names = [
             "Inverter: Power DC Total (Huawei)",
@@ -112,10 +107,10 @@ class TestCumulativeEnergySensorSelection:
         Tests the cascade: Huawei → Manufacturer-specific (SMA, Fronius) → Generic → Calculated
         This verifies manufacturer-specific sensors are detected and prioritized.
         """
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (SMA)", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power AC", "value": "4800", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total (SMA)", "5000", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power AC", "4800", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         # Simulate the setup code finding the sensor and passing it to the sensor class
         sensor = create_sensor_with_mocked_state(
@@ -130,10 +125,10 @@ class TestCumulativeEnergySensorSelection:
     
     def test_no_matching_sensor_fallback(self, mock_hass, mock_coordinator):
         """Test fallback behavior when no suitable sensor found."""
-        mock_coordinator.data = [
-            {"name": "Inverter: Power AC", "value": "4800", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Battery: Power", "value": "1000", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power AC", "4800", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Battery: Power", "1000", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor_names = [
             "Inverter: Power DC Total (Huawei)",
@@ -155,53 +150,38 @@ class TestCumulativeEnergySensorSelection:
     
     def test_energy_calculation_with_selected_sensor(self, mock_hass, mock_coordinator):
         """Test that energy calculation works with auto-selected sensor.
-        
-        Uses controlled timestamps to verify the integration:
-        - First update at t=0: uses fallback interval (3600s = 1h)
-        - Second update at t=3600s: uses real elapsed time (1h)
-        """
-        from datetime import datetime, timedelta
 
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        The first box sample only anchors the integration; the second one,
+        60 s later by box time, adds the trapezoid (5000 + 3000) / 2 W * 60 s.
+        """
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total (Huawei)", "5000", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor = create_sensor_with_mocked_state(
-            mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"], 3600
+            mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"]
         )
         sensor._value = 0.0
-        
-        # First update at t=0 — no previous timestamp, uses fallback interval (1h)
-        t0 = datetime(2024, 1, 1, 12, 0, 0)
-        with patch("custom_components.enpal_webparser.sensor.datetime") as mock_dt:
-            mock_dt.now.return_value = t0
-            mock_dt.side_effect = lambda *a, **kw: datetime(*a, **kw)
-            sensor._handle_coordinator_update()
-        
-        # Should have calculated energy: 5000W * 1h / 1000 = 5 kWh
+        sensor._handle_coordinator_update()
+
         assert sensor._active_source_uid == "inverter_power_dc_total_huawei"
-        assert sensor._value == pytest.approx(5.0, rel=0.01)
-        
-        # Second update 1 hour later with different power
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "3000", "timestamp": "01/01/2024 13:00:00"},
-        ]
-        t1 = t0 + timedelta(hours=1)
-        with patch("custom_components.enpal_webparser.sensor.datetime") as mock_dt:
-            mock_dt.now.return_value = t1
-            mock_dt.side_effect = lambda *a, **kw: datetime(*a, **kw)
-            sensor._handle_coordinator_update()
-        
-        # Should add: 5 + 3 = 8 kWh
-        assert sensor._value == pytest.approx(8.0, rel=0.01)
+        assert sensor._value == 0.0
+
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total (Huawei)", "3000", enpal_last_update="01/01/2024 12:01:00"),
+        ])
+        sensor._handle_coordinator_update()
+
+        # 4000 W * 60 s = 0.0667 kWh
+        assert sensor._value == pytest.approx(4000 * 60 / 3_600_000)
     
     def test_pattern_does_not_match_wrong_sensors(self, mock_hass, mock_coordinator):
         """Test that pattern matching is specific and doesn't match wrong sensors."""
-        mock_coordinator.data = [
-            {"name": "Inverter: Power AC", "value": "4800", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Battery: Power DC", "value": "1000", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power Reactive", "value": "100", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power AC", "4800", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Battery: Power DC", "1000", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power Reactive", "100", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor_names = [
             "Inverter: Power DC Total (Huawei)",
@@ -225,11 +205,11 @@ class TestCumulativeEnergySensorSelection:
         2. Generic 
         3. Calculated (lowest - least accurate)
         """
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "5100", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power DC Total Calculated", "value": "4900", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total", "5000", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power DC Total (Huawei)", "5100", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power DC Total Calculated", "4900", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor_names = [
             "Inverter: Power DC Total (Huawei)",
@@ -247,11 +227,11 @@ class TestCumulativeEnergySensorSelection:
         
         When both generic and calculated are available, generic should win.
         """
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power DC Total Calculated", "value": "4900", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power AC", "value": "4800", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total", "5000", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power DC Total Calculated", "4900", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power AC", "4800", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor = create_sensor_with_mocked_state(
             mock_hass, mock_coordinator, ["Inverter: Power DC Total"]
@@ -267,11 +247,11 @@ class TestCumulativeEnergySensorSelection:
         When both manufacturer-specific (e.g., Fronius) and generic are available,
         manufacturer-specific should win.
         """
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Fronius)", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power DC Total", "value": "4900", "timestamp": "01/01/2024 12:00:00"},
-            {"name": "Inverter: Power AC", "value": "4800", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total (Fronius)", "5000", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power DC Total", "4900", enpal_last_update="01/01/2024 12:00:00"),
+            SensorReading.create("Inverter: Power AC", "4800", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor = create_sensor_with_mocked_state(
             mock_hass, mock_coordinator, ["Inverter: Power DC Total (Fronius)"]
@@ -283,9 +263,9 @@ class TestCumulativeEnergySensorSelection:
     
     def test_sensor_selection_persistence(self, mock_hass, mock_coordinator):
         """Test that sensor selection persists across updates."""
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total (Huawei)", "5000", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor = create_sensor_with_mocked_state(
             mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"]
@@ -297,9 +277,9 @@ class TestCumulativeEnergySensorSelection:
         selected_sensor = sensor._active_source_uid
         
         # Second update - should use same sensor
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "6000", "timestamp": "01/01/2024 12:01:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total (Huawei)", "6000", enpal_last_update="01/01/2024 12:01:00"),
+        ])
         sensor._handle_coordinator_update()
         
         # Should still use same sensor (not re-detect)
@@ -307,9 +287,9 @@ class TestCumulativeEnergySensorSelection:
     
     def test_extra_state_attributes_shows_source(self, mock_hass, mock_coordinator):
         """Test that extra_state_attributes shows which sensor is used."""
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total Calculated", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-        ]
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total Calculated", "5000", enpal_last_update="01/01/2024 12:00:00"),
+        ])
         
         sensor = create_sensor_with_mocked_state(
             mock_hass, mock_coordinator, ["Inverter: Power DC Total Calculated"]
@@ -335,127 +315,114 @@ class TestCumulativeEnergySensorSelection:
         assert make_id("Inverter: Power DC Total SMA") == "inverter_power_dc_total_sma"
 
 
-class TestCumulativeEnergySensorElapsedTime:
-    """Test that the energy calculation uses real elapsed time, not the configured interval.
+class TestCumulativeEnergySensorBoxTime:
+    """The energy calculation is keyed by the box sample timestamps.
 
-    In WebSocket mode, updates arrive more frequently (e.g. every 15s) than the
-    configured polling interval (e.g. 60s).  Using the configured interval would
-    over-count energy by a factor of (interval / real_elapsed).
+    In WebSocket mode pushes arrive every few seconds and often re-deliver the
+    same box sample; HA wall-clock time between updates says nothing about how
+    long a power value was actually valid.
     """
 
-    def test_first_update_uses_fallback_interval(self, mock_hass, mock_coordinator):
-        """On the very first update, use the configured interval as fallback."""
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "6000", "timestamp": "01/01/2024 12:00:00"},
-        ]
+    def _sensor(self, mock_hass, mock_coordinator):
         sensor = create_sensor_with_mocked_state(
-            mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"], interval=60
+            mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"]
         )
         sensor._value = 0.0
+        return sensor
 
+    def _push(self, mock_coordinator, sensor, value, stamp):
+        mock_coordinator.data = SensorSnapshot([
+            SensorReading.create("Inverter: Power DC Total (Huawei)", value, enpal_last_update=stamp),
+        ])
         sensor._handle_coordinator_update()
 
-        # 6000 W * (60s / 3600) / 1000 = 0.1 kWh
-        assert sensor._value == pytest.approx(0.1, abs=1e-6)
-
-    def test_elapsed_time_used_for_subsequent_updates(self, mock_hass, mock_coordinator):
-        """After the first update, real elapsed time must be used."""
-        from datetime import datetime, timedelta
-
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "6000", "timestamp": "01/01/2024 12:00:00"},
-        ]
-        sensor = create_sensor_with_mocked_state(
-            mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"], interval=60
-        )
-        sensor._value = 0.0
-
-        # Simulate first update at a known time
-        t0 = datetime(2024, 6, 1, 12, 0, 0)
-        sensor._last_update_time = t0
-        sensor._active_source_uid = "inverter_power_dc_total_huawei"
-
-        # Simulate second update 15 seconds later (WebSocket push)
-        t1 = t0 + timedelta(seconds=15)
-        with patch("custom_components.enpal_webparser.sensor.datetime") as mock_dt:
-            mock_dt.now.return_value = t1
-            mock_dt.side_effect = lambda *a, **kw: datetime(*a, **kw)
-            sensor._handle_coordinator_update()
-
-        # 6000 W * (15s / 3600) / 1000 = 0.025 kWh
-        assert sensor._value == pytest.approx(0.025, abs=1e-6)
-
-    def test_rapid_updates_do_not_overcount(self, mock_hass, mock_coordinator):
-        """Simulate 4 rapid updates at 15s intervals — total must match 1 minute of production."""
-        from datetime import datetime, timedelta
-
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "3600", "timestamp": "01/01/2024 12:00:00"},
-        ]
-        sensor = create_sensor_with_mocked_state(
-            mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"], interval=60
-        )
-        sensor._value = 0.0
-        sensor._active_source_uid = "inverter_power_dc_total_huawei"
-
-        base_time = datetime(2024, 6, 1, 12, 0, 0)
-        sensor._last_update_time = base_time
-
-        # 4 updates, each 15 seconds apart — totalling 60 seconds
-        for i in range(1, 5):
-            t = base_time + timedelta(seconds=15 * i)
-            with patch("custom_components.enpal_webparser.sensor.datetime") as mock_dt:
-                mock_dt.now.return_value = t
-                mock_dt.side_effect = lambda *a, **kw: datetime(*a, **kw)
+    def test_first_sample_only_anchors(self, mock_hass, mock_coordinator):
+        """No energy is invented for the time before the first sample."""
+        sensor = self._sensor(mock_hass, mock_coordinator)
+        self._push(mock_coordinator, sensor, "6000", "2024-06-01T12:00:00+00:00")
+        assert sensor._value == 0.0
+        assert sensor.extra_state_attributes["last_updated"] == "2024-06-01T12:00:00+00:00"
+
+    def test_trapezoid_over_box_time(self, mock_hass, mock_coordinator):
+        sensor = self._sensor(mock_hass, mock_coordinator)
+        self._push(mock_coordinator, sensor, "6000", "2024-06-01T12:00:00+00:00")
+        self._push(mock_coordinator, sensor, "3000", "2024-06-01T12:00:15+00:00")
+
+        # (6000 + 3000) / 2 W * 15 s = 0.01875 kWh
+        assert sensor._value == pytest.approx(0.01875, abs=1e-9)
+
+    def test_redelivered_samples_do_not_overcount(self, mock_hass, mock_coordinator):
+        """Four pushes of one sample, then the next sample 60 s later."""
+        sensor = self._sensor(mock_hass, mock_coordinator)
+        for _ in range(4):
+            self._push(mock_coordinator, sensor, "3600", "2024-06-01T12:00:00+00:00")
+        self._push(mock_coordinator, sensor, "3600", "2024-06-01T12:01:00+00:00")
+        for _ in range(3):
+            self._push(mock_coordinator, sensor, "3600", "2024-06-01T12:01:00+00:00")
+
+        # 3600 W * 60 s = 0.06 kWh, however often the samples were pushed.
+        assert sensor._value == pytest.approx(0.06, abs=1e-9)
+        assert sensor.async_write_ha_state.call_count == 2
+
+    def test_gap_is_bounded_by_max_hold(self, mock_hass, mock_coordinator):
+        sensor = self._sensor(mock_hass, mock_coordinator)
+        self._push(mock_coordinator, sensor, "1200", "2024-06-01T12:00:00+00:00")
+        self._push(mock_coordinator, sensor, "6000", "2024-06-01T13:00:00+00:00")
+
+        # Box silent for an hour: the last 1200 W are held for 300 s only.
+        assert sensor._value == pytest.approx(1200 * 300 / 3_600_000, abs=1e-9)
+
+    def test_negative_dc_power_is_not_subtracted(self, mock_hass, mock_coordinator):
+        sensor = self._sensor(mock_hass, mock_coordinator)
+        self._push(mock_coordinator, sensor, "-20", "2024-06-01T12:00:00+00:00")
+        self._push(mock_coordinator, sensor, "-20", "2024-06-01T12:00:30+00:00")
+        assert sensor._value == 0.0
+
+
+class TestIntegratedMetricSplit:
+    """Signed power sensors feed one counter per direction."""
+
+    def _replay(self, mock_coordinator, name, watts):
+        sensors = {}
+        for metric in INTEGRATED_METRICS:
+            if make_id(name) in metric.sources:
+                sensor = IntegratedEnergySensor(mock_coordinator, metric)
+                sensor.async_write_ha_state = Mock()
+                sensor._value = 0.0
+                sensors[metric.unique_id] = sensor
+        for step, value in enumerate(watts):
+            mock_coordinator.data = SensorSnapshot([
+                SensorReading.create(
+                    name, value, enpal_last_update=f"2024-06-01T12:{step * 36 // 60:02d}:{step * 36 % 60:02d}+00:00"
+                ),
+            ])
+            for sensor in sensors.values():
                 sensor._handle_coordinator_update()
+        return {uid: sensor._value for uid, sensor in sensors.items()}
 
-        # 3600 W * (60s total / 3600) / 1000 = 0.06 kWh
-        # This is the same result as a single 60s poll — no overcounting.
-        assert sensor._value == pytest.approx(0.06, abs=1e-6)
-
-    def test_old_interval_would_overcount(self, mock_hass, mock_coordinator):
-        """Demonstrate that using the fixed interval in the same scenario would overcount.
-
-        With 4 updates at 15s intervals but interval=60s the old code would have
-        calculated 4 * (3600 * 60/3600 / 1000) = 4 * 0.06 = 0.24 kWh instead of
-        the correct 0.06 kWh — a 4× overcounting.
-
-        This test verifies the fix by asserting the correct value (0.06 kWh).
-        """
-        from datetime import datetime, timedelta
-
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "3600", "timestamp": "01/01/2024 12:00:00"},
-        ]
-        sensor = create_sensor_with_mocked_state(
-            mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"], interval=60
+    def test_battery_charge_and_discharge(self, mock_coordinator):
+        # 36 s steps; positive = charging, negative = discharging.
+        values = self._replay(
+            mock_coordinator, "Inverter: Power Battery Charge/Discharge",
+            ["2000", "1000", "-1000", "-3000", "0"],
         )
-        sensor._value = 0.0
-        sensor._active_source_uid = "inverter_power_dc_total_huawei"
-
-        base_time = datetime(2024, 6, 1, 12, 0, 0)
-        sensor._last_update_time = base_time
-
-        for i in range(1, 5):
-            t = base_time + timedelta(seconds=15 * i)
-            with patch("custom_components.enpal_webparser.sensor.datetime") as mock_dt:
-                mock_dt.now.return_value = t
-                mock_dt.side_effect = lambda *a, **kw: datetime(*a, **kw)
-                sensor._handle_coordinator_update()
+        # Charged: (2000 + 1000) / 2 * 36 + (1000 + 0) / 2 * 36 Ws = 20 Wh
+        # Discharged: (0 + 1000) / 2 * 36 + (1000 + 3000) / 2 * 36
+        #             + (3000 + 0) / 2 * 36 Ws = 40 Wh
+        assert values == {
+            "integrated_energy_battery_charge_kwh": pytest.approx(0.02, abs=1e-9),
+            "integrated_energy_battery_discharge_kwh": pytest.approx(0.04, abs=1e-9),
+        }
 
-        # Must NOT be 0.24 (the old bug) — must be 0.06
-        assert sensor._value != pytest.approx(0.24, abs=0.01)
-        assert sensor._value == pytest.approx(0.06, abs=1e-6)
-        
-        # Verify sensor uses same transformation
-        mock_coordinator.data = [
-            {"name": "Inverter: Power DC Total (Huawei)", "value": "5000", "timestamp": "01/01/2024 12:00:00"},
-        ]
-        
-        sensor = create_sensor_with_mocked_state(
-            mock_hass, mock_coordinator, ["Inverter: Power DC Total (Huawei)"]
+    def test_grid_import_and_export(self, mock_coordinator):
+        # 36 s steps; positive = import, negative = export.
+        values = self._replay(
+            mock_coordinator, "PowerSensor: Power Grid Net",
+            ["-500", "-1500", "1000", "3000"],
         )
-        sensor._handle_coordinator_update()
-        
-        # Should match make_id output
-        assert sensor._active_source_uid == make_id("Inverter: Power DC Total (Huawei)")
+        # Import: (0 + 1000) / 2 * 36 + (1000 + 3000) / 2 * 36 Ws = 25 Wh
+        # Export: (500 + 1500) / 2 * 36 + (1500 + 0) / 2 * 36 Ws = 17.5 Wh
+        assert values == {
+            "integrated_energy_grid_import_kwh": pytest.approx(0.025, abs=1e-9),
+            "integrated_energy_grid_export_kwh": pytest.approx(0.0175, abs=1e-9),
+        }
@@ -0,0 +1,113 @@
+"""Tests for box timestamp normalization (enpal_last_update)."""
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.util import dt as dt_util
+import pytest
+
+from custom_components.enpal_webparser import timestamps
+from custom_components.enpal_webparser.const import DEFAULT_GROUPS
+from custom_components.enpal_webparser.energy_integrator import EnergyIntegrator
+from custom_components.enpal_webparser.timestamps import (
+    normalize_timestamp,
+    parse_box_datetime,
+)
+from custom_components.enpal_webparser.utils import parse_enpal_html_sensors
+
+
+def test_firmware_850_us_format_with_am_pm():
+    # The 8.50 page separates the AM/PM marker with a narrow no-break space.
+    assert normalize_timestamp("6/5/2025 12:51:40\u202fPM") == "2025-06-05T12:51:40+00:00"
+    assert normalize_timestamp("6/5/2025 1:05:00 PM") == "2025-06-05T13:05:00+00:00"
+    assert normalize_timestamp("6/5/2025 12:10:40 AM") == "2025-06-05T00:10:40+00:00"
+    assert normalize_timestamp("06/05/2025 10:12:01") == "2025-06-05T10:12:01+00:00"
+
+
+def test_firmware_851_dated_values():
+    assert normalize_timestamp("2026-07-31 06:38:38.870Z") == "2026-07-31T06:38:38.870000+00:00"
+    assert normalize_timestamp("2026-07-30 14:05:15.00") == "2026-07-30T14:05:15+00:00"
+    # Stale readings carry a warning sign after the zone.
+    assert normalize_timestamp("2026-07-31 06:32:38.002Z⚠️") == "2026-07-31T06:32:38.002000+00:00"
+    assert normalize_timestamp("2026-07-31T08:38:38+02:00") == "2026-07-31T08:38:38+02:00"
+
+
+@pytest.fixture
+def berlin():
+    previous = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Berlin"))
+    yield
+    dt_util.set_default_time_zone(previous)
+
+
+def test_zone_less_values_are_box_local_time(berlin):
+    assert normalize_timestamp("6/5/2025 12:51:40\u202fPM") == "2025-06-05T12:51:40+02:00"
+    assert normalize_timestamp("2026-01-15 08:00:00.00") == "2026-01-15T08:00:00+01:00"
+    # An explicit zone wins.
+    assert normalize_timestamp("2026-07-31 06:38:38.870Z") == "2026-07-31T06:38:38.870000+00:00"
+
+
+def test_integration_across_dst_change(berlin):
+    """Clocks go from 02:00 CET to 03:00 CEST: the samples are 30 s apart."""
+    before = parse_box_datetime("3/29/2026 1:59:30 AM")
+    after = parse_box_datetime("3/29/2026 3:00:00 AM")
+    assert (before.isoformat(), after.isoformat()) == (
+        "2026-03-29T01:59:30+01:00", "2026-03-29T03:00:00+02:00"
+    )
+
+    integrator = EnergyIntegrator()
+    integrator.add(before, 3600)
+    # 3600 W * 30 s; read as wall-clock time the gap would be an hour.
+    assert integrator.add(after, 3600) == pytest.approx(0.03)
+
+
+def test_time_only_resolves_against_box_date(monkeypatch):
+    monkeypatch.setattr(timestamps, "_box_now", None)
+    box_now = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(minutes=5)
+    normalize_timestamp(box_now.strftime("%Y-%m-%d %H:%M:%S.00Z"))
+
+    clock = (box_now - timedelta(minutes=1)).strftime("%H:%M:%S.25")
+    resolved = parse_box_datetime(clock)
+    assert resolved == (box_now - timedelta(minutes=1)).replace(microsecond=250000)
+    assert normalize_timestamp(clock) == resolved.isoformat()
+
+
+def test_time_only_rolls_back_across_midnight():
+    just_after_midnight = datetime(2026, 8, 1, 0, 5, tzinfo=timezone.utc)
+    assert timestamps._box_day((23, 59, 58, 0), just_after_midnight).isoformat() == "2026-07-31"
+    assert timestamps._box_day((0, 4, 0, 0), just_after_midnight).isoformat() == "2026-08-01"
+
+
+def test_time_only_rolls_forward_after_midnight(berlin, monkeypatch):
+    """The latest dated value is from 23:00; the box clock has passed midnight."""
+    host_now = datetime(2026, 10, 19, 0, 30, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    monkeypatch.setattr(timestamps.dt_util, "now", lambda time_zone=None: host_now)
+    for dated in ("2026-10-18 23:00:00.00", "2026-10-18 21:00:00.000Z"):
+        monkeypatch.setattr(timestamps, "_box_now", None)
+        normalize_timestamp(dated)
+        # Box-local time, whatever zone the dated value was written in.
+        assert normalize_timestamp("00:30:00.00") == "2026-10-19T00:30:00+02:00"
+    assert normalize_timestamp("22:59:58.00") == "2026-10-18T22:59:58+02:00"
+    assert parse_box_datetime("00:30:00.00") - parse_box_datetime("23:00:00.00") == timedelta(minutes=90)
+
+
+def test_unparseable_values_pass_through():
+    assert normalize_timestamp("ungültig") == "ungültig"
+    assert normalize_timestamp("99:99:99.00") == "99:99:99.00"
+    assert normalize_timestamp("") is None
+    assert normalize_timestamp(None) is None
+    assert parse_box_datetime("ungültig") is None
+
+
+def test_real_html_851_timestamps_are_timezone_aware(real_html_851):
+    sensors = parse_enpal_html_sensors(real_html_851, DEFAULT_GROUPS)
+    stamps = [s.enpal_last_update for s in sensors if s.enpal_last_update]
+    assert stamps
+    for stamp in stamps:
+        assert datetime.fromisoformat(stamp).tzinfo is not None
+
+
+def test_real_html_850_timestamps_are_timezone_aware(real_html):
+    sensors = parse_enpal_html_sensors(real_html, DEFAULT_GROUPS)
+    stamps = {s.enpal_last_update for s in sensors if s.enpal_last_update}
+    assert "2025-06-05T12:51:40+00:00" in stamps
+    for stamp in stamps:
+        assert datetime.fromisoformat(stamp).tzinfo is not None
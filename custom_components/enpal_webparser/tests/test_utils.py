@@ -10,14 +10,22 @@
 # To run: pytest custom_components/enpal_webparser/tests/test_utils.py
 #
 
+import pytest
+
 from custom_components.enpal_webparser.utils import (
     make_id,
     get_numeric_value,
     get_class_and_unit,
     normalize_value_and_unit,
+    format_deadbands,
+    parse_deadbands,
     parse_enpal_html_sensors
 )
-from custom_components.enpal_webparser.const import UNIT_DEVICE_CLASS_MAP, DEFAULT_UNITS
+from custom_components.enpal_webparser.const import (
+    UNIT_DEVICE_CLASS_MAP,
+    DEFAULT_UNITS,
+    WRITE_DEADBANDS_BY_DEVICE_CLASS,
+)
 
 
 def load_html_fixture(name):
@@ -81,11 +89,11 @@ def test_parse_enpal_html_sensors_basic():
     result = parse_enpal_html_sensors(html, groups=["Inverter"])
     assert len(result) == 1
     sensor = result[0]
-    assert sensor["name"].startswith("Inverter")
-    assert sensor["value"] == "1234"
-    assert sensor["unit"] == "kWh"
-    assert sensor["device_class"] == "energy"
-    assert sensor["enpal_last_update"].startswith("2025-06-05T10:12:01")
+    assert sensor.name.startswith("Inverter")
+    assert sensor.value == "1234"
+    assert sensor.unit == "kWh"
+    assert sensor.device_class == "energy"
+    assert sensor.enpal_last_update.startswith("2025-06-05T10:12:01")
 
 def test_parse_enpal_html_sensors_ignore_wrong_group():
     """Deselected groups are parsed but their entities default to disabled."""
@@ -100,8 +108,8 @@ def test_parse_enpal_html_sensors_ignore_wrong_group():
     '''
     result = parse_enpal_html_sensors(html, groups=["Inverter"])
     assert len(result) == 1
-    assert result[0]["group"] == "Battery"
-    assert result[0]["enabled"] is False
+    assert result[0].group == "Battery"
+    assert result[0].enabled is False
 
 
 def test_parse_full_enpal_html():
@@ -109,3 +117,20 @@ def test_parse_full_enpal_html():
     sensors = parse_enpal_html_sensors(html, groups=["Inverter", "Battery", "Wallbox"])
     assert len(sensors) > 0
     # ... 
+
+
+def test_deadbands_round_trip_through_the_options_text():
+    text = format_deadbands(WRITE_DEADBANDS_BY_DEVICE_CLASS)
+    assert "power=10:0.02" in text and "voltage=1," in text
+    assert parse_deadbands(text) == WRITE_DEADBANDS_BY_DEVICE_CLASS
+    assert parse_deadbands(" power = 5 \n current=0.2:0.1,") == {
+        "power": (5.0, 0.0),
+        "current": (0.2, 0.1),
+    }
+    assert parse_deadbands("") == {}
+
+
+@pytest.mark.parametrize("text", ["power", "=5", "power=", "power=-1", "power=1:x", "power=nan"])
+def test_invalid_deadbands_are_rejected(text):
+    with pytest.raises(ValueError):
+        parse_deadbands(text)
@@ -31,17 +31,17 @@ def test_parse_enpal_html_sensors_returns_expected_sensors(sample_html):
 
     assert len(sensors) == 3
 
-    names = [s["name"] for s in sensors]
+    names = [s.name for s in sensors]
     assert "Wechselrichter: Leistung AC" in names
     assert "Wechselrichter: Spannung" in names
     assert "Batterie: Kapazität" in names
 
     for sensor in sensors:
-        assert "value" in sensor
-        assert "unit" in sensor
-        assert "device_class" in sensor
-        assert "enpal_last_update" in sensor
-        assert sensor["enabled"] is True
+        assert hasattr(sensor, "value")
+        assert hasattr(sensor, "unit")
+        assert hasattr(sensor, "device_class")
+        assert hasattr(sensor, "enpal_last_update")
+        assert sensor.enabled is True
 
 def test_ignores_cards_not_in_groups(sample_html):
     """Deselected groups are still parsed; their entities default to disabled."""
@@ -49,9 +49,9 @@ def test_ignores_cards_not_in_groups(sample_html):
         sample_html, groups=["Wechselrichter"], excluded_groups=["Batterie"]
     )
     assert len(sensors) == 3
-    by_group = {s["group"]: s for s in sensors}
-    assert by_group["Wechselrichter"]["enabled"] is True
-    assert by_group["Batterie"]["enabled"] is False
+    by_group = {s.group: s for s in sensors}
+    assert by_group["Wechselrichter"].enabled is True
+    assert by_group["Batterie"].enabled is False
 
 def test_handles_invalid_timestamp_gracefully():
     html = '''
@@ -65,4 +65,4 @@ def test_handles_invalid_timestamp_gracefully():
     '''
     sensors = parse_enpal_html_sensors(html, groups=["Testgruppe"])
     assert len(sensors) == 1
-    assert sensors[0]["enpal_last_update"] == "ungültig"
\ No newline at end of file
+    assert sensors[0].enpal_last_update == "ungültig"
\ No newline at end of file
@@ -8,9 +8,12 @@
 # To run: pytest custom_components/enpal_webparser/tests/test_wallbox_api.py
 #
 
+import asyncio
+
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from custom_components.enpal_webparser.api.wallbox_client import WallboxBlazorClient
 from custom_components.enpal_webparser.wallbox_api import WallboxApiClient
 
 
@@ -89,7 +92,7 @@ async def test_no_box_url_uses_addon_only():
 async def test_call_and_refresh_maps_endpoint_and_refreshes():
     """call_and_refresh_sensors maps the endpoint to an action and refreshes."""
     client = _make_client("http://192.168.1.50", use_native=False)
-    client.set_mode_eco = AsyncMock(return_value=True)
+    client._commands._execute = AsyncMock(return_value=True)
 
     hass = client._hass
     hass.services = MagicMock()
@@ -102,5 +105,198 @@ async def test_call_and_refresh_maps_endpoint_and_refreshes():
     )
 
     assert result is True
-    client.set_mode_eco.assert_awaited_once()
+    client._commands._execute.assert_awaited_once()
+    assert client._commands._execute.await_args.args[2] == "/set_eco"
     hass.services.async_call.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_call_and_refresh_resolves_on_circuit_confirmation():
+    """With the circuit open the pushed status confirms the action; no refresh."""
+    client = _make_client("http://192.168.1.50", use_native=False)
+    client._commands._execute = AsyncMock(return_value=True)
+    callback = MagicMock()
+    client.set_status_callback(callback)
+    blazor = WallboxBlazorClient("http://192.168.1.50")
+    blazor.is_circuit_open = MagicMock(return_value=True)
+    blazor._mode, blazor._status = "Eco", "Connected"
+    client._blazor_client = blazor
+    client._hass.services.async_call = AsyncMock()
+
+    async def _push_later():
+        await asyncio.sleep(0.01)
+        blazor._mode = "Solar"
+        blazor._status_event.set()
+
+    pusher = asyncio.ensure_future(_push_later())
+    result = await client.call_and_refresh_sensors(
+        "/set_solar", sensor_entities=["sensor.wallbox_lademodus"]
+    )
+    await pusher
+
+    assert result is True
+    callback.assert_called_once_with(
+        {"mode": "solar", "status": "connected", "success": True}
+    )
+    client._hass.services.async_call.assert_not_awaited()
+
+    # Not confirmed in time: the sensors are refreshed instead.
+    callback.reset_mock()
+    assert await client.call_and_refresh_sensors(
+        "/start", sensor_entities=["sensor.wallbox_status"], timeout=0.01
+    ) is True
+    callback.assert_not_called()
+    client._hass.services.async_call.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_call_and_refresh_refreshes_native_source_sensors_after_confirmation():
+    """Sensors read from /deviceMessages get no circuit push; they are refreshed at once."""
+    client = _make_client("http://192.168.1.50", use_native=True)
+    client._commands._execute = AsyncMock(return_value=True)
+    blazor = WallboxBlazorClient("http://192.168.1.50")
+    blazor.is_circuit_open = MagicMock(return_value=True)
+    blazor._mode = "Eco"
+    client._blazor_client = blazor
+    client._hass.services.async_call = AsyncMock()
+
+    with patch("asyncio.sleep", AsyncMock()) as sleep:
+        assert await client.call_and_refresh_sensors(
+            "/set_eco", sensor_entities=["sensor.wallbox_lademodus"]
+        ) is True
+
+    sleep.assert_not_awaited()
+    client._hass.services.async_call.assert_awaited_once_with(
+        "homeassistant", "update_entity",
+        {"entity_id": ["sensor.wallbox_lademodus"]}, blocking=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_serves_status_without_http():
+    """HTTP is only polled while the circuit is down."""
+    client = WallboxBlazorClient("http://192.168.1.50")
+    client._fetch_status_via_http = AsyncMock(return_value=("Eco", "Connected"))
+    client._mode, client._status = "Solar", "Charging"
+    client.connected = True
+    client.ws = MagicMock(closed=False)
+
+    assert (await client.get_wallbox_data())["mode"] == "solar"
+    client._fetch_status_via_http.assert_not_awaited()
+
+    client.connected = False
+    assert (await client.get_wallbox_data())["mode"] == "eco"
+    client._fetch_status_via_http.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_status_callback_reaches_native_blazor_client_only():
+    """Native mode hands the callback to the Blazor client it creates."""
+    native = _make_client("http://192.168.1.50", use_native=True)
+    callback = MagicMock()
+    native.set_status_callback(callback)
+    with patch.object(WallboxBlazorClient, "ensure_fresh_connection", AsyncMock(return_value=True)):
+        await native._ensure_blazor_client()
+    assert native._blazor_client._status_callback is callback
+
+    legacy = _make_client("http://192.168.1.50", use_native=False)
+    legacy.set_status_callback(callback)
+    with patch.object(WallboxBlazorClient, "ensure_fresh_connection", AsyncMock(return_value=True)):
+        await legacy._ensure_blazor_client()
+    assert legacy._blazor_client._status_callback is None
+
+
+@pytest.mark.asyncio
+async def test_queued_mode_change_is_replaced_by_the_latest():
+    """Clicks run one at a time; only the last waiting mode is sent, and
+    a mode change never overtakes a start/stop queued before it."""
+    client = _make_client("http://192.168.1.50", use_native=True)
+    release = asyncio.Event()
+    sent, running = [], []
+
+    async def fake_execute(name, blazor_action, addon_endpoint):
+        running.append(name)
+        assert len(running) == 1  # never two clicks at once
+        sent.append(addon_endpoint)
+        if addon_endpoint == "/set_eco":
+            await release.wait()
+        running.remove(name)
+        return addon_endpoint != "/set_full"
+
+    client._commands._execute = fake_execute
+    first = asyncio.ensure_future(client.set_mode_eco())
+    await asyncio.sleep(0)
+    others = []
+    for action in (client.set_mode_solar, client.set_mode_full, client.start_charging, client.set_mode_smart):
+        others.append(asyncio.ensure_future(action()))
+        await asyncio.sleep(0)
+    assert client.command_stats["depth"] == 4
+
+    release.set()
+    results = await asyncio.gather(first, *others)
+
+    assert sent == ["/set_eco", "/set_full", "/start", "/set_smart"]
+    # The replaced Solar request reports the result of Full.
+    assert results == [True, False, False, True, True]
+    stats = client.command_stats
+    assert (stats["depth"], stats["commands"], stats["coalesced"]) == (0, 4, 1)
+    assert stats["latency_p95_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_replaced_mode_change_confirms_the_mode_that_ran():
+    """A caller whose mode change was replaced waits for the replacement's mode."""
+    client = _make_client("http://192.168.1.50", use_native=True)
+    blazor = WallboxBlazorClient("http://192.168.1.50")
+    blazor.is_circuit_open = MagicMock(return_value=True)
+    blazor._mode = "Eco"
+    client._blazor_client = blazor
+    client._hass.services.async_call = AsyncMock()
+    client.set_status_callback(MagicMock())
+    release = asyncio.Event()
+
+    async def fake_execute(name, blazor_action, addon_endpoint):
+        if addon_endpoint == "/set_eco":
+            await release.wait()
+        else:
+            blazor._mode = addon_endpoint[len("/set_"):].capitalize()
+            blazor._status_event.set()
+        return True
+
+    client._commands._execute = fake_execute
+    running = asyncio.ensure_future(client.set_mode_eco())
+    await asyncio.sleep(0)
+    replaced = asyncio.ensure_future(
+        client.call_and_refresh_sensors("/set_solar", ["sensor.wallbox_lademodus"])
+    )
+    await asyncio.sleep(0)
+    replacement = asyncio.ensure_future(
+        client.call_and_refresh_sensors("/set_full", ["sensor.wallbox_lademodus"])
+    )
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.wait_for(asyncio.gather(running, replaced, replacement), timeout=1)
+    assert results == [True, True, True]
+    # Confirmed by the Full mode; no timeout and forced refresh for Solar.
+    client._hass.services.async_call.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_waiting_callers_share_one_reconnect():
+    """Concurrent callers wait for the reconnect in progress instead of starting their own."""
+    client = _make_client("http://192.168.1.50", use_native=True)
+    connects = []
+
+    async def fake_ensure(self):
+        if not self.connected:
+            connects.append(1)
+            await asyncio.sleep(0.01)
+            self.connected = True
+        return True
+
+    with patch.object(WallboxBlazorClient, "ensure_fresh_connection", fake_ensure):
+        results = await asyncio.gather(*(client._ensure_blazor_client() for _ in range(3)))
+
+    assert results == [True, True, True]
+    assert connects == [1]
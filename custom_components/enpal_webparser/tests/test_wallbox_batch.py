@@ -0,0 +1,115 @@
+"""Tests for the /wallbox RenderBatch extraction (string table + frames).
+
+Fixtures are captures of a live /wallbox circuit (firmware 8.49):
+``wallbox_render_batch_initial.bin`` renders the wallbox cards,
+``wallbox_render_batch_layout.bin`` only the page layout and navigation.
+"""
+import os
+import struct
+
+from custom_components.enpal_webparser.api.render_batch import (
+    WallboxBatchState,
+    extract_wallbox_state,
+    parse_render_batch_strings,
+)
+from custom_components.enpal_webparser.api.wallbox_client import WallboxBlazorClient
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _load(name: str) -> bytes:
+    with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+        return f.read()
+
+
+def _replace_strings(raw: bytes, replacements: dict) -> bytes:
+    """Same batch with some string table entries replaced.
+
+    The new strings are appended after the existing ones; only the string
+    table (the last section) and its footer offset move.
+    """
+    table_offset = struct.unpack_from("<i", raw, len(raw) - 4)[0]
+    strings = parse_render_batch_strings(raw)
+    offsets = list(struct.unpack_from("<%di" % len(strings), raw, table_offset))
+    extra = bytearray()
+    for index, text in enumerate(strings):
+        if text in replacements:
+            encoded = replacements[text].encode()
+            offsets[index] = table_offset + len(extra)
+            extra += bytes([len(encoded)]) + encoded
+    new_table_offset = table_offset + len(extra)
+    footer = list(struct.unpack_from("<5i", raw, len(raw) - 20))
+    footer[4] = new_table_offset
+    return (
+        raw[:table_offset] + bytes(extra)
+        + struct.pack("<%di" % len(offsets), *offsets)
+        + struct.pack("<5i", *footer)
+    )
+
+
+def test_initial_batch_yields_mode_status_and_labelled_handlers():
+    state = extract_wallbox_state(_load("wallbox_render_batch_initial.bin"))
+    assert state == WallboxBatchState(
+        mode="Eco",
+        status="Connected",
+        handlers={"start": 3, "stop": 4, "eco": 5, "full": 6, "solar": 7, "smart": 8},
+    )
+
+
+def test_layout_batch_navigation_handlers_are_not_buttons():
+    assert extract_wallbox_state(_load("wallbox_render_batch_layout.bin")) == WallboxBatchState()
+
+
+def test_changed_values_are_read_from_the_string_table():
+    raw = _replace_strings(
+        _load("wallbox_render_batch_initial.bin"), {"Eco": "Solar", "Connected": "Charging"}
+    )
+    state = extract_wallbox_state(raw)
+    assert (state.mode, state.status) == ("Solar", "Charging")
+    assert state.handlers["smart"] == 8
+
+
+def test_unlabelled_mode_value_is_still_recognised():
+    raw = _replace_strings(
+        _load("wallbox_render_batch_initial.bin"), {"Mode ": "", "Eco": "Full"}
+    )
+    assert extract_wallbox_state(raw).mode == "Full"
+
+
+def test_malformed_batch_yields_empty_state():
+    raw = bytearray(_load("wallbox_render_batch_initial.bin"))
+    struct.pack_into("<i", raw, len(raw) - 16, len(raw))  # frames past the end
+    assert extract_wallbox_state(bytes(raw)) == WallboxBatchState()
+    assert extract_wallbox_state(b"") == WallboxBatchState()
+
+
+def test_client_applies_batch_and_pushes_status_once():
+    client = WallboxBlazorClient("http://192.168.1.50")
+    pushed = []
+    client.set_status_callback(pushed.append)
+    raw = _load("wallbox_render_batch_initial.bin")
+
+    client._process_render_batch(raw)
+    client._process_render_batch(raw)
+    client._process_render_batch(_load("wallbox_render_batch_layout.bin"))
+
+    assert pushed == [{"mode": "eco", "status": "connected", "success": True}]
+    assert client._button_handlers["solar"] == 7
+
+
+def test_partial_batch_keeps_the_other_button_handlers():
+    client = WallboxBlazorClient("http://192.168.1.50")
+    client._process_render_batch(_load("wallbox_render_batch_initial.bin"))
+
+    # A diff that re-renders only the Smart button (with a new handler id).
+    labels = ["Start Charging", "Stop Charging", "Set Eco", "Set Full", "Set Solar"]
+    raw = _replace_strings(
+        _load("wallbox_render_batch_initial.bin"), {label: "" for label in labels}
+    )
+    assert extract_wallbox_state(raw).handlers == {"smart": 8}
+    client._button_handlers["smart"] = 99
+    client._process_render_batch(raw)
+
+    assert client._button_handlers == {
+        "start": 3, "stop": 4, "eco": 5, "full": 6, "solar": 7, "smart": 8
+    }
@@ -0,0 +1,91 @@
+"""Tests for the /wallbox circuit liveness, pre-warm and click confirmation."""
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from custom_components.enpal_webparser.api.wallbox_client import WallboxBlazorClient
+
+
+def _connected_client(last_activity_age=0.0):
+    client = WallboxBlazorClient("http://192.168.1.50")
+    client.ws = MagicMock(closed=False)
+    client.ws.close = AsyncMock()
+    client.connected = True
+    client._last_activity = time.monotonic() - last_activity_age
+    return client
+
+
+@pytest.mark.asyncio
+async def test_quiet_but_live_connection_is_reused():
+    client = _connected_client()
+    client.connect = AsyncMock(return_value=True)
+    assert await client.ensure_fresh_connection()
+    client.connect.assert_not_called()
+
+    client._last_activity -= client._PING_INTERVAL * 3 + 1  # box went silent
+    assert await client.ensure_fresh_connection()
+    client.connect.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_missing_pong_drops_the_connection():
+    client = _connected_client()
+    client._PING_INTERVAL = 0
+    client._PONG_TIMEOUT = 0.01
+    pings = []
+
+    async def fake_ping():
+        pings.append(1)
+        if len(pings) == 1:
+            client._pong_waiter.set_result(None)
+
+    client.ws.ping = fake_ping
+    client.ws.send_bytes = AsyncMock()
+    await asyncio.wait_for(client._ping_loop(), timeout=1)
+
+    assert len(pings) == 2
+    assert client.ping_rtt is not None
+    assert not client.connected
+    client.ws.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_lost_connection_reconnects_in_the_background():
+    client = WallboxBlazorClient("http://192.168.1.50")
+    client._PREWARM_MIN_DELAY = 0
+    client.connect = AsyncMock(side_effect=[False, True])
+
+    client._schedule_prewarm()
+    client._schedule_prewarm()  # already running
+    await client._prewarm_task
+    assert client.connect.await_count == 2
+
+    await client.close()
+    client._schedule_prewarm()
+    assert client._prewarm_task is None
+
+
+@pytest.mark.asyncio
+async def test_mode_click_waits_for_the_pushed_mode():
+    client = WallboxBlazorClient("http://192.168.1.50")
+    client.ensure_fresh_connection = AsyncMock(return_value=True)
+    client._button_handlers = {"solar": 7, "start": 3}
+    client._mode = "Eco"
+    loop = asyncio.get_running_loop()
+
+    def _render(mode):
+        client._mode = mode
+        client._status_event.set()
+
+    async def fake_send(msg):
+        client._click_event.set()  # ack first, the RenderBatch follows
+        loop.call_later(0.01, _render, "Solar")
+
+    client._send_message = fake_send
+    assert await client.click_button("solar")
+    assert client.get_mode() == "Solar"
+    assert len(client.confirm_latencies) == 1
+
+    assert await client.wait_for_status(lambda data: data["mode"] == "eco", timeout=0.01) is None
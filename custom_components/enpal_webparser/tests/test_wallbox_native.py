@@ -11,7 +11,8 @@
 from pathlib import Path
 from types import SimpleNamespace
 
-from custom_components.enpal_webparser.utils import make_id, parse_enpal_html_sensors
+from custom_components.enpal_webparser.models import SensorSnapshot
+from custom_components.enpal_webparser.utils import parse_enpal_html_sensors
 from custom_components.enpal_webparser.sensor import (
     _find_wallbox_source,
     WallboxNativeModeSensor,
@@ -31,7 +32,7 @@ def _load_850_wallbox_sensors():
 
 def test_850_fixture_exposes_mode_and_status_keys():
     sensors = _load_850_wallbox_sensors()
-    keys = {make_id(s["name"]) for s in sensors}
+    keys = {s.sensor_id for s in sensors}
     assert "wallbox_mode_charge_connector_1" in keys
     assert "status_wallbox_connector_1" in keys
 
@@ -67,7 +68,7 @@ def test_find_wallbox_source_returns_none_when_missing():
 
 def test_native_mode_sensor_returns_raw_value():
     sensors = _load_850_wallbox_sensors()
-    coordinator = SimpleNamespace(data=sensors)
+    coordinator = SimpleNamespace(data=SensorSnapshot(sensors))
     sensor = WallboxNativeModeSensor(coordinator, "wallbox_mode_charge_connector_1")
     assert sensor.native_value == "Solar"
     assert sensor.unique_id == "wallbox_mode"
@@ -76,7 +77,7 @@ def test_native_mode_sensor_returns_raw_value():
 
 def test_native_status_sensor_lowercases_value():
     sensors = _load_850_wallbox_sensors()
-    coordinator = SimpleNamespace(data=sensors)
+    coordinator = SimpleNamespace(data=SensorSnapshot(sensors))
     sensor = WallboxNativeStatusSensor(coordinator, "status_wallbox_connector_1")
     # "Charging" must be normalized to "charging" for the power-zeroing logic.
     assert sensor.native_value == "charging"
@@ -85,6 +86,6 @@ def test_native_status_sensor_lowercases_value():
 
 
 def test_native_sensor_returns_none_when_key_absent():
-    coordinator = SimpleNamespace(data=[])
+    coordinator = SimpleNamespace(data=SensorSnapshot())
     sensor = WallboxNativeModeSensor(coordinator, "wallbox_mode_charge_connector_1")
     assert sensor.native_value is None
@@ -0,0 +1,222 @@
+#
+# Home Assistant Custom Component: Enpal Webparser
+#
+# File: timestamps.py
+#
+# Description:
+#   Normalizes the "Timestamp" column of every firmware into timezone-aware
+#   ISO strings for ``enpal_last_update``:
+#     8.50 HTML:     6/5/2025 12:51:40 PM   (narrow no-break space before PM)
+#     8.51 HTML/WS:  2026-07-31 06:38:38.870Z, 2026-07-30 14:05:15.00
+#     8.51 today:    18:19:44.00            (time only, resolved to the box date)
+#   Zone-less and time-only values are box-local time, read in the Home
+#   Assistant time zone. Parsing
+#   is done by hand on fixed positions and cached: one scrape carries ~150
+#   rows but only a handful of distinct seconds.
+#
+# Author:       Oliver Stock (github.com/derolli1976)
+# License:      MIT
+# Repository:   https://github.com/derolli1976/enpal
+#
+# Compatible with Home Assistant Core 2024.x and later.
+#
+# See README.md for setup and usage instructions.
+#
+
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from homeassistant.util import dt as dt_util
+
+# A time-only value more than this far ahead of the box clock belongs to the
+# previous day (e.g. "23:59:58.00" read just after midnight), one more than
+# this far behind it to the next day (e.g. "00:30:00.00" while the latest
+# dated timestamp is still from 23:00).
+_ROLLOVER = timedelta(hours=12)
+
+_DIGITS = frozenset("0123456789")
+
+# Latest full (dated) box timestamp seen; the reference for time-only values.
+_box_now: Optional[datetime] = None
+
+
+def _fraction(s: str, pos: int) -> Tuple[int, int]:
+    """Microseconds of a ``.fff`` fraction at ``pos`` and the index after it."""
+    if pos >= len(s) or s[pos] != ".":
+        return 0, pos
+    end = pos + 1
+    while end < len(s) and s[end] in _DIGITS:
+        end += 1
+    digits = s[pos + 1:end]
+    if not digits:
+        raise ValueError(s)
+    return int(digits[:6].ljust(6, "0")), end
+
+
+def _zone(s: str, pos: int, local: tzinfo) -> tzinfo:
+    """UTC for "Z", a ``+HH:MM`` / ``-HH:MM`` offset, otherwise ``local``
+    (anything trailing, e.g. the ⚠️ stale marker, is ignored)."""
+    if pos < len(s) and s[pos] == "Z":
+        return timezone.utc
+    if pos + 6 <= len(s) and s[pos] in "+-" and s[pos + 3] == ":":
+        offset = timedelta(hours=int(s[pos + 1:pos + 3]), minutes=int(s[pos + 4:pos + 6]))
+        return timezone(-offset if s[pos] == "-" else offset)
+    return local
+
+
+def _fixed(dt: datetime) -> datetime:
+    """``dt`` with its zone replaced by the fixed offset in effect.
+
+    Differences between two datetimes sharing a ZoneInfo are wall-clock
+    differences; across a DST change they would be off by an hour.
+    """
+    return dt.replace(tzinfo=timezone(dt.utcoffset()))
+
+
+def _is_clock(s: str, pos: int) -> bool:
+    """``HH:MM:SS`` at ``pos``."""
+    return (
+        len(s) >= pos + 8
+        and s[pos + 2] == ":"
+        and s[pos + 5] == ":"
+        and s[pos] in _DIGITS
+        and s[pos + 7] in _DIGITS
+    )
+
+
+@lru_cache(maxsize=256)
+def _parse_dated(s: str, local: tzinfo) -> Optional[datetime]:
+    """Parse a dated timestamp (ISO-like or US format), or None.
+
+    Values without a zone are read in ``local``.
+    """
+    try:
+        # YYYY-MM-DD[ T]HH:MM:SS[.f][Z|±HH:MM]
+        if len(s) >= 19 and s[4] == "-" and s[7] == "-" and s[10] in " T" and _is_clock(s, 11):
+            micro, end = _fraction(s, 19)
+            return _fixed(datetime(
+                int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                int(s[11:13]), int(s[14:16]), int(s[17:19]), micro,
+                tzinfo=_zone(s, end, local),
+            ))
+
+        # M/D/YYYY H:MM:SS[ AM|PM]
+        date_part, sep, time_part = s.partition(" ")
+        if not sep or date_part.count("/") != 2:
+            return None
+        month, day, year = date_part.split("/")
+        hour, minute, rest = time_part.split(":", 2)
+        second = rest[:2]
+        suffix = rest[2:].strip(" \u00a0\u202f").upper()
+        hour_i = int(hour)
+        if suffix.startswith("PM") and hour_i < 12:
+            hour_i += 12
+        elif suffix.startswith("AM") and hour_i == 12:
+            hour_i = 0
+        return _fixed(datetime(
+            int(year), int(month), int(day), hour_i, int(minute), int(second),
+            tzinfo=local,
+        ))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=256)
+def _parse_clock(s: str) -> Optional[Tuple[int, int, int, int]]:
+    """Parse a time-only ``HH:MM:SS[.ff]`` value, or None."""
+    if not _is_clock(s, 0):
+        return None
+    try:
+        micro, end = _fraction(s, 8)
+        if end != len(s):
+            return None
+        hms = int(s[0:2]), int(s[3:5]), int(s[6:8]), micro
+    except ValueError:
+        return None
+    if hms[0] > 23 or hms[1] > 59 or hms[2] > 59:
+        return None
+    return hms
+
+
+def _box_day(clock: Tuple[int, int, int, int], now: datetime) -> date:
+    """Date a time-only value belongs to: the date of ``now`` in its zone,
+    the previous or next one when the value is too far ahead or behind."""
+    day = now.date()
+    candidate = datetime(day.year, day.month, day.day, *clock, tzinfo=now.tzinfo)
+    if candidate - now > _ROLLOVER:
+        day -= timedelta(days=1)
+    elif candidate - now < -_ROLLOVER:
+        day += timedelta(days=1)
+    return day
+
+
+def _box_clock_now() -> datetime:
+    """The box's current time in the Home Assistant zone.
+
+    The reference is the latest dated timestamp the box reported (Site Data
+    rows carry one on every scrape); the host clock is only used before the
+    first one arrives or when it is more than the rollover window off.
+    """
+    host_now = dt_util.now()
+    if _box_now is None or abs(host_now - _box_now) >= _ROLLOVER:
+        return host_now
+    return _box_now.astimezone(host_now.tzinfo)
+
+
+@lru_cache(maxsize=256)
+def _clock_datetime(day: date, clock: Tuple[int, int, int, int], zone: tzinfo) -> datetime:
+    return _fixed(datetime(day.year, day.month, day.day, *clock, tzinfo=zone))
+
+
+@lru_cache(maxsize=256)
+def _iso_clock(day: date, clock: Tuple[int, int, int, int], zone: tzinfo) -> str:
+    return _clock_datetime(day, clock, zone).isoformat()
+
+
+@lru_cache(maxsize=256)
+def _iso_dated(s: str, local: tzinfo) -> Optional[str]:
+    dt = _parse_dated(s, local)
+    return dt.isoformat() if dt is not None else None
+
+
+def _note_box_time(dt: datetime) -> None:
+    global _box_now
+    if _box_now is None or dt > _box_now:
+        _box_now = dt
+
+
+def parse_box_datetime(raw: Optional[str]) -> Optional[datetime]:
+    """Timezone-aware datetime of a box timestamp in any firmware format."""
+    if not raw:
+        return None
+    s = raw.strip()
+    clock = _parse_clock(s)
+    if clock is not None:
+        now = _box_clock_now()
+        return _clock_datetime(_box_day(clock, now), clock, now.tzinfo)
+    dt = _parse_dated(s, dt_util.DEFAULT_TIME_ZONE)
+    if dt is not None:
+        _note_box_time(dt)
+    return dt
+
+
+def normalize_timestamp(raw: Optional[str]) -> Optional[str]:
+    """Timezone-aware ISO string for a box timestamp.
+
+    Unparseable values are returned unchanged (the attribute then still shows
+    what the box reported); empty values become None.
+    """
+    if not raw:
+        return None
+    s = raw.strip()
+    clock = _parse_clock(s)
+    if clock is not None:
+        now = _box_clock_now()
+        return _iso_clock(_box_day(clock, now), clock, now.tzinfo)
+    local = dt_util.DEFAULT_TIME_ZONE
+    dt = _parse_dated(s, local)
+    if dt is None:
+        return raw
+    _note_box_time(dt)
+    return _iso_dated(s, local)
@@ -17,21 +17,21 @@
 #
 
 import logging
+import math
 import re
-from datetime import datetime
 from functools import lru_cache
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 from bs4 import BeautifulSoup, Tag
 
 from .const import (
     DEFAULT_UNITS,
-    DEVICE_CLASS_OVERRIDES,
-    ENPAL_TIMESTAMP_FORMAT,
     LEGACY_GROUP_CHOICES,
     SENSOR_KEY_ALIASES,
     UNIT_DEVICE_CLASS_MAP,
 )
+from .models import SensorReading
+from .timestamps import normalize_timestamp
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -56,71 +56,74 @@ INV_STATE_RE = re.compile(
 )
 
 
-def expand_inverter_system_state(group: str, raw_text: str, timestamp_iso: Optional[str]) -> List[Dict[str, Any]]:
+@lru_cache(maxsize=32)
+def match_inverter_system_state(raw_text: str) -> Optional[Tuple[str, str]]:
+    """Return the (decimal, bits) pair of a system-state string, or None.
+
+    Cached: the same raw value arrives on every scrape and RenderBatch, while
+    the bitfield itself only changes a few times a day.
+    """
+    m = INV_STATE_RE.search(raw_text)
+    if not m:
+        return None
+    return m.group(1), m.group(2).strip()
+
+
+@lru_cache(maxsize=32)
+def _inverter_system_state_values(group: str, dec: str, bitstr: str) -> Tuple[Tuple[str, str], ...]:
+    """(name, value) pairs of the split sensors for one (decimal, bits) pair."""
+    # LSB right: idx 0 = right border
+    flags = [
+        (label, (idx < len(bitstr)) and (bitstr[-(idx + 1)] == "1"))
+        for idx, label in INV_BITS
+    ]
+    set_flags = [label for label, active in flags if active]
+    summary = ", ".join(set_flags) if set_flags else "None"
+
+    values = [
+        # Decimals as separate sensor
+        (friendly_name(group, "System state decimal"), dec),
+        # Flags as summary sensor
+        (friendly_name(group, "System state flags"), summary[:240]),
+    ]
+    # Each individual flag as separate sensor (no binary_sensor, just on/off)
+    for label, active in flags:
+        values.append((friendly_name(group, f"System state: {label}"), "on" if active else "off"))
+    return tuple(values)
+
+
+def expand_inverter_system_state(
+    group: str,
+    raw_text: str,
+    timestamp_iso: Optional[str],
+    enabled: bool = True,
+) -> List[SensorReading]:
     """
     Builds multiple sensors from 'system_state' binary sensor.
     """
-    out: List[Dict[str, Any]] = []
-    m = INV_STATE_RE.search(raw_text or "")
-    if not m:
+    state = match_inverter_system_state(raw_text or "")
+    if state is None:
         # Leave a compact version if regex not matched to keep sensor available.
         compact = (raw_text or "")[:240]
-        out.append({
-            "name": friendly_name(group, "System state (compact)"),
-            "value": compact,
-            "unit": None,
-            "device_class": None,
-            "enabled": True,
-            "enpal_last_update": timestamp_iso,
-            "group": group,
-        })
         _LOGGER.debug("[Enpal] INV split: regex not matched, created compact sensor only (group=%s)", group)
-        return out
-
-    dec = m.group(1)
-    bitstr = m.group(2).strip()
-
-    # Decimals as separate sensor
-    out.append({
-        "name": friendly_name(group, "System state decimal"),
-        "value": dec,
-        "unit": None,
-        "device_class": None,
-        "enabled": True,
-        "enpal_last_update": timestamp_iso,
-        "group": group,
-    })
-
-    # Flags as summary sensor
-    set_flags: List[str] = []
-    # LSB right: idx 0 = right border
-    for idx, label in INV_BITS:
-        active = (idx < len(bitstr)) and (bitstr[-(idx + 1)] == "1")
-        if active:
-            set_flags.append(label)
-    summary = ", ".join(set_flags) if set_flags else "None"
-    out.append({
-        "name": friendly_name(group, "System state flags"),
-        "value": summary[:240],
-        "unit": None,
-        "device_class": None,
-        "enabled": True,
-        "enpal_last_update": timestamp_iso,
-        "group": group,
-    })
-
-    # Ech individual flag as separate sensor
-    for idx, label in INV_BITS:
-        active = (idx < len(bitstr)) and (bitstr[-(idx + 1)] == "1")
-        out.append({
-            "name": friendly_name(group, f"System state: {label}"),
-            "value": "on" if active else "off",
-            "unit": None,
-            "device_class": None,  # no binary_sensor here, just a regular sensor with on/off
-            "enabled": True,
-            "enpal_last_update": timestamp_iso,
-            "group": group,
-        })
+        return [SensorReading.create(
+            friendly_name(group, "System state (compact)"),
+            compact,
+            enabled=enabled,
+            enpal_last_update=timestamp_iso,
+            group=group,
+        )]
+
+    out = [
+        SensorReading.create(
+            name,
+            value,
+            enabled=enabled,
+            enpal_last_update=timestamp_iso,
+            group=group,
+        )
+        for name, value in _inverter_system_state_values(group, *state)
+    ]
 
     _LOGGER.debug("[Enpal] INV split created %d sensors for group=%s", len(out), group)
     return out
@@ -285,11 +288,44 @@ def excluded_groups_from_options(options: Dict[str, Any]) -> List[str]:
     return [g for g in LEGACY_GROUP_CHOICES if g not in selected]
 
 
+def parse_deadbands(text: Optional[str]) -> Dict[str, Tuple[float, float]]:
+    """Deadband table from its options text.
+
+    Entries are ``key=absolute`` or ``key=absolute:relative``, separated by
+    commas or line breaks; ``key`` is a device class or a sensor id and
+    ``relative`` a fraction of the last written value (0.02 = 2 %). An empty
+    text is an empty table. Raises ValueError for a malformed entry.
+    """
+    bands: Dict[str, Tuple[float, float]] = {}
+    for entry in re.split(r"[,\n]", text or ""):
+        entry = entry.strip()
+        if not entry:
+            continue
+        key, sep, band = entry.partition("=")
+        key = key.strip()
+        if not sep or not key:
+            raise ValueError(f"Invalid deadband entry: {entry!r}")
+        absolute, _, relative = band.partition(":")
+        values = (float(absolute), float(relative) if relative.strip() else 0.0)
+        if not all(math.isfinite(v) and v >= 0 for v in values):
+            raise ValueError(f"Invalid deadband entry: {entry!r}")
+        bands[key] = values
+    return bands
+
+
+def format_deadbands(bands: Mapping[str, Tuple[float, float]]) -> str:
+    """Options text of a deadband table, see :func:`parse_deadbands`."""
+    return ", ".join(
+        f"{key}={absolute:g}:{relative:g}" if relative else f"{key}={absolute:g}"
+        for key, (absolute, relative) in bands.items()
+    )
+
+
 def parse_enpal_html_sensors(
     html: str,
     groups: List[str],
     excluded_groups: Optional[List[str]] = None,
-) -> List[Dict[str, Any]]:
+) -> List[SensorReading]:
     """Parse the HTML content and extract sensor data.
 
     Every card is parsed regardless of the group selection; groups are
@@ -305,7 +341,7 @@ def parse_enpal_html_sensors(
         excluded_groups = [g for g in DEFAULT_GROUPS if g not in groups]
 
     soup = BeautifulSoup(html, 'html.parser')
-    sensors: List[Dict[str, Any]] = []
+    sensors: List[SensorReading] = []
     parsed_cards: List[str] = []
     disabled_cards: List[str] = []
 
@@ -338,8 +374,10 @@ def parse_enpal_html_sensors(
             ", ".join(disabled_cards) or "none",
         )
 
-    # Calculate missing current sensors from power and voltage (I = P / U)
-    sensors = add_calculated_current_sensors(sensors)
+    # Derived sensors: phase currents (I = P / U), net grid power, ...
+    from .derived import apply_derived_sensors
+
+    sensors = apply_derived_sensors(sensors)
 
     return sensors
 
@@ -362,10 +400,13 @@ def is_note_cell(cell: Tag) -> bool:
     return "pi-note-cell" in classes and cell.has_attr("colspan")
 
 
-def parse_card_rows(card: Tag, group: str, excluded_groups: List[str]) -> List[Dict[str, Any]]:
+def parse_card_rows(card: Tag, group: str, excluded_groups: List[str]) -> List[SensorReading]:
     """Extracts sensors from a group."""
+    from .registry import get_registry
+
+    registry = get_registry()
     rows = card.find_all("tr")[1:]  # assume first row == header
-    sensor_list: List[Dict[str, Any]] = []
+    sensor_list: List[SensorReading] = []
     notes_skipped = 0
 
     for row in rows:
@@ -389,27 +430,16 @@ def parse_card_rows(card: Tag, group: str, excluded_groups: List[str]) -> List[D
         unit, device_class = get_class_and_unit(value_raw, UNIT_DEVICE_CLASS_MAP)
         value_clean, unit = normalize_value_and_unit(value_raw, unit, device_class, DEFAULT_UNITS)
         timestamp_iso = parse_timestamp(timestamp_str)
+        spec = registry.lookup_key(group, raw_name, unit, device_class)
 
-        sensor: Dict[str, Any] = {
-            "name": friendly_name(group, raw_name),
-            "value": value_clean,
-            "unit": unit,
-            "device_class": device_class,
-            "enabled": group not in excluded_groups,
-            "enpal_last_update": timestamp_iso,
-            "group": group,  # Add group for later filtering
-        }
-
-        sensor_id = make_id(sensor["name"])
-        if sensor_id in DEVICE_CLASS_OVERRIDES:
-            sensor["device_class"] = DEVICE_CLASS_OVERRIDES[sensor_id]
+        enabled = group not in excluded_groups
 
         # Trigger if the raw value matches the bit pattern (Regex) OR
         # if it's very long and contains "Bits". Works independent of sensor name/ID.
         should_expand = False
         try:
             if isinstance(value_raw, str):
-                if INV_STATE_RE.search(value_raw):
+                if match_inverter_system_state(value_raw):
                     should_expand = True
                 elif len(value_raw) > 200 and "Bits" in value_raw:
                     should_expand = True
@@ -417,16 +447,25 @@ def parse_card_rows(card: Tag, group: str, excluded_groups: List[str]) -> List[D
             _LOGGER.debug("[Enpal] INV expand check failed: %s", ex)
 
         if should_expand:
-            expanded = expand_inverter_system_state(group, value_raw, timestamp_iso)
-
             # Keep the original sensor: truncate its value so it's valid and retains its unique_id for compatibility.
-            sensor["value"] = (value_raw or "")[:240]
-            sensor_list.append(sensor)
+            value_clean = (value_raw or "")[:240]
+
+        sensor_list.append(SensorReading.create(
+            spec.name,
+            value_clean,
+            unit=unit,
+            device_class=spec.device_class,
+            enabled=enabled,
+            enpal_last_update=timestamp_iso,
+            group=group,
+            sensor_id=spec.sensor_id,
+        ))
+
+        if should_expand:
+            expanded = expand_inverter_system_state(group, value_raw, timestamp_iso, enabled)
 
             # Add the new split sensors (if any)
             if expanded:
-                for exp in expanded:
-                    exp["enabled"] = group not in excluded_groups
                 sensor_list.extend(expanded)
                 _LOGGER.debug(
                     "[Enpal] Expanded inverter state into %d sensors (group=%s, base=%s)",
@@ -434,9 +473,6 @@ def parse_card_rows(card: Tag, group: str, excluded_groups: List[str]) -> List[D
                 )
             else:
                 _LOGGER.debug("[Enpal] INV expand matched, but produced no extra sensors (group=%s)", group)
-            continue
-
-        sensor_list.append(sensor)
 
     if notes_skipped:
         _LOGGER.debug(
@@ -448,141 +484,5 @@ def parse_card_rows(card: Tag, group: str, excluded_groups: List[str]) -> List[D
 
 
 def parse_timestamp(raw: Optional[str]) -> Optional[str]:
-    """Converts a timestamp (i.g. 06.06.2025 08:42) to ISO-Format."""
-    if not raw:
-        return None
-    try:
-        dt = datetime.strptime(raw, ENPAL_TIMESTAMP_FORMAT)
-        return dt.isoformat()
-    except ValueError:
-        return raw
-
-
-def add_calculated_current_sensors(sensors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Calculate missing PowerSensor current sensors from power and voltage.
-    
-    Enpal boxes no longer provide Current.Phase.A/B/C sensors directly.
-    This function calculates them using Ohm's law: I = P / U
-    
-    If the current sensors are already provided by the Enpal box, this function
-    does nothing to avoid duplicates.
-    
-    Args:
-        sensors: List of parsed sensors
-        
-    Returns:
-        Updated sensor list with calculated current sensors added (if missing)
-    """
-    # First, check if current sensors already exist
-    existing_current_sensors = set()
-    for sensor in sensors:
-        name = sensor.get("name", "")
-        group = sensor.get("group", "")
-        
-        if group == "PowerSensor":
-            sensor_id = make_id(name)
-            # Check for existing current sensors
-            if "current_phase_a" in sensor_id:
-                existing_current_sensors.add("a")
-            elif "current_phase_b" in sensor_id:
-                existing_current_sensors.add("b")
-            elif "current_phase_c" in sensor_id:
-                existing_current_sensors.add("c")
-    
-    # If all current sensors already exist, skip calculation
-    if len(existing_current_sensors) == 3:
-        _LOGGER.debug(
-            "[Enpal] PowerSensor current sensors already provided by Enpal box, skipping calculation"
-        )
-        return sensors
-    
-    # Find power and voltage values for each phase
-    power_sensors = {}
-    voltage_sensors = {}
-    
-    for sensor in sensors:
-        name = sensor.get("name", "")
-        group = sensor.get("group", "")
-        
-        # Only process PowerSensor group
-        if group != "PowerSensor":
-            continue
-        
-        # Generate a normalized ID from the name for matching
-        sensor_id = make_id(name)
-        
-        # Collect power values (Power.AC.Phase.A/B/C)
-        if "power_ac_phase_a" in sensor_id:
-            power_sensors["a"] = sensor
-        elif "power_ac_phase_b" in sensor_id:
-            power_sensors["b"] = sensor
-        elif "power_ac_phase_c" in sensor_id:
-            power_sensors["c"] = sensor
-        # Collect voltage values (Voltage.Phase.A/B/C)
-        elif "voltage_phase_a" in sensor_id:
-            voltage_sensors["a"] = sensor
-        elif "voltage_phase_b" in sensor_id:
-            voltage_sensors["b"] = sensor
-        elif "voltage_phase_c" in sensor_id:
-            voltage_sensors["c"] = sensor
-    
-    # Calculate current for each phase where both power and voltage are available
-    calculated_count = 0
-    for phase in ["a", "b", "c"]:
-        # Skip if this phase's current sensor already exists
-        if phase in existing_current_sensors:
-            continue
-            
-        power_sensor = power_sensors.get(phase)
-        voltage_sensor = voltage_sensors.get(phase)
-        
-        if not power_sensor or not voltage_sensor:
-            continue
-            
-        try:
-            # Get numeric values as strings, then convert to float
-            power_str = get_numeric_value(power_sensor.get("value", ""))
-            voltage_str = get_numeric_value(voltage_sensor.get("value", ""))
-            
-            if not power_str or not voltage_str:
-                continue
-                
-            power_value = float(power_str)
-            voltage_value = float(voltage_str)
-            
-            if voltage_value == 0:
-                continue
-            
-            # Calculate current: I = P / U
-            current_value = power_value / voltage_value
-            
-            # Create calculated current sensor
-            phase_upper = phase.upper()
-            current_sensor = {
-                "name": f"PowerSensor: Current Phase ({phase_upper})",
-                "value": str(round(current_value, 2)),
-                "unit": "A",
-                "device_class": "current",
-                # Inherit the registry default from the source sensor so a
-                # deselected PowerSensor group stays disabled.
-                "enabled": power_sensor.get("enabled", True),
-                "enpal_last_update": power_sensor.get("enpal_last_update") or voltage_sensor.get("enpal_last_update"),
-                "group": "PowerSensor",
-            }
-            
-            sensors.append(current_sensor)
-            calculated_count += 1
-            
-        except (ValueError, ZeroDivisionError, TypeError) as e:
-            _LOGGER.debug(
-                "[Enpal] Could not calculate current for phase %s: %s",
-                phase.upper(), e
-            )
-    
-    if calculated_count > 0:
-        _LOGGER.debug(
-            "[Enpal] Calculated %d missing PowerSensor current sensor(s)",
-            calculated_count
-        )
-    
-    return sensors
+    """Converts a box timestamp (any firmware format) to a timezone-aware ISO string."""
+    return normalize_timestamp(raw)
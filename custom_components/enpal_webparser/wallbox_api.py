@@ -21,17 +21,151 @@
 
 import asyncio
 import logging
-from typing import Optional
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
 
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from .const import WALLBOX_CONFIRM_TIMEOUT
+
 # Legacy addon endpoint (kept for backward compatibility)
 _LEGACY_ADDON_ENDPOINT = "http://localhost:36725/wallbox"
 
+# Circuit status that confirms the action of an endpoint.
+_CONFIRMATIONS: Dict[str, Callable[[Dict], bool]] = {
+    "/start": lambda data: data.get("status") == "charging",
+    "/stop": lambda data: data.get("status") != "charging",
+    "/set_eco": lambda data: data.get("mode") == "eco",
+    "/set_solar": lambda data: data.get("mode") == "solar",
+    "/set_full": lambda data: data.get("mode") == "full",
+    "/set_smart": lambda data: data.get("mode") == "smart",
+}
+
+# Control action of an endpoint: log name, command kind (see
+# WallboxCommandQueue) and the click on the Blazor client.
+_ACTIONS: Dict[str, Tuple[str, str, Callable[[Any], Awaitable[bool]]]] = {
+    "/start": ("start", "charge", lambda blazor: blazor.start_charging()),
+    "/stop": ("stop", "charge", lambda blazor: blazor.stop_charging()),
+    "/set_eco": ("set Eco", "mode", lambda blazor: blazor.set_mode("eco")),
+    "/set_solar": ("set Solar", "mode", lambda blazor: blazor.set_mode("solar")),
+    "/set_full": ("set Full", "mode", lambda blazor: blazor.set_mode("full")),
+    "/set_smart": ("set Smart", "mode", lambda blazor: blazor.set_mode("smart")),
+}
+
+# Click latencies (queued until done) kept for the reported percentiles.
+_LATENCY_SAMPLES = 50
+
 _LOGGER = logging.getLogger(__name__)
 
 
+@dataclass
+class _Command:
+    kind: str  # "mode" commands supersede each other, "charge" ones do not
+    name: str
+    blazor_action: Callable[[], Awaitable[bool]]
+    addon_endpoint: str
+    queued_at: float = field(default_factory=time.monotonic)
+    waiters: List["asyncio.Future[Tuple[bool, str]]"] = field(default_factory=list)
+
+
+def _percentile(values, share: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+class WallboxCommandQueue:
+    """Runs the wallbox commands of one box one at a time.
+
+    A mode change that is the last waiting command is replaced by a newer
+    one (only the last requested mode is sent); every caller of the replaced
+    command gets the result of its replacement, together with the endpoint
+    that actually ran. A start/stop queued after a mode change keeps the
+    order: a later mode change is then queued behind it.
+    """
+
+    def __init__(self, execute: Callable[[str, Callable[[], Awaitable[bool]], str], Awaitable[bool]]):
+        self._execute = execute
+        self._pending: Deque[_Command] = deque()
+        self._running: Optional[_Command] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._max_depth = 0
+        self._commands = 0
+        self._coalesced = 0
+
+    @property
+    def depth(self) -> int:
+        """Commands waiting or running."""
+        return len(self._pending) + (self._running is not None)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and click latency (ms, queued until done)."""
+        return {
+            "depth": self.depth,
+            "max_depth": self._max_depth,
+            "commands": self._commands,
+            "coalesced": self._coalesced,
+            "latency_p50_ms": _percentile(self._latencies, 0.5),
+            "latency_p95_ms": _percentile(self._latencies, 0.95),
+        }
+
+    async def submit(
+        self,
+        kind: str,
+        name: str,
+        blazor_action: Callable[[], Awaitable[bool]],
+        addon_endpoint: str,
+    ) -> Tuple[bool, str]:
+        """Queue a command and wait for it (or its replacement) to run.
+
+        Returns the result and the addon endpoint of the command that ran.
+        """
+        waiter: "asyncio.Future[Tuple[bool, str]]" = asyncio.get_running_loop().create_future()
+        waiting = self._pending[-1] if self._pending else None
+        if waiting is not None and kind == "mode" and waiting.kind == "mode":
+            _LOGGER.info("[Enpal] Wallbox %s replaces queued %s", name, waiting.name)
+            waiting.name = name
+            waiting.blazor_action = blazor_action
+            waiting.addon_endpoint = addon_endpoint
+            waiting.waiters.append(waiter)
+            self._coalesced += 1
+        else:
+            self._pending.append(_Command(kind, name, blazor_action, addon_endpoint, waiters=[waiter]))
+            self._max_depth = max(self._max_depth, self.depth)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        return await waiter
+
+    async def _run(self) -> None:
+        while self._pending:
+            command = self._running = self._pending.popleft()
+            try:
+                result = await self._execute(
+                    command.name, command.blazor_action, command.addon_endpoint
+                )
+            except Exception as e:  # noqa: BLE001 - report to the callers, keep the queue going
+                _LOGGER.error("[Enpal] Wallbox %s failed: %s", command.name, e)
+                result = False
+            finally:
+                self._running = None
+            latency = (time.monotonic() - command.queued_at) * 1000
+            self._latencies.append(latency)
+            self._commands += 1
+            _LOGGER.debug(
+                "[Enpal] Wallbox %s done in %.0f ms (queue depth %d, p95 %.0f ms)",
+                command.name, latency, self.depth, _percentile(self._latencies, 0.95),
+            )
+            for waiter in command.waiters:
+                if not waiter.done():
+                    waiter.set_result((result, command.addon_endpoint))
+
+
 class WallboxApiClient:
     """Centralized client for Enpal Wallbox control.
 
@@ -59,6 +193,10 @@ class WallboxApiClient:
         self._enpal_base_url = enpal_base_url
         self._use_native = use_native
         self._blazor_client = None
+        self._status_callback: Optional[Callable[[Dict], None]] = None
+        # One connect/reconnect at a time; callers that waited reuse its result.
+        self._connect_lock = asyncio.Lock()
+        self._commands = WallboxCommandQueue(self._execute)
 
         if use_native:
             _LOGGER.info("[Enpal] WallboxApiClient using native Blazor mode (URL: %s)", enpal_base_url)
@@ -77,27 +215,63 @@ class WallboxApiClient:
 
         from .api.wallbox_client import WallboxBlazorClient
 
-        if self._blazor_client is None:
-            self._blazor_client = WallboxBlazorClient(self._enpal_base_url)
+        async with self._connect_lock:
+            if self._blazor_client is None:
+                self._blazor_client = WallboxBlazorClient(self._enpal_base_url)
+                if self._use_native:
+                    self._blazor_client.set_status_callback(self._status_callback)
+
+            return await self._blazor_client.ensure_fresh_connection()
 
-        return await self._blazor_client.ensure_fresh_connection()
+    def set_status_callback(self, callback: Optional[Callable[[Dict], None]]) -> None:
+        """Receive the status dict of every change the /wallbox circuit pushes.
+
+        Native mode only: in legacy mode the status comes from the addon and
+        the circuit is only opened for control actions, so the callback only
+        receives the status that confirmed an action
+        (see :meth:`call_and_refresh_sensors`).
+        """
+        self._status_callback = callback
+        if self._use_native and self._blazor_client is not None:
+            self._blazor_client.set_status_callback(callback)
 
     @property
     def _blazor_enabled(self) -> bool:
         """Whether Blazor-based control is possible (Enpal box URL known)."""
         return bool(self._enpal_base_url)
 
-    async def _control(self, action_name: str, blazor_action, addon_endpoint: str) -> bool:
-        """Run a control action, preferring Blazor with addon fallback.
+    @property
+    def command_stats(self) -> Dict[str, Any]:
+        """Depth and latency figures of the command queue.
+
+        ``confirm_p50_ms``/``confirm_p95_ms``: from a mode button press until
+        the circuit showed the new mode (native control only).
+        """
+        confirmed = self._blazor_client.confirm_latencies if self._blazor_client else []
+        return {
+            **self._commands.stats,
+            "confirm_p50_ms": _percentile(confirmed, 0.5),
+            "confirm_p95_ms": _percentile(confirmed, 0.95),
+        }
+
+    async def _control(self, endpoint: str) -> Tuple[bool, str]:
+        """Queue the control action of ``endpoint``; see :class:`WallboxCommandQueue`.
 
         Args:
-            action_name: Human-readable action name for logging.
-            blazor_action: Zero-arg coroutine function performing the Blazor click.
-            addon_endpoint: Legacy addon endpoint to fall back to (e.g. "/set_eco").
+            endpoint: Legacy addon endpoint of the action (e.g. "/set_eco"),
+                also the fallback when the Blazor click fails.
 
         Returns:
-            True if either the Blazor action or the addon call succeeded.
+            Whether the Blazor action or the addon call succeeded, and the
+            endpoint that ran (a newer mode change may have replaced this one).
         """
+        action_name, kind, click = _ACTIONS[endpoint]
+        return await self._commands.submit(
+            kind, action_name, lambda: click(self._blazor_client), endpoint
+        )
+
+    async def _execute(self, action_name: str, blazor_action, addon_endpoint: str) -> bool:
+        """Run a control action, preferring Blazor with addon fallback."""
         # Prefer the native Blazor button click (works on firmware >= 8.50 and
         # does not depend on the external addon).
         if self._blazor_enabled:
@@ -197,44 +371,38 @@ class WallboxApiClient:
     async def start_charging(self) -> bool:
         """Start wallbox charging."""
         _LOGGER.info("[Enpal] Starting wallbox charging")
-        return await self._control(
-            "start", lambda: self._blazor_client.start_charging(), "/start"
-        )
+        result, _ = await self._control("/start")
+        return result
 
     async def stop_charging(self) -> bool:
         """Stop wallbox charging."""
         _LOGGER.info("[Enpal] Stopping wallbox charging")
-        return await self._control(
-            "stop", lambda: self._blazor_client.stop_charging(), "/stop"
-        )
+        result, _ = await self._control("/stop")
+        return result
 
     async def set_mode_eco(self) -> bool:
         """Set wallbox to Eco mode."""
         _LOGGER.info("[Enpal] Setting wallbox to Eco mode")
-        return await self._control(
-            "set Eco", lambda: self._blazor_client.set_mode("eco"), "/set_eco"
-        )
+        result, _ = await self._control("/set_eco")
+        return result
 
     async def set_mode_solar(self) -> bool:
         """Set wallbox to Solar mode."""
         _LOGGER.info("[Enpal] Setting wallbox to Solar mode")
-        return await self._control(
-            "set Solar", lambda: self._blazor_client.set_mode("solar"), "/set_solar"
-        )
+        result, _ = await self._control("/set_solar")
+        return result
 
     async def set_mode_full(self) -> bool:
         """Set wallbox to Full mode."""
         _LOGGER.info("[Enpal] Setting wallbox to Full mode")
-        return await self._control(
-            "set Full", lambda: self._blazor_client.set_mode("full"), "/set_full"
-        )
+        result, _ = await self._control("/set_full")
+        return result
 
     async def set_mode_smart(self) -> bool:
         """Set wallbox to Smart mode."""
         _LOGGER.info("[Enpal] Setting wallbox to Smart mode")
-        return await self._control(
-            "set Smart", lambda: self._blazor_client.set_mode("smart"), "/set_smart"
-        )
+        result, _ = await self._control("/set_smart")
+        return result
 
     async def get_status(self, timeout: int = 15) -> Optional[dict]:
         """Get current wallbox status.
@@ -242,11 +410,15 @@ class WallboxApiClient:
         Args:
             timeout: Request timeout in seconds (default: 15)
         
+        In native mode this also (re)opens the /wallbox circuit whose pushes
+        feed the status callback; while it is down the Blazor client reads
+        the pre-rendered page over HTTP instead.
+
         Returns:
             Status dict with 'mode' and 'status' keys, or None if failed
         """
         if self._use_native:
-            if not await self._ensure_blazor_client():
+            if not await self._ensure_blazor_client() and self._blazor_client is None:
                 return None
             return await self._blazor_client.get_wallbox_data()
         return await self._get("/status", timeout=timeout)
@@ -255,43 +427,60 @@ class WallboxApiClient:
         self,
         endpoint: str,
         sensor_entities: list[str],
-        wait_time: float = 2.0
+        wait_time: float = 2.0,
+        timeout: float = WALLBOX_CONFIRM_TIMEOUT,
     ) -> bool:
-        """Call API endpoint and refresh related sensors.
-        
+        """Call API endpoint and bring related sensors up to date.
+
         For native mode, the endpoint is mapped to the corresponding action.
         For legacy mode, it calls the addon HTTP endpoint directly.
-        
+
+        While the /wallbox circuit is open the call returns as soon as it
+        shows the result of the action (``_CONFIRMATIONS``; for a mode change
+        replaced in the queue, of the one that ran), at most after
+        ``timeout`` seconds. When a status callback feeds the wallbox status
+        sensors they already have that status (native mode through the
+        circuit push, legacy mode gets the confirmed status handed over).
+        ``sensor_entities`` are refreshed right away when nothing feeds them
+        from the circuit (the status comes from ``/deviceMessages``, firmware
+        8.50+) or the confirmation timed out; an action sent to the addon
+        without a circuit waits ``wait_time`` before that refresh.
+
         Args:
             endpoint: API endpoint to call (e.g. "/start", "/set_eco")
-            sensor_entities: List of sensor entity IDs to refresh
-            wait_time: Seconds to wait before refreshing sensors
-            
+            sensor_entities: Sensor entity IDs to refresh when not fed by the circuit
+            wait_time: Seconds to wait before refreshing without a circuit
+            timeout: Seconds to wait for the circuit to confirm the action
+
         Returns:
             True if API call was successful
         """
-        # Map endpoint names to control actions. Each action prefers the native
-        # Blazor client and falls back to the legacy addon when needed, so this
-        # works the same in legacy/HTML and websocket modes.
-        endpoint_map = {
-            "/start": self.start_charging,
-            "/stop": self.stop_charging,
-            "/set_eco": self.set_mode_eco,
-            "/set_solar": self.set_mode_solar,
-            "/set_full": self.set_mode_full,
-            "/set_smart": self.set_mode_smart,
-        }
-        action = endpoint_map.get(endpoint)
-        if action is None:
+        # Each action prefers the native Blazor client and falls back to the
+        # legacy addon when needed, so this works the same in legacy/HTML and
+        # websocket modes.
+        if endpoint not in _ACTIONS:
             _LOGGER.warning("[Enpal] Unknown wallbox endpoint: %s", endpoint)
             return False
-        success = await action()
-        
-        if success and sensor_entities:
+        success, endpoint = await self._control(endpoint)
+        if not success:
+            return False
+
+        blazor = self._blazor_client
+        if blazor is not None and blazor.is_circuit_open():
+            confirmed = await blazor.wait_for_status(_CONFIRMATIONS[endpoint], timeout)
+            if not confirmed:
+                _LOGGER.info(
+                    "[Enpal] Wallbox did not confirm %s within %ss", endpoint, timeout
+                )
+            elif self._status_callback:
+                if not self._use_native:
+                    self._status_callback(confirmed)
+                return True
+        elif sensor_entities:
             # Wait for wallbox to process the change
             await asyncio.sleep(wait_time)
-            
-            # Trigger sensor updates
+
+        if sensor_entities:
             await self._hass.services.async_call(
                 "homeassistant",
                 "update_entity",
@@ -299,5 +488,5 @@ class WallboxApiClient:
                 blocking=True
             )
             _LOGGER.debug("[Enpal] Triggered refresh for sensors: %s", sensor_entities)
-        
+
         return success
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory and per-update allocations of the sensor pipeline.
+
+Builds a ~300 sensor box (real deviceMessages fixture plus a synthetic card),
+then measures with tracemalloc:
+  * retained memory of the parsed sensor list (WebSocket baseline)
+  * allocations of one RenderBatch diff (60 changed rows) plus the entity
+    fan-out that reads every sensor's value afterwards
+
+Run from the repository root:
+    python scripts/benchmark_sensor_memory.py
+"""
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.enpal_webparser.api.websocket_client import EnpalWebSocketClient  # noqa: E402
+from custom_components.enpal_webparser.const import DEFAULT_GROUPS  # noqa: E402
+from custom_components.enpal_webparser.utils import parse_enpal_html_sensors  # noqa: E402
+
+FIXTURE = Path("custom_components/enpal_webparser/tests/fixtures/deviceMessages.html")
+TARGET_SENSORS = 300
+DIFF_ROWS = 60
+ROUNDS = 20
+
+
+def _synthetic_card(count: int) -> str:
+    rows = "".join(
+        f"<tr><td>Power.Synthetic.{i}</td><td>{i * 10} W</td>"
+        f"<td>6/5/2025 12:51:{i % 60:02d} PM</td></tr>"
+        for i in range(count)
+    )
+    return (
+        '<div class="card"><div class="card-body"><h2>Inverter</h2>'
+        f"<table><tr><th>Name</th><th>Value</th><th>Timestamp</th></tr>{rows}</table>"
+        "</div></div>"
+    )
+
+
+def _build_html() -> str:
+    html = FIXTURE.read_text(encoding="utf-8")
+    base = len(parse_enpal_html_sensors(html, list(DEFAULT_GROUPS)))
+    return html.replace("</body>", _synthetic_card(TARGET_SENSORS - base) + "</body>")
+
+
+def _diff_rows(round_no: int):
+    return [
+        {
+            "key": f"Power.Synthetic.{i}",
+            "value": str(i * 10 + round_no),
+            "unit": "W",
+            "timestamp": f"2026-07-31 06:38:{round_no % 60:02d}.870Z",
+        }
+        for i in range(DIFF_ROWS)
+    ]
+
+
+def _read_all(sensors) -> int:
+    """What the entities do after a push: read every value."""
+    total = 0
+    for sensor in sensors:
+        value = sensor["value"] if isinstance(sensor, dict) else sensor.value
+        total += len(value or "")
+    return total
+
+
+def main() -> None:
+    html = _build_html()
+    parse_enpal_html_sensors(html, list(DEFAULT_GROUPS))  # warm registry/id caches
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    sensors = parse_enpal_html_sensors(html, list(DEFAULT_GROUPS))
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    # Only count what the sensor list keeps alive, not parser garbage.
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+
+    client = EnpalWebSocketClient("http://box.local", groups=list(DEFAULT_GROUPS))
+    client._set_baseline(sensors)
+    client._apply_diff(_diff_rows(0))  # warm caches
+
+    gc.collect()
+    tracemalloc.start()
+    blocks = 0
+    peak = 0
+    for round_no in range(1, ROUNDS + 1):
+        rows = _diff_rows(round_no)
+        snap_before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        client._apply_diff(rows)
+        _read_all(client._baseline)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - start)
+        snap_after = tracemalloc.take_snapshot()
+        blocks += sum(max(stat.count_diff, 0) for stat in snap_after.compare_to(snap_before, "lineno"))
+    tracemalloc.stop()
+
+    print(f"sensors:                 {len(sensors)}")
+    print(f"retained sensor list:    {retained / 1024:.1f} KiB "
+          f"({retained / len(sensors):.0f} B/sensor)")
+    print(f"per update ({DIFF_ROWS} rows):   {blocks / ROUNDS:.0f} blocks kept, "
+          f"peak {peak / 1024:.1f} KiB above baseline")
+
+
+if __name__ == "__main__":
+    main()
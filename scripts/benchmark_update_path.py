@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of one coordinator update inside a real Home Assistant core.
+
+Starts a Home Assistant instance (state machine, event bus, entity/device
+registries, restore state) in a temporary config directory and sets up the
+sensor platform through ``sensor.async_setup_entry`` in WebSocket mode.  The
+client talks to no box: its scrape returns a fixture page, pushes are fed
+through the real ``_apply_diff`` → ``_push`` → coordinator → entity path.
+
+Scenarios:
+  * synthetic: deviceMessages.html plus a synthetic Inverter card with
+    150 / 500 / 2000 rows; every push changes a quarter of those rows
+  * fixture:   deviceMessages851.html seeded with render_batch_851_initial.bin,
+    then render_batch_sample.bin replayed (mostly unchanged values)
+
+Per scenario it reports update latency percentiles (push until the loop is
+idle), state writes per push (state_changed events, i.e. recorder rows) and
+allocations per push (tracemalloc, measured in a separate pass so the timings
+are not skewed).
+
+Run from the repository root:
+    python scripts/benchmark_update_path.py
+    python scripts/benchmark_update_path.py --sizes 500 --pushes 50 --write-reduction
+    python scripts/benchmark_update_path.py --max-p95-ms 50   # exit 1 above budget
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant import config_entries, loader  # noqa: E402
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+from homeassistant.core import CoreState, HomeAssistant  # noqa: E402
+from homeassistant.helpers import (  # noqa: E402
+    area_registry as ar,
+    device_registry as dr,
+    entity,
+    entity_registry as er,
+    issue_registry as ir,
+    restore_state,
+)
+from homeassistant.helpers.entity_platform import EntityPlatform  # noqa: E402
+
+from custom_components.enpal_webparser import sensor as sensor_platform  # noqa: E402
+from custom_components.enpal_webparser.api.render_batch import parse_render_batch_strings  # noqa: E402
+from custom_components.enpal_webparser.api.websocket_client import EnpalWebSocketClient  # noqa: E402
+from custom_components.enpal_webparser.const import (  # noqa: E402
+    DEFAULT_GROUPS,
+    DOMAIN,
+    NEW_ENTITY_BATCH_DELAY,
+)
+from custom_components.enpal_webparser.utils import parse_enpal_html_sensors  # noqa: E402
+
+FIXTURE_DIR = Path("custom_components/enpal_webparser/tests/fixtures")
+DEFAULT_SIZES = (150, 500, 2000)
+CHANGED_SHARE = 0.25
+ALLOC_PUSHES = 10
+
+
+class _ReplayClient(EnpalWebSocketClient):
+    """WebSocket client whose box is a fixture page."""
+
+    page = ""
+
+    async def connect(self) -> bool:
+        self.connected = True
+        return True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def _scrape_and_parse(self):
+        return parse_enpal_html_sensors(self.page, self.groups)
+
+    async def close(self) -> None:
+        self.connected = False
+
+
+def _synthetic_card(count: int) -> str:
+    rows = "".join(
+        f"<tr><td>Power.Synthetic.{i}</td><td>{i * 10} W</td>"
+        f"<td>6/5/2025 12:51:{i % 60:02d} PM</td></tr>"
+        for i in range(count)
+    )
+    return (
+        '<div class="card"><div class="card-body"><h2>Inverter</h2>'
+        f"<table><tr><th>Name</th><th>Value</th><th>Timestamp</th></tr>{rows}</table>"
+        "</div></div>"
+    )
+
+
+def _synthetic_page(size: int) -> str:
+    """The fixture page plus ``size`` synthetic rows (on top of its own ~150)."""
+    html = (FIXTURE_DIR / "deviceMessages.html").read_text(encoding="utf-8")
+    return html.replace("</body>", _synthetic_card(size) + "</body>")
+
+
+def _synthetic_rows(synthetic: int, push_no: int):
+    """A quarter of the synthetic sensors, rotating, with fresh values."""
+    changed = max(int(synthetic * CHANGED_SHARE), 1)
+    start = push_no * changed % synthetic
+    return [
+        {
+            "key": f"Power.Synthetic.{(start + i) % synthetic}",
+            "value": str(push_no * 7 + i),
+            "unit": "W",
+            "timestamp": f"2026-07-31 06:{push_no // 60 % 60:02d}:{push_no % 60:02d}.870Z",
+        }
+        for i in range(changed)
+    ]
+
+
+async def _start_hass(config_dir: str) -> HomeAssistant:
+    """The core pieces the sensor platform needs, as the HA test harness sets them up."""
+    hass = HomeAssistant(config_dir)
+    hass.config.set_time_zone("UTC")
+    loader.async_setup(hass)
+    entity.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await asyncio.gather(
+        ar.async_load(hass), dr.async_load(hass), er.async_load(hass), ir.async_load(hass)
+    )
+    await restore_state.async_load(hass)
+    hass.set_state(CoreState.running)
+    return hass
+
+
+async def _setup_platform(hass: HomeAssistant, write_reduction: bool):
+    entry = config_entries.ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="Enpal (benchmark)",
+        data={},
+        source=config_entries.SOURCE_USER,
+        options={
+            "url": "http://box.local/deviceMessages",
+            "interval": 3600,
+            "groups": list(DEFAULT_GROUPS),
+            "data_source": "websocket",
+            "write_reduction": write_reduction,
+        },
+    )
+    hass.config_entries._entries[entry.entry_id] = entry
+    platform = EntityPlatform(
+        hass=hass,
+        logger=logging.getLogger(__name__),
+        domain="sensor",
+        platform_name=DOMAIN,
+        platform=None,
+        scan_interval=timedelta(seconds=30),
+        entity_namespace=None,
+    )
+    platform.config_entry = entry
+    config_entries.current_entry.set(entry)
+    await sensor_platform.async_setup_entry(
+        hass, entry, platform._async_schedule_add_entities_for_entry
+    )
+    await hass.async_block_till_done()
+    return entry, platform
+
+
+def _percentile(values, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+async def _run(page: str, pushes, write_reduction: bool, seed_rows=None) -> dict:
+    """Set up the platform on ``page`` and time ``pushes`` (lists of rows)."""
+    _ReplayClient.page = page
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _start_hass(config_dir)
+        writes = []
+        hass.bus.async_listen(EVENT_STATE_CHANGED, lambda event: writes.append(1))
+        with patch.object(sensor_platform, "EnpalWebSocketClient", _ReplayClient):
+            entry, platform = await _setup_platform(hass, write_reduction)
+        client = hass.data[DOMAIN]["coordinator"].api_client
+        if seed_rows:
+            client._apply_diff(seed_rows)
+            await client._push()
+            await hass.async_block_till_done()
+        # Let the new-sensor batch add the entities the seed created.
+        await asyncio.sleep(NEW_ENTITY_BATCH_DELAY + 0.1)
+        await hass.async_block_till_done()
+        entities = len(platform.entities)
+
+        async def one_push(rows) -> None:
+            client._apply_diff(rows)
+            await client._push()
+            await hass.async_block_till_done()
+
+        await one_push(pushes[0])  # warm caches
+        latencies = []
+        write_counts = []
+        for rows in pushes:
+            writes.clear()
+            start = time.perf_counter()
+            await one_push(rows)
+            latencies.append((time.perf_counter() - start) * 1000)
+            write_counts.append(len(writes))
+
+        gc.collect()
+        tracemalloc.start()
+        blocks = 0
+        for rows in pushes[:ALLOC_PUSHES]:
+            before = tracemalloc.take_snapshot()
+            await one_push(rows)
+            after = tracemalloc.take_snapshot()
+            blocks += sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno"))
+        tracemalloc.stop()
+
+        await client.close()
+        await hass.async_stop(force=True)
+
+    return {
+        "entities": entities,
+        "p50": statistics.median(latencies),
+        "p95": _percentile(latencies, 0.95),
+        "max": max(latencies),
+        "writes": statistics.mean(write_counts),
+        "blocks": blocks / min(len(pushes), ALLOC_PUSHES),
+    }
+
+
+def _report(name: str, stats: dict) -> None:
+    print(
+        f"{name:<18} {stats['entities']:>8} {stats['p50']:>9.2f} {stats['p95']:>9.2f} "
+        f"{stats['max']:>9.2f} {stats['writes']:>9.1f} {stats['blocks']:>10.0f}"
+    )
+
+
+async def main(sizes, push_count: int, write_reduction: bool) -> list:
+    """Run all scenarios; returns ``(name, stats)`` pairs."""
+    logging.basicConfig(level=logging.ERROR)
+    print(f"{push_count} pushes per scenario, write_reduction={write_reduction}")
+    print(f"{'scenario':<18} {'entities':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'max ms':>9} {'writes':>9} {'blocks':>10}")
+
+    results = []
+    for size in sizes:
+        page = _synthetic_page(size)
+        pushes = [_synthetic_rows(size, n) for n in range(push_count)]
+        stats = await _run(page, pushes, write_reduction)
+        _report(f"synthetic {size}", stats)
+        results.append((f"synthetic {size}", stats))
+
+    page = (FIXTURE_DIR / "deviceMessages851.html").read_text(encoding="utf-8")
+    probe = _ReplayClient("http://box.local", groups=list(DEFAULT_GROUPS))
+    seed = probe._extract_rows(parse_render_batch_strings(
+        (FIXTURE_DIR / "render_batch_851_initial.bin").read_bytes()
+    ))
+    diff = probe._extract_rows(parse_render_batch_strings(
+        (FIXTURE_DIR / "render_batch_sample.bin").read_bytes()
+    ))
+    stats = await _run(page, [diff] * push_count, write_reduction, seed_rows=seed)
+    _report("fixture 8.51", stats)
+    results.append(("fixture 8.51", stats))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--pushes", type=int, default=100)
+    parser.add_argument("--write-reduction", action="store_true")
+    parser.add_argument("--max-p95-ms", type=float, help="fail if any scenario's p95 is above")
+    args = parser.parse_args()
+    results = asyncio.run(main(args.sizes, args.pushes, args.write_reduction))
+    if args.max_p95_ms is not None:
+        over = [name for name, stats in results if stats["p95"] > args.max_p95_ms]
+        if over:
+            print(f"p95 above {args.max_p95_ms} ms: {', '.join(over)}")
+            sys.exit(1)